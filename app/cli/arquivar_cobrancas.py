@@ -0,0 +1,32 @@
+"""
+Arquiva as cobranças finalizadas (PAGA/FALHA) antigas, movendo-as para cobrancas_arquivadas.
+
+Uso:
+    python -m app.cli.arquivar_cobrancas --dias 30
+    python -m app.cli.arquivar_cobrancas --dias 90 --lote 1000
+"""
+
+import argparse
+import sys
+from datetime import timedelta
+
+from app.core.config import settings
+from app.db.base_class import Base
+from app.db.session import SessionLocal, engine
+from app.services.arquivamento_service import ArquivadorCobrancas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Arquivamento de cobranças finalizadas.")
+    parser.add_argument("--dias", type=float, default=settings.ARQUIVAMENTO_IDADE_DIAS, help="Idade mínima desde a finalização")
+    parser.add_argument("--lote", type=int, default=settings.ARQUIVAMENTO_LOTE, help="Cobranças movidas por transação")
+    args = parser.parse_args(argv)
+
+    Base.metadata.create_all(bind=engine)
+    arquivadas = ArquivadorCobrancas(SessionLocal, timedelta(days=args.dias), args.lote).arquivar()
+    print(f"{arquivadas} cobranças arquivadas.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
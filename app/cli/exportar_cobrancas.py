@@ -0,0 +1,40 @@
+"""
+Exporta cobranças de um período em streaming (memória constante), para conciliação.
+
+Uso:
+    python -m app.cli.exportar_cobrancas --formato csv --desde 2025-06-01 --ate 2025-07-01 -o junho.csv
+    python -m app.cli.exportar_cobrancas --formato ndjson --gzip -o junho.ndjson.gz
+"""
+
+import argparse
+import sys
+from datetime import datetime
+
+from app.db.session import SessionLocal
+from app.services.exportacao_service import ExportacaoService, FORMATOS
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Exportação de cobranças em NDJSON/CSV.")
+    parser.add_argument("--formato", choices=tuple(FORMATOS), default="ndjson")
+    parser.add_argument("--gzip", action="store_true")
+    parser.add_argument("--status")
+    parser.add_argument("--desde", type=datetime.fromisoformat, help="horaSolicitacao >= desde (ISO 8601)")
+    parser.add_argument("--ate", type=datetime.fromisoformat, help="horaSolicitacao < ate (ISO 8601)")
+    parser.add_argument("--lote", type=int, default=5000, help="Linhas buscadas por vez no cursor")
+    parser.add_argument("-o", "--saida", default="-", help="Arquivo de saída (padrão: stdout)")
+    args = parser.parse_args(argv)
+
+    blocos = ExportacaoService(SessionLocal, args.lote).exportar(args.formato, args.gzip, args.status, args.desde, args.ate)
+    saida = sys.stdout.buffer if args.saida == "-" else open(args.saida, "wb")
+    try:
+        for bloco in blocos:
+            saida.write(bloco)
+    finally:
+        if saida is not sys.stdout.buffer:
+            saida.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+"""
+Importa um CSV de cartões (colunas: nomeTitular,numero,validade,cvv), valida localmente em lotes
+vetorizados e envia à Stripe apenas as linhas válidas. Escreve um CSV de resultados por linha.
+
+Uso:
+    python -m app.cli.importar_cartoes parceiro.csv -o resultado.csv --lote 10000 --concorrencia 8
+    python -m app.cli.importar_cartoes parceiro.csv --sem-gateway   # só validação local
+"""
+
+import argparse
+import sys
+
+from app.integrations.stripe import StripeGateway
+from app.services.importacao_cartoes_service import ImportacaoCartoesService
+import app.services.cartao_service  # noqa: F401  (configura a chave da Stripe)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Importação em lote de cartões de crédito.")
+    parser.add_argument("entrada", help="CSV de entrada")
+    parser.add_argument("-o", "--saida", default="-", help="CSV de resultados (padrão: stdout)")
+    parser.add_argument("--lote", type=int, default=10_000, help="Linhas por lote vetorizado")
+    parser.add_argument("--concorrencia", type=int, default=4, help="Validações simultâneas no gateway")
+    parser.add_argument("--sem-gateway", action="store_true", help="Não valida as linhas válidas na Stripe")
+    args = parser.parse_args(argv)
+
+    service = ImportacaoCartoesService(
+        StripeGateway(),
+        concorrencia=args.concorrencia,
+        validar_no_gateway=not args.sem_gateway
+    )
+
+    with open(args.entrada, newline="", encoding="utf-8") as entrada:
+        if args.saida == "-":
+            totais = service.importar(entrada, sys.stdout, args.lote)
+        else:
+            with open(args.saida, "w", newline="", encoding="utf-8") as saida:
+                totais = service.importar(entrada, saida, args.lote)
+
+    for chave, quantidade in sorted(totais.items()):
+        print(f"{chave}: {quantidade}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Reconcilia as cobranças com os PaymentIntents da Stripe, corrigindo status divergentes em lote.
+
+Uso:
+    python -m app.cli.reconciliar_pagamentos --horas 48
+    python -m app.cli.reconciliar_pagamentos --desde 2025-06-01 --pagina 100
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+
+from app.db.session import SessionLocal
+from app.integrations.stripe import StripeGateway
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.services.reconciliacao_service import ReconciliacaoService
+import app.services.cartao_service  # noqa: F401  (configura a chave da Stripe)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Reconciliação de cobranças com a Stripe.")
+    periodo = parser.add_mutually_exclusive_group()
+    periodo.add_argument("--horas", type=float, default=24, help="Considera intents criados nas últimas N horas")
+    periodo.add_argument("--desde", type=datetime.fromisoformat, help="Considera intents criados a partir desta data (ISO 8601)")
+    parser.add_argument("--pagina", type=int, default=100, help="Intents por página (máx. 100 na Stripe)")
+    args = parser.parse_args(argv)
+
+    desde = args.desde or datetime.now(timezone.utc) - timedelta(hours=args.horas)
+    db = SessionLocal()
+    try:
+        service = ReconciliacaoService(CobrancaRepository(db), StripeGateway(), args.pagina)
+        resultado = service.reconciliar(desde)
+    finally:
+        db.close()
+    print(
+        f"{resultado.intents} intents em {resultado.paginas} páginas; "
+        f"{resultado.cobrancas_corrigidas} cobranças corrigidas; {resultado.intents_sem_cobranca} sem cobrança."
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+"""
+Reconstrói a tabela cobrancas_resumo (e o estado da fila) a partir de cobrancas (backfill ou correção).
+
+Uso:
+    python -m app.cli.reconstruir_resumo
+"""
+
+import sys
+
+from app.db.base_class import Base
+from app.db.session import SessionLocal, engine
+from app.repositories.fila_estado_repository import FilaEstadoRepository
+from app.repositories.resumo_cobranca_repository import ResumoCobrancaRepository
+
+
+def main() -> int:
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        linhas = ResumoCobrancaRepository(db).reconstruir()
+        FilaEstadoRepository(db).recalcular()
+        db.commit()
+    finally:
+        db.close()
+    print(f"Resumo reconstruído: {linhas} linhas.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,41 @@
 import requests
-from typing import Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Optional
+
+from app.core.config import settings
+from app.core.metrics import medir_dependencia
 
 # A URL base do servidor de API
-BASE_URL = "https://scb-api-g8jr.onrender.com/"
+BASE_URL = settings.ALUGUEL_API_URL
+
+# Sessão com pool de conexões (keep-alive), compartilhada pelo processo; aberta/fechada no ciclo de vida da aplicação
+_sessao: Optional[requests.Session] = None
+
+
+def abrir_sessao() -> requests.Session:
+    global _sessao
+    if _sessao is None:
+        sessao = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=settings.HTTP_POOL_TAMANHO)
+        sessao.mount("http://", adaptador)
+        sessao.mount("https://", adaptador)
+        _sessao = sessao
+    return _sessao
+
+
+def fechar_sessao() -> None:
+    global _sessao
+    if _sessao is not None:
+        _sessao.close()
+        _sessao = None
+
 
 class AluguelMicroserviceClient:
 
+    @medir_dependencia("aluguel", "get_ciclista")
     def get_ciclista(self, ciclista_id: int) -> Dict[str, Any]:
         try:
-            response = requests.get(f"{BASE_URL}/ciclista/{ciclista_id}")
+            response = abrir_sessao().get(f"{BASE_URL}/ciclista/{ciclista_id}", timeout=settings.ALUGUEL_TIMEOUT_S)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.HTTPError as e:
@@ -16,12 +43,19 @@ class AluguelMicroserviceClient:
                 return None # Retorna None se o ciclista não for encontrado
             raise e
 
+    @medir_dependencia("aluguel", "get_cartao_de_credito")
     def get_cartao_de_credito(self, ciclista_id: int) -> Dict[str, Any]:
         try:
-            response = requests.get(f"{BASE_URL}/cartaoDeCredito/{ciclista_id}")
+            response = abrir_sessao().get(f"{BASE_URL}/cartaoDeCredito/{ciclista_id}", timeout=settings.ALUGUEL_TIMEOUT_S)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
                 return None # Retorna None se o cartão não for encontrado
-            raise e
\ No newline at end of file
+            raise e
+
+    @medir_dependencia("aluguel", "notificar_cobrancas_finalizadas")
+    def notificar_cobrancas_finalizadas(self, url: str, cobrancas: List[Dict[str, Any]], timeout: float = 10.0) -> None:
+        """Um POST com o lote inteiro; qualquer resposta fora de 2xx levanta HTTPError."""
+        response = abrir_sessao().post(url, json={"cobrancas": cobrancas}, timeout=timeout)
+        response.raise_for_status()
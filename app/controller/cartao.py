@@ -1,7 +1,8 @@
 from fastapi import APIRouter, status, Depends, Response
 from app.schemas.cartao_schema import NovoCartaoDeCreditoSchema
 from app.schemas.error_schema import ErroSchema
-from app.services.cartao_service import get_cartao_service, CartaoService
+from app.core.dependencies import get_cartao_service
+from app.services.cartao_service import CartaoService
 
 router = APIRouter(tags=["Externo"])
 
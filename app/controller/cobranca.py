@@ -1,22 +1,60 @@
 # Em app/api/v1/cobranca_router.py
 
-from fastapi import APIRouter, Depends, status
-from typing import List
+import orjson
+from fastapi import APIRouter, Depends, Header, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from datetime import date, datetime
+from typing import AsyncIterator, Callable, List, Literal, Optional, Sequence, Tuple
 
 # Schemas para validação e serialização de dados
 from app.schemas.nova_cobranca_schema import NovaCobrancaSchema
-from app.schemas.cobranca_schema import CobrancaSchema
+from app.schemas.cobranca_schema import CobrancaSchema, PaginaCobrancasSchema
 from app.schemas.error_schema import ErroSchema
+from app.schemas.fila_schema import StatusFilaSchema
+from app.schemas.resumo_schema import ResumoCobrancasSchema
+from app.core.cache import cache_cobrancas, etag_confere
+from app.core.eventos import Assinatura, Evento, barramento_cobrancas
+from app.core.exceptions import CartaoApiError
+from app.core.serializacao import CobrancaResponse, serializar_cobranca, serializar_cobrancas, serializar_pagina
 
 # A camada de serviço que contém a lógica de negócio
 from app.services.cobranca_service import CobrancaService
+from app.services.eventos_service import PropagadorEventos
+from app.services.exportacao_service import ExportacaoService, FORMATOS
+from app.services.idempotencia_service import IdempotenciaService
+from app.services.submissao_service import SubmissorPagamentos
 
 # A função centralizada que sabe como construir o serviço
-from app.core.dependencies import get_cobranca_service
+from app.core.config import settings
+from app.core.dependencies import (
+    get_cobranca_service,
+    get_exportacao_service,
+    get_idempotencia_service,
+    get_propagador_eventos,
+    get_submissor_pagamentos,
+)
 
 
 router = APIRouter(tags=["Externo"])
 
+DESCRICAO_IDEMPOTENCIA = "Repetições com a mesma chave recebem a resposta original sem criar nova cobrança"
+
+
+def _responder(
+        idempotencia: IdempotenciaService,
+        chave: Optional[str],
+        rota: str,
+        cobranca_data: NovaCobrancaSchema,
+        operacao: Callable[[], Tuple[int, bytes]]
+) -> CobrancaResponse:
+    if chave is None:
+        status_http, corpo = operacao()
+        return CobrancaResponse(corpo, status_code=status_http)
+    status_http, corpo, reproduzida = idempotencia.executar(chave, rota, cobranca_data.model_dump_json().encode(), operacao)
+    headers = {"Idempotent-Replayed": "true"} if reproduzida else None
+    return CobrancaResponse(corpo, status_code=status_http, headers=headers)
+
 
 # --- ENDPOINTS ---
 
@@ -27,17 +65,36 @@ router = APIRouter(tags=["Externo"])
     status_code=status.HTTP_200_OK,
     responses={
         "200": {"description": "Cobrança solicitada", "model": CobrancaSchema},
+        "202": {"description": "Cobrança em processamento (OCUPADA); o resultado chega pelo webhook da Stripe", "model": CobrancaSchema},
         "422": {"description": "Dados Inválidos", "model": ErroSchema},
     }
 )
 def realizar_cobranca(
         cobranca_data: NovaCobrancaSchema,
-        service: CobrancaService = Depends(get_cobranca_service)
+        assincrona: Optional[bool] = Query(None, description="Responde sem esperar o gateway (padrão: COBRANCA_ASSINCRONA)"),
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description=DESCRICAO_IDEMPOTENCIA),
+        service: CobrancaService = Depends(get_cobranca_service),
+        idempotencia: IdempotenciaService = Depends(get_idempotencia_service),
+        submissor: SubmissorPagamentos = Depends(get_submissor_pagamentos)
 ):
 
-    nova_cobranca = service.criar_cobranca_na_fila(cobranca_data)
-    cobranca_processada = service.processar_pagamento_de_cobranca(nova_cobranca.id)
-    return cobranca_processada
+    # Sem o segredo do webhook a confirmação da Stripe nunca chegaria às cobranças em processamento
+    if assincrona and not settings.STRIPE_WEBHOOK_SECRET:
+        raise CartaoApiError(422, "COBRANCA_ASSINCRONA_INDISPONIVEL", "O modo assíncrono exige STRIPE_WEBHOOK_SECRET.")
+    if assincrona is None:
+        assincrona = settings.COBRANCA_ASSINCRONA and bool(settings.STRIPE_WEBHOOK_SECRET)
+
+    def cobrar() -> Tuple[int, bytes]:
+        if assincrona:
+            cobranca_ocupada = service.criar_cobranca_assincrona(cobranca_data)
+            submissor.acordar()  # a submissão já está gravada: sobrevive se este worker cair
+            return status.HTTP_202_ACCEPTED, serializar_cobranca(cobranca_ocupada)
+
+        nova_cobranca = service.criar_cobranca_na_fila(cobranca_data)
+        cobranca_processada = service.processar_pagamento_de_cobranca(nova_cobranca.id)
+        return status.HTTP_200_OK, serializar_cobranca(cobranca_processada)
+
+    return _responder(idempotencia, idempotency_key, "POST /cobranca", cobranca_data, cobrar)
 
 
 @router.post(
@@ -52,9 +109,109 @@ def realizar_cobranca(
 )
 def colocar_cobranca_na_fila(
         cobranca_data: NovaCobrancaSchema,
+        idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", description=DESCRICAO_IDEMPOTENCIA),
+        service: CobrancaService = Depends(get_cobranca_service),
+        idempotencia: IdempotenciaService = Depends(get_idempotencia_service)
+):
+    def enfileirar() -> Tuple[int, bytes]:
+        return status.HTTP_200_OK, serializar_cobranca(service.criar_cobranca_na_fila(cobranca_data))
+
+    return _responder(idempotencia, idempotency_key, "POST /filaCobranca", cobranca_data, enfileirar)
+
+
+@router.get(
+    "/filaCobranca/status",
+    response_model=StatusFilaSchema,
+    summary="Saúde da fila: pendentes, em processamento, idade da mais antiga e vazão da última execução",
+    status_code=status.HTTP_200_OK,
+)
+def obter_status_fila(service: CobrancaService = Depends(get_cobranca_service)):
+    return service.obter_status_fila()
+
+
+# Declarada antes de /cobranca/{id_cobranca} para não ser capturada por ela
+@router.get(
+    "/cobranca/resumo",
+    response_model=ResumoCobrancasSchema,
+    summary="Totais de cobranças por status, ciclista e dia",
+    status_code=status.HTTP_200_OK,
+)
+def obter_resumo(
+        ciclista: Optional[int] = Query(None, description="Inclui os totais deste ciclista (sem o filtro, só os totais por status)"),
+        dia: Optional[date] = Query(None, description="Inclui os totais deste dia (sem o filtro, só os totais por status)"),
         service: CobrancaService = Depends(get_cobranca_service)
 ):
-    return service.criar_cobranca_na_fila(cobranca_data)
+    return service.obter_resumo(ciclista, dia)
+
+
+def _formatar_evento(evento: Evento) -> bytes:
+    id_evento, transicao = evento
+    return b"id: %d\nevent: transicao\ndata: %s\n\n" % (id_evento, orjson.dumps(transicao, option=orjson.OPT_UTC_Z))
+
+
+async def _stream_eventos(request: Request, assinatura: Assinatura,
+                          recuperados: Sequence[Evento] = (), ultimo_id: int = 0) -> AsyncIterator[bytes]:
+    try:
+        yield b"retry: 3000\n\n"
+        for evento in recuperados:
+            yield _formatar_evento(evento)
+        if len(recuperados) >= assinatura.buffer_maximo:
+            yield b"event: descartado\ndata: {}\n\n"  # reconectou tarde demais: relê o estado atual
+            return
+        while True:
+            evento = await assinatura.proximo(settings.EVENTOS_KEEPALIVE_S)
+            if assinatura.descartada:
+                yield b"event: descartado\ndata: {}\n\n"  # o cliente reconecta e relê o estado atual
+                return
+            if evento is None:
+                if await request.is_disconnected():
+                    return
+                yield b": keepalive\n\n"
+                continue
+            if evento[0] <= ultimo_id:
+                continue  # já enviado no replay do Last-Event-ID
+            yield _formatar_evento(evento)
+    finally:
+        barramento_cobrancas.cancelar(assinatura)
+
+
+# Declarada antes de /cobranca/{id_cobranca} para não ser capturada por ela
+@router.get(
+    "/cobranca/eventos",
+    summary="Stream (SSE) das transições de status das cobranças",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        "200": {"description": "Eventos 'transicao' (PENDENTE → OCUPADA → PAGA/FALHA)", "content": {"text/event-stream": {}}},
+        "503": {"description": "Limite de assinantes atingido", "model": ErroSchema}
+    }
+)
+async def acompanhar_cobrancas(
+        request: Request,
+        cobranca: Optional[int] = Query(None, description="Só as transições desta cobrança"),
+        ciclista: Optional[int] = Query(None, description="Só as transições das cobranças deste ciclista"),
+        last_event_id: Optional[int] = Header(None, alias="Last-Event-ID", description="Retoma depois deste evento"),
+        propagador: PropagadorEventos = Depends(get_propagador_eventos),
+):
+    assinatura = barramento_cobrancas.assinar(cobranca, ciclista)
+    if assinatura is None:
+        raise CartaoApiError(503, "LIMITE_ASSINANTES", "Limite de conexões de eventos atingido; tente novamente em instantes.")
+    recuperados: List[Evento] = []
+    if last_event_id is not None:
+        # Assinado antes do replay: o que for gravado no meio chega pelos dois caminhos e o repetido é descartado
+        try:
+            recuperados = await run_in_threadpool(
+                propagador.recuperar, last_event_id, assinatura.buffer_maximo, cobranca, ciclista
+            )
+        except Exception:
+            barramento_cobrancas.cancelar(assinatura)
+            raise
+    ultimo_id = recuperados[-1][0] if recuperados else (last_event_id or 0)
+    return StreamingResponse(
+        _stream_eventos(request, assinatura, recuperados, ultimo_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get(
@@ -64,14 +221,72 @@ def colocar_cobranca_na_fila(
     status_code=status.HTTP_200_OK,
     responses={
         "200": {"description": "Cobrança", "model": CobrancaSchema},
+        "304": {"description": "Não modificada desde o ETag informado em If-None-Match"},
         "404": {"description": "Não encontrado", "model": ErroSchema}
     }
 )
 def obter_cobranca(
         id_cobranca: int,
+        if_none_match: Optional[str] = Header(None),
+        service: CobrancaService = Depends(get_cobranca_service)
+):
+    # A sessão só abre conexão na primeira consulta: acertos no cache não tocam o banco
+    entrada = cache_cobrancas.obter(id_cobranca)
+    if entrada is None:
+        entrada = cache_cobrancas.guardar(id_cobranca, serializar_cobranca(service.obter_por_id(id_cobranca)))
+    corpo, etag = entrada
+    if etag_confere(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return CobrancaResponse(corpo, headers={"ETag": etag})
+
+
+@router.get(
+    "/cobrancas",
+    response_model=PaginaCobrancasSchema,
+    summary="Listar cobranças (paginação por cursor)",
+    status_code=status.HTTP_200_OK,
+    responses={
+        "200": {"description": "Página de cobranças", "model": PaginaCobrancasSchema},
+        "422": {"description": "Dados Inválidos", "model": ErroSchema}
+    }
+)
+def listar_cobrancas(
+        status_cobranca: Optional[Literal["PENDENTE", "PAGA", "FALHA", "CANCELADA", "OCUPADA"]] = Query(None, alias="status"),
+        ciclista: Optional[int] = None,
+        desde: Optional[datetime] = Query(None, description="horaSolicitacao >= desde"),
+        ate: Optional[datetime] = Query(None, description="horaSolicitacao < ate"),
+        cursor: Optional[str] = Query(None, description="proximoCursor da página anterior"),
+        limite: int = Query(50, ge=1, le=500),
         service: CobrancaService = Depends(get_cobranca_service)
 ):
-    return service.obter_por_id(id_cobranca)
+    cobrancas, proximo_cursor = service.listar_cobrancas(status_cobranca, ciclista, desde, ate, cursor, limite)
+    return CobrancaResponse(serializar_pagina(cobrancas, proximo_cursor))
+
+
+@router.get(
+    "/cobrancas/exportacao",
+    summary="Exportar cobranças em streaming (NDJSON ou CSV)",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        "200": {"description": "Arquivo de cobranças", "content": {"application/x-ndjson": {}, "text/csv": {}, "application/gzip": {}}},
+        "422": {"description": "Dados Inválidos", "model": ErroSchema}
+    }
+)
+def exportar_cobrancas(
+        formato: Literal["ndjson", "csv"] = "ndjson",
+        gzip: bool = False,
+        status_cobranca: Optional[Literal["PENDENTE", "PAGA", "FALHA", "CANCELADA", "OCUPADA"]] = Query(None, alias="status"),
+        desde: Optional[datetime] = Query(None, description="horaSolicitacao >= desde"),
+        ate: Optional[datetime] = Query(None, description="horaSolicitacao < ate"),
+        service: ExportacaoService = Depends(get_exportacao_service)
+):
+    nome_arquivo = f"cobrancas.{formato}" + (".gz" if gzip else "")
+    return StreamingResponse(
+        service.exportar(formato, gzip, status_cobranca, desde, ate),
+        media_type="application/gzip" if gzip else FORMATOS[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}"'}
+    )
 
 
 @router.post(
@@ -85,7 +300,12 @@ def obter_cobranca(
     }
 )
 def processar_fila(
+        agrupar_por_ciclista: bool = Query(False, description="Uma única cobrança no gateway por ciclista (padrão: FILA_AGRUPAR_POR_CICLISTA)"),
         service: CobrancaService = Depends(get_cobranca_service)
 ):
 
-    return service.processar_cobrancas_em_fila()
\ No newline at end of file
+    cobrancas_pagas = service.processar_cobrancas_em_fila(agrupar_por_ciclista=agrupar_por_ciclista)
+    response = CobrancaResponse(serializar_cobrancas(cobrancas_pagas))
+    if service.id_ultimo_perfil:
+        response.headers["X-Perfil-Id"] = service.id_ultimo_perfil
+    return response
\ No newline at end of file
@@ -1,7 +1,16 @@
-from fastapi import APIRouter, status
-from app.schemas.email_schema import EmailRequest
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query, Response, status
+from app.core.config import settings
+from app.core.container import container
+from app.core.dependencies import get_email_fila_repository, get_enviador_emails
+from app.core.exceptions import CartaoApiError
+from app.repositories.email_fila_repository import EmailFilaRepository
+from app.schemas.email_schema import EmailAceitoSchema, EmailRequest, EmailStatusSchema
 from app.schemas.error_schema import ErroSchema
 from app.services.email_service import EmailService
+from app.services.fila_email_service import EnviadorEmails
 
 router = APIRouter(prefix="/enviarEmail", tags=["Externo"])
 
@@ -14,6 +23,10 @@ router = APIRouter(prefix="/enviarEmail", tags=["Externo"])
             "description": "Email Enviado",
             "model": EmailRequest
         },
+        status.HTTP_202_ACCEPTED: {
+            "description": "Email aceito na fila; acompanhe a entrega em GET /enviarEmail/{id}",
+            "model": EmailAceitoSchema
+        },
         status.HTTP_404_NOT_FOUND: {
             "description": "E-mail não existe",
             "model": ErroSchema
@@ -24,9 +37,40 @@ router = APIRouter(prefix="/enviarEmail", tags=["Externo"])
         }
     }
 )
-def enviar_email(request: EmailRequest):
-    EmailService().enviar(
+def enviar_email(
+        request: EmailRequest,
+        response: Response,
+        assincrono: Optional[bool] = Query(None, description="Responde sem esperar o SendGrid (padrão: EMAIL_ASSINCRONO)"),
+        fila: EmailFilaRepository = Depends(get_email_fila_repository),
+        enviador: EnviadorEmails = Depends(get_enviador_emails),
+        email_service: EmailService = Depends(container.dependencia(EmailService))
+):
+    if assincrono is None:
+        assincrono = settings.EMAIL_ASSINCRONO
+
+    if assincrono:
+        email = fila.enfileirar(request.destinatario, request.assunto, request.mensagem, datetime.now(timezone.utc))
+        enviador.acordar()
+        response.status_code = status.HTTP_202_ACCEPTED
+        return EmailAceitoSchema(id=email.id, status=email.status)
+
+    email_service.enviar(
         destinatario=request.destinatario,
         assunto=request.assunto,
         mensagem=request.mensagem
-    )
\ No newline at end of file
+    )
+
+
+@router.get(
+    "/{id_email}",
+    response_model=EmailStatusSchema,
+    summary="Situação da entrega de um email aceito em modo assíncrono",
+    responses={
+        "404": {"description": "Email não encontrado", "model": ErroSchema},
+    }
+)
+def obter_status_email(id_email: int, fila: EmailFilaRepository = Depends(get_email_fila_repository)):
+    email = fila.obter_por_id(id_email)
+    if email is None:
+        raise CartaoApiError(404, "EMAIL_NAO_ENCONTRADO", f"Email com ID {id_email} não encontrado.")
+    return EmailStatusSchema.model_validate(email)
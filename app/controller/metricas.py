@@ -0,0 +1,22 @@
+from fastapi import APIRouter, Depends, status
+from fastapi.responses import PlainTextResponse
+
+from app.core.dependencies import get_cobranca_repository
+from app.core.metrics import FILA_PENDENTES, registro
+from app.repositories.cobranca_repository import CobrancaRepository
+
+router = APIRouter(tags=["Observabilidade"])
+
+
+@router.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Métricas no formato de exposição do Prometheus",
+)
+def exportar_metricas(repo: CobrancaRepository = Depends(get_cobranca_repository)):
+    FILA_PENDENTES.set(repo.obter_estado_fila().pendentes)
+    return PlainTextResponse(
+        registro.exportar(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
@@ -0,0 +1,46 @@
+from fastapi import APIRouter, Depends, Header, Request, status
+from starlette.concurrency import run_in_threadpool
+import stripe
+
+from app.core.config import settings
+from app.core.dependencies import get_aplicador_eventos_stripe
+from app.core.exceptions import CartaoApiError
+from app.schemas.error_schema import ErroSchema
+from app.schemas.webhook_schema import WebhookRecebidoSchema
+from app.services.webhook_service import AplicadorEventosStripe, EVENTOS_DE_PAGAMENTO
+
+router = APIRouter(prefix="/webhooks", tags=["Webhooks"])
+
+
+@router.post(
+    "/stripe",
+    response_model=WebhookRecebidoSchema,
+    status_code=status.HTTP_200_OK,
+    summary="Recebe eventos de PaymentIntent da Stripe",
+    responses={
+        "400": {"description": "Assinatura ou corpo inválido", "model": ErroSchema},
+        "503": {"description": "Webhook não configurado", "model": ErroSchema},
+    }
+)
+async def receber_evento_stripe(
+        request: Request,
+        stripe_signature: str = Header("", alias="Stripe-Signature"),
+        aplicador: AplicadorEventosStripe = Depends(get_aplicador_eventos_stripe)
+):
+    if not settings.STRIPE_WEBHOOK_SECRET:
+        raise CartaoApiError(503, "WEBHOOK_NAO_CONFIGURADO", "STRIPE_WEBHOOK_SECRET não foi definido.")
+
+    corpo = await request.body()
+    try:
+        evento = stripe.Webhook.construct_event(corpo, stripe_signature, settings.STRIPE_WEBHOOK_SECRET)
+    except ValueError:
+        raise CartaoApiError(400, "EVENTO_INVALIDO", "O corpo do evento não é um JSON válido.")
+    except stripe.SignatureVerificationError:
+        raise CartaoApiError(400, "ASSINATURA_INVALIDA", "A assinatura do evento não confere.")
+
+    if evento["type"] not in EVENTOS_DE_PAGAMENTO:
+        return WebhookRecebidoSchema(recebido=True)
+
+    # Espera o commit do lote em que o evento entrou (fora do event loop)
+    novo = await run_in_threadpool(aplicador.aplicar, evento)
+    return WebhookRecebidoSchema(recebido=True, duplicado=not novo)
@@ -0,0 +1,119 @@
+# app/core/admissao.py
+# Controle de admissão por classe de rota: no máximo `limite` requisições em andamento por classe.
+# As excedentes esperam em uma fila curta (FIFO) por até `espera_maxima_s`; com a fila cheia ou o
+# prazo vencido, são recusadas na hora (503 + Retry-After) em vez de se acumularem no threadpool.
+# O threadpool do AnyIO (onde rodam as rotas síncronas) é dimensionado para comportar a soma dos
+# limites: uma classe saturada nunca ocupa as threads que as outras têm garantidas.
+
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+import anyio.to_thread
+
+from app.core.metrics import ADMISSAO_AGUARDANDO, ADMISSAO_EM_ANDAMENTO, ADMISSAO_ENFILEIRADAS, ADMISSAO_REJEITADAS
+
+
+def classificar_rota(metodo: str, caminho: str) -> Optional[str]:
+    """Classe de admissão da requisição; None para rotas sem limite (métricas, webhooks, eventos, restauração)."""
+    if metodo == "POST":
+        if caminho in ("/cobranca", "/validaCartaoDeCredito"):
+            return "pagamento"
+        if caminho in ("/filaCobranca", "/processaCobrancasEmFila"):
+            return "fila"
+        if caminho == "/enviarEmail":
+            return "email"
+    elif metodo == "GET" and (caminho.startswith("/cobranca/") or caminho.startswith("/cobrancas")):
+        # O stream SSE fica aberto indefinidamente: não pode ocupar uma vaga de leitura
+        return None if caminho == "/cobranca/eventos" else "leitura"
+    return None
+
+
+class ClasseAdmissao:
+    def __init__(self, nome: str, limite: int, fila_maxima: int, espera_maxima_s: float):
+        self.nome = nome
+        self.limite = limite
+        self.fila_maxima = fila_maxima
+        self.espera_maxima_s = espera_maxima_s
+        self.em_andamento = 0
+        # Vaga liberada é repassada diretamente ao primeiro da fila (cada um no seu event loop)
+        self._fila: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+        self._lock = threading.Lock()
+
+    def _publicar(self) -> None:
+        ADMISSAO_EM_ANDAMENTO.set(self.em_andamento, classe=self.nome)
+        ADMISSAO_AGUARDANDO.set(len(self._fila), classe=self.nome)
+
+    async def entrar(self) -> bool:
+        with self._lock:
+            if self.em_andamento < self.limite:
+                self.em_andamento += 1
+                self._publicar()
+                return True
+            if len(self._fila) >= self.fila_maxima:
+                ADMISSAO_REJEITADAS.inc(classe=self.nome, motivo="fila_cheia")
+                return False
+            loop = asyncio.get_running_loop()
+            espera = (loop, loop.create_future())
+            self._fila.append(espera)
+            ADMISSAO_ENFILEIRADAS.inc(classe=self.nome)
+            self._publicar()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(espera[1]), self.espera_maxima_s)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            with self._lock:
+                ainda_na_fila = espera in self._fila
+                if ainda_na_fila:
+                    self._fila.remove(espera)
+                    self._publicar()
+            if ainda_na_fila:
+                if isinstance(e, asyncio.CancelledError):
+                    raise
+                ADMISSAO_REJEITADAS.inc(classe=self.nome, motivo="tempo_esgotado")
+                return False
+            # A vaga chegou junto com o prazo: ela já é nossa
+            if isinstance(e, asyncio.CancelledError):
+                self.sair()
+                raise
+            return True
+
+    def sair(self) -> None:
+        with self._lock:
+            while self._fila:
+                loop, futuro = self._fila.popleft()
+                try:
+                    loop.call_soon_threadsafe(_entregar_vaga, futuro)
+                except RuntimeError:  # event loop já encerrado
+                    continue
+                self._publicar()
+                return
+            self.em_andamento -= 1
+            self._publicar()
+
+
+def _entregar_vaga(futuro: asyncio.Future) -> None:
+    if not futuro.done():
+        futuro.set_result(None)
+
+
+class ControleAdmissao:
+    def __init__(self, limites: Dict[str, int], fila_maxima: int, espera_maxima_s: float):
+        self.classes = {
+            nome: ClasseAdmissao(nome, limite, fila_maxima, espera_maxima_s) for nome, limite in limites.items()
+        }
+
+    def classe_para(self, metodo: str, caminho: str) -> Optional[ClasseAdmissao]:
+        nome = classificar_rota(metodo, caminho)
+        return self.classes.get(nome) if nome else None
+
+
+def dimensionar_threadpool(limites: Dict[str, int], extras: int) -> int:
+    """Aumenta o threadpool do event loop corrente para a soma dos limites + `extras` (rotas sem classe)."""
+    limitador = anyio.to_thread.current_default_thread_limiter()
+    necessarias = sum(limites.values()) + extras
+    if limitador.total_tokens < necessarias:
+        limitador.total_tokens = necessarias
+    return int(limitador.total_tokens)
@@ -0,0 +1,71 @@
+# app/core/cache.py
+# Cache em memória (LRU com TTL) das respostas já serializadas de GET /cobranca/{id}, com o ETag
+# calculado uma única vez. O CobrancaRepository invalida a entrada a cada commit da cobrança; o TTL
+# limita a defasagem entre processos (cada worker tem o próprio cache).
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from app.core.config import settings
+
+EntradaCache = Tuple[bytes, str]  # (corpo, etag)
+
+
+def calcular_etag(corpo: bytes) -> str:
+    return '"' + hashlib.blake2b(corpo, digest_size=12).hexdigest() + '"'
+
+
+def etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidatos = {parte.strip().removeprefix("W/") for parte in if_none_match.split(",")}
+    return "*" in candidatos or etag in candidatos
+
+
+class CacheRespostas:
+    def __init__(self, maximo: int = 10000, ttl_s: float = 5.0):
+        self.maximo = maximo
+        self.ttl_s = ttl_s
+        self._entradas: "OrderedDict[int, Tuple[float, EntradaCache]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, chave: int) -> Optional[EntradaCache]:
+        with self._lock:
+            item = self._entradas.get(chave)
+            if item is None:
+                return None
+            expira_em, entrada = item
+            if expira_em < time.monotonic():
+                del self._entradas[chave]
+                return None
+            self._entradas.move_to_end(chave)
+            return entrada
+
+    def guardar(self, chave: int, corpo: bytes) -> EntradaCache:
+        entrada = (corpo, calcular_etag(corpo))
+        if self.maximo <= 0:
+            return entrada
+        with self._lock:
+            self._entradas[chave] = (time.monotonic() + self.ttl_s, entrada)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+        return entrada
+
+    def invalidar(self, chaves: Iterable[int]) -> None:
+        with self._lock:
+            for chave in chaves:
+                self._entradas.pop(chave, None)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+    def __len__(self) -> int:
+        return len(self._entradas)
+
+
+cache_cobrancas = CacheRespostas(settings.COBRANCA_CACHE_MAXIMO, settings.COBRANCA_CACHE_TTL_S)
@@ -1,10 +1,115 @@
 # app/core/config.py - JEITO NOVO/CORRIGIDO
+from typing import Dict
+
 from pydantic_settings import BaseSettings, SettingsConfigDict # Importe SettingsConfigDict
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Microsserviço Externo - Validação e Notificação"
     API_V1_STR: str = "/api/v1"
 
+    # Banco de dados e serviços externos
+    DATABASE_URL: str = "sqlite:///./test.db"
+    BANCO_CRIAR_TABELAS: bool = True
+    # SQLite: journal WAL (leitores não bloqueiam o escritor) e espera por lock em vez de "database is locked"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    ALUGUEL_API_URL: str = "https://scb-api-g8jr.onrender.com/"
+    ALUGUEL_TIMEOUT_S: float = 5.0
+    STRIPE_API_BASE: str | None = None
+    HTTP_POOL_TAMANHO: int = 32
+    STRIPE_WEBHOOK_SECRET: str | None = None
+
+    # Limitador de saída para a Stripe (balde de fichas + concorrência AIMD); taxa e concorrência máxima
+    # são da conta inteira, divididas igualmente entre os workers do servidor
+    STRIPE_TAXA_MAXIMA_POR_S: float = 25.0
+    STRIPE_CONCORRENCIA_INICIAL: int = 4
+    STRIPE_CONCORRENCIA_MAXIMA: int = 32
+    STRIPE_LATENCIA_ALVO_S: float = 2.0
+    STRIPE_ESPERA_MAXIMA_S: float = 30.0
+    # Prazo de cada requisição HTTP à Stripe e quantas vezes a biblioteca a repete em falhas de rede
+    STRIPE_TIMEOUT_S: float = 20.0
+    STRIPE_TENTATIVAS_REDE: int = 2
+
+    # Cobrança assíncrona: POST /cobranca responde em OCUPADA e o resultado chega pelo webhook
+    # (ignorada, voltando ao modo síncrono, enquanto STRIPE_WEBHOOK_SECRET não estiver definido)
+    COBRANCA_ASSINCRONA: bool = False
+    WEBHOOK_LOTE_MAXIMO: int = 100
+    WEBHOOK_LOTE_ESPERA_MS: float = 10.0
+    # Submissões das cobranças assíncronas (tabela submissoes_pagamento); o prazo da reserva fica acima
+    # do pior caso de uma submissão (aluguel + limitador + tentativas de rede da Stripe)
+    SUBMISSAO_CONCORRENCIA: int = 4
+    SUBMISSAO_TENTATIVAS_MAXIMAS: int = 10
+    SUBMISSAO_RETENTATIVA_BASE_S: float = 2.0
+    SUBMISSAO_PRAZO_S: float = 150.0
+
+    # Fila: cobra as pendências de um mesmo ciclista em um único PaymentIntent
+    FILA_AGRUPAR_POR_CICLISTA: bool = False
+
+    # E-mail assíncrono: POST /enviarEmail grava na fila (emails_fila) e responde 202
+    EMAIL_ASSINCRONO: bool = False
+    EMAIL_ENVIO_CONCORRENCIA: int = 4
+    EMAIL_TENTATIVAS_MAXIMAS: int = 5
+    EMAIL_RETENTATIVA_BASE_S: float = 2.0
+    EMAIL_ENVIO_PRAZO_S: float = 60.0
+
+    # Arquivamento: PAGA/FALHA finalizadas há mais de N dias saem de cobrancas (fica bem acima da
+    # janela de reentrega de webhooks e da reconciliação, que não enxergam o arquivo)
+    ARQUIVAMENTO_ATIVO: bool = False
+    ARQUIVAMENTO_IDADE_DIAS: float = 30.0
+    ARQUIVAMENTO_LOTE: int = 500
+    ARQUIVAMENTO_INTERVALO_S: float = 3600.0
+
+    # Callback ao aluguel com as cobranças finalizadas (desligado sem URL): lotes de até N cobranças
+    ALUGUEL_CALLBACK_URL: str | None = None
+    CALLBACK_LOTE_MAXIMO: int = 100
+    CALLBACK_INTERVALO_S: float = 1.0
+    CALLBACK_TENTATIVAS_MAXIMAS: int = 10
+    CALLBACK_RETENTATIVA_BASE_S: float = 2.0
+    CALLBACK_PRAZO_ENVIO_S: float = 60.0
+
+    # Cache de GET /cobranca/{id} (0 desliga)
+    COBRANCA_CACHE_MAXIMO: int = 10000
+    COBRANCA_CACHE_TTL_S: float = 5.0
+
+    # GET /cobranca/eventos (SSE): eventos guardados por assinante antes de desconectá-lo
+    EVENTOS_BUFFER_MAXIMO: int = 256
+    EVENTOS_ASSINANTES_MAXIMO: int = 1000
+    EVENTOS_KEEPALIVE_S: float = 15.0
+    # Leitura de eventos_cobranca por worker (intervalo) e por quanto tempo ficam para reconexões (Last-Event-ID)
+    EVENTOS_INTERVALO_LEITURA_S: float = 0.2
+    EVENTOS_RETENCAO_H: float = 1.0
+
+    # Idempotency-Key em POST /cobranca e /filaCobranca
+    IDEMPOTENCIA_VALIDADE_H: float = 24.0
+    IDEMPOTENCIA_ESPERA_MAXIMA_S: float = 30.0
+    # Prazo da reserva EM_ANDAMENTO; vencido, uma repetição assume a chave. Sem valor, é derivado dos
+    # prazos do aluguel, do limitador e da Stripe (a cobrança mais lenta possível, ver prazo_reserva)
+    IDEMPOTENCIA_RESERVA_S: float | None = None
+
+    # Controle de admissão: requisições simultâneas por classe de rota e por worker (JSON no ambiente)
+    ADMISSAO_ATIVA: bool = True
+    ADMISSAO_LIMITES: Dict[str, int] = {"pagamento": 32, "fila": 16, "leitura": 64, "email": 16}
+    ADMISSAO_FILA_MAXIMA: int = 64
+    ADMISSAO_ESPERA_MAXIMA_S: float = 2.0
+    ADMISSAO_RETRY_AFTER_S: int = 1
+    # Threads além da soma dos limites, para as rotas sem classe (métricas, webhooks, restauração)
+    ADMISSAO_THREADS_EXTRAS: int = 16
+
+    # Servidor (python -m app.servidor); SERVIDOR_WORKERS=0 usa um worker por CPU disponível
+    SERVIDOR_HOST: str = "0.0.0.0"
+    SERVIDOR_PORTA: int = 8000
+    SERVIDOR_WORKERS: int = 0
+    SERVIDOR_PRELOAD: bool = False
+    SERVIDOR_KEEPALIVE_S: int = 5
+    # Preenchido por app.servidor: limites da conta Stripe são divididos entre os workers. Os demais
+    # limites (admissão, lotes do webhook, filas em segundo plano) valem por worker.
+    SERVIDOR_WORKERS_ATIVOS: int = 1
+
+    # Observabilidade
+    LOG_LEVEL: str = "INFO"
+    SERVER_TIMING_ATIVO: bool = False
+    PERFIL_FILA_ATIVO: bool = False
+    PERFIL_DIRETORIO: str = "perfis"
+
 
     model_config = SettingsConfigDict(
         case_sensitive=True,
@@ -0,0 +1,144 @@
+# app/core/container.py
+# Container de dependências com dois escopos:
+#   - APLICACAO: uma instância por processo, criada na primeira resolução (clientes sem estado por
+#     requisição: gateway da Stripe, e-mail, aluguel, serviços que só dependem deles);
+#   - REQUISICAO: uma instância por escopo aberto (sessão do banco), finalizada ao fechar o escopo.
+# Sobrescritas (testes) valem para os dois escopos e têm precedência sobre as instâncias já criadas.
+
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+APLICACAO = "aplicacao"
+REQUISICAO = "requisicao"
+
+Fabrica = Callable[["Resolvedor"], Any]
+
+
+class Resolvedor:
+    """Interface comum ao container e aos escopos: o que as fábricas recebem para resolver dependências."""
+
+    def resolver(self, chave: Any) -> Any:
+        raise NotImplementedError
+
+
+class Container(Resolvedor):
+    def __init__(self):
+        self._provedores: Dict[Any, Tuple[Fabrica, str, Optional[Callable[[Any], None]]]] = {}
+        self._instancias: Dict[Any, Any] = {}
+        self._sobrescritas: Dict[Any, Fabrica] = {}
+        self._dependencias: Dict[Any, Callable[[], Any]] = {}
+        self._lock = threading.RLock()
+
+    def registrar(self, chave: Any, fabrica: Fabrica, escopo: str = APLICACAO,
+                  finalizar: Optional[Callable[[Any], None]] = None) -> None:
+        """`finalizar` é chamado ao fechar o escopo da requisição (ou em `limpar`, para as de aplicação)."""
+        if escopo not in (APLICACAO, REQUISICAO):
+            raise ValueError(f"Escopo desconhecido: {escopo}")
+        with self._lock:
+            self._provedores[chave] = (fabrica, escopo, finalizar)
+            self._instancias.pop(chave, None)
+
+    def _provedor(self, chave: Any) -> Tuple[Fabrica, str, Optional[Callable[[Any], None]]]:
+        try:
+            return self._provedores[chave]
+        except KeyError:
+            raise LookupError(f"Dependência não registrada: {getattr(chave, '__name__', chave)}") from None
+
+    def resolver(self, chave: Any) -> Any:
+        sobrescrita = self._sobrescritas.get(chave)
+        if sobrescrita is not None:
+            return sobrescrita(self)
+        instancia = self._instancias.get(chave)
+        if instancia is not None:
+            return instancia
+        fabrica, escopo, _ = self._provedor(chave)
+        if escopo == REQUISICAO:
+            raise LookupError(f"{getattr(chave, '__name__', chave)} tem escopo de requisição: resolva dentro de container.escopo().")
+        with self._lock:
+            instancia = self._instancias.get(chave)
+            if instancia is None:
+                instancia = fabrica(self)
+                self._instancias[chave] = instancia
+        return instancia
+
+    @contextmanager
+    def escopo(self) -> Iterator["EscopoRequisicao"]:
+        escopo = EscopoRequisicao(self)
+        try:
+            yield escopo
+        finally:
+            escopo.fechar()
+
+    def dependencia(self, chave: Any) -> Callable[[], Any]:
+        """Função para Depends(): a mesma para a mesma chave (instâncias de aplicação)."""
+        with self._lock:
+            if chave not in self._dependencias:
+                def _resolver() -> Any:
+                    return self.resolver(chave)
+                _resolver.__name__ = f"resolver_{getattr(chave, '__name__', chave)}"
+                self._dependencias[chave] = _resolver
+            return self._dependencias[chave]
+
+    def sobrescrever(self, chave: Any, instancia: Any) -> None:
+        self.sobrescrever_fabrica(chave, lambda _resolvedor: instancia)
+
+    def sobrescrever_fabrica(self, chave: Any, fabrica: Fabrica) -> None:
+        self._provedor(chave)
+        with self._lock:
+            self._sobrescritas[chave] = fabrica
+
+    def restaurar(self, chave: Any = None) -> None:
+        with self._lock:
+            if chave is None:
+                self._sobrescritas.clear()
+            else:
+                self._sobrescritas.pop(chave, None)
+
+    @contextmanager
+    def sobrescrito(self, chave: Any, instancia: Any) -> Iterator[None]:
+        self.sobrescrever(chave, instancia)
+        try:
+            yield
+        finally:
+            self.restaurar(chave)
+
+    def limpar(self) -> None:
+        """Descarta as instâncias de aplicação (recriadas na próxima resolução)."""
+        with self._lock:
+            instancias, self._instancias = self._instancias, {}
+        for chave, instancia in instancias.items():
+            finalizar = self._provedores[chave][2]
+            if finalizar is not None:
+                finalizar(instancia)
+
+
+class EscopoRequisicao(Resolvedor):
+    def __init__(self, container: Container):
+        self.container = container
+        self._instancias: Dict[Any, Any] = {}
+        self._criadas: List[Tuple[Any, Any]] = []
+
+    def resolver(self, chave: Any) -> Any:
+        sobrescrita = self.container._sobrescritas.get(chave)
+        if sobrescrita is not None:
+            return sobrescrita(self)
+        fabrica, escopo, _ = self.container._provedor(chave)
+        if escopo == APLICACAO:
+            return self.container.resolver(chave)
+        if chave not in self._instancias:
+            self._instancias[chave] = fabrica(self)
+            self._criadas.append((chave, self._instancias[chave]))
+        return self._instancias[chave]
+
+    def fechar(self) -> None:
+        # Ordem inversa da criação, como um ExitStack
+        while self._criadas:
+            chave, instancia = self._criadas.pop()
+            finalizar = self.container._provedores[chave][2]
+            if finalizar is not None:
+                finalizar(instancia)
+        self._instancias.clear()
+
+
+container = Container()
@@ -0,0 +1,8 @@
+# app/core/datas.py
+# Datas lidas do banco: o SQLite devolve DateTime(timezone=True) sem fuso, mas elas são sempre gravadas em UTC.
+
+from datetime import datetime, timezone
+
+
+def em_utc(hora: datetime) -> datetime:
+    return hora.replace(tzinfo=timezone.utc) if hora.tzinfo is None else hora.astimezone(timezone.utc)
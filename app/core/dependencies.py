@@ -1,34 +1,143 @@
 # Em app/core/dependencies.py (Versão Refinada)
 
+from datetime import timedelta
+
 from fastapi import Depends
 from sqlalchemy.orm import Session
 
 from app.clients.aluguel_client import AluguelMicroserviceClient
+from app.core.container import REQUISICAO, container
+from app.core.eventos import barramento_cobrancas
 from app.db.session import SessionLocal
 from app.integrations.stripe import StripeGateway
 from app.repositories.cobranca_repository import CobrancaRepository
+from app.repositories.email_fila_repository import EmailFilaRepository
+from app.repositories.idempotencia_repository import IdempotenciaRepository
+from app.services.arquivamento_service import ArquivadorCobrancas
+from app.services.callback_service import DespachanteCallbacks
+from app.services.cartao_service import CartaoService
 from app.services.cobranca_service import CobrancaService
 from app.services.email_service import EmailService
+from app.services.eventos_service import PropagadorEventos
+from app.core.config import settings
+from app.services.exportacao_service import ExportacaoService
+from app.services.fila_email_service import EnviadorEmails
+from app.services.idempotencia_service import IdempotenciaService, prazo_reserva
+from app.services.submissao_service import SubmissorPagamentos
+from app.services.webhook_service import AplicadorEventosStripe
+
+
+# Clientes sem estado por requisição: uma instância por processo, em vez de uma por requisição
+container.registrar(StripeGateway, lambda c: StripeGateway())
+container.registrar(EmailService, lambda c: EmailService())
+container.registrar(AluguelMicroserviceClient, lambda c: AluguelMicroserviceClient())
+container.registrar(CartaoService, lambda c: CartaoService(c.resolver(StripeGateway)))
+# Sessão do banco: uma por requisição, fechada ao fim dela
+container.registrar(Session, lambda c: SessionLocal(), escopo=REQUISICAO, finalizar=lambda db: db.close())
 
 
 def get_db() -> Session:
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+    with container.escopo() as escopo:
+        yield escopo.resolver(Session)
 
 def get_aluguel_client() -> AluguelMicroserviceClient:
-    """Retorna uma instância de AluguelClient."""
-    return AluguelMicroserviceClient()
+    """Retorna a instância de AluguelClient do processo."""
+    return container.resolver(AluguelMicroserviceClient)
+
+def get_cartao_service() -> CartaoService:
+    return container.resolver(CartaoService)
+
+# Serviços de aplicação com threads próprias: criados na primeira resolução (no lifespan, ao subir o
+# worker) e parados por container.limpar() ao encerrar
+def _parar(servico) -> None:
+    servico.parar()
+
+container.registrar(ExportacaoService, lambda c: ExportacaoService(session_factory=SessionLocal))
+container.registrar(AplicadorEventosStripe, lambda c: AplicadorEventosStripe(
+    session_factory=SessionLocal,
+    tamanho_lote=settings.WEBHOOK_LOTE_MAXIMO,
+    espera_s=settings.WEBHOOK_LOTE_ESPERA_MS / 1000,
+), finalizar=_parar)
+container.registrar(EnviadorEmails, lambda c: EnviadorEmails(
+    session_factory=SessionLocal,
+    concorrencia=settings.EMAIL_ENVIO_CONCORRENCIA,
+    tentativas_maximas=settings.EMAIL_TENTATIVAS_MAXIMAS,
+    retentativa_base_s=settings.EMAIL_RETENTATIVA_BASE_S,
+    prazo_envio_s=settings.EMAIL_ENVIO_PRAZO_S,
+), finalizar=_parar)
+container.registrar(ArquivadorCobrancas, lambda c: ArquivadorCobrancas(
+    session_factory=SessionLocal,
+    idade=timedelta(days=settings.ARQUIVAMENTO_IDADE_DIAS),
+    tamanho_lote=settings.ARQUIVAMENTO_LOTE,
+    intervalo_s=settings.ARQUIVAMENTO_INTERVALO_S,
+), finalizar=_parar)
+container.registrar(DespachanteCallbacks, lambda c: DespachanteCallbacks(
+    session_factory=SessionLocal,
+    url=settings.ALUGUEL_CALLBACK_URL,
+    aluguel_client_factory=lambda: c.resolver(AluguelMicroserviceClient),
+    tamanho_lote=settings.CALLBACK_LOTE_MAXIMO,
+    intervalo_s=settings.CALLBACK_INTERVALO_S,
+    tentativas_maximas=settings.CALLBACK_TENTATIVAS_MAXIMAS,
+    retentativa_base_s=settings.CALLBACK_RETENTATIVA_BASE_S,
+    prazo_envio_s=settings.CALLBACK_PRAZO_ENVIO_S,
+), finalizar=_parar)
+container.registrar(PropagadorEventos, lambda c: PropagadorEventos(
+    session_factory=SessionLocal,
+    barramento=barramento_cobrancas,
+    intervalo_s=settings.EVENTOS_INTERVALO_LEITURA_S,
+    retencao=timedelta(hours=settings.EVENTOS_RETENCAO_H),
+), finalizar=_parar)
+container.registrar(SubmissorPagamentos, lambda c: SubmissorPagamentos(
+    session_factory=SessionLocal,
+    submeter=submeter_pagamento_em_segundo_plano,
+    concorrencia=settings.SUBMISSAO_CONCORRENCIA,
+    tentativas_maximas=settings.SUBMISSAO_TENTATIVAS_MAXIMAS,
+    retentativa_base_s=settings.SUBMISSAO_RETENTATIVA_BASE_S,
+    prazo_s=settings.SUBMISSAO_PRAZO_S,
+), finalizar=_parar)
+
+
+def get_exportacao_service() -> ExportacaoService:
+    return container.resolver(ExportacaoService)
+
+def get_aplicador_eventos_stripe() -> AplicadorEventosStripe:
+    return container.resolver(AplicadorEventosStripe)
+
+def get_enviador_emails() -> EnviadorEmails:
+    return container.resolver(EnviadorEmails)
+
+def get_arquivador_cobrancas() -> ArquivadorCobrancas:
+    return container.resolver(ArquivadorCobrancas)
+
+def get_despachante_callbacks() -> DespachanteCallbacks:
+    return container.resolver(DespachanteCallbacks)
+
+def get_propagador_eventos() -> PropagadorEventos:
+    return container.resolver(PropagadorEventos)
+
+def get_submissor_pagamentos() -> SubmissorPagamentos:
+    return container.resolver(SubmissorPagamentos)
+
+def get_email_fila_repository(db: Session = Depends(get_db)) -> EmailFilaRepository:
+    return EmailFilaRepository(db=db)
+
+# Serviços por requisição (idempotência, cobrança) ficam fora do container: são montados sobre a sessão
+# da requisição (get_db), a mesma em que a operação protegida faz os seus commits
+def get_idempotencia_service(db: Session = Depends(get_db)) -> IdempotenciaService:
+    return IdempotenciaService(
+        IdempotenciaRepository(db),
+        validade=timedelta(hours=settings.IDEMPOTENCIA_VALIDADE_H),
+        espera_maxima_s=settings.IDEMPOTENCIA_ESPERA_MAXIMA_S,
+        reserva=prazo_reserva(settings),
+    )
 
 def get_cobranca_repository(db: Session = Depends(get_db)) -> CobrancaRepository:
     return CobrancaRepository(db=db)
 
 def get_cobranca_service(
         repo: CobrancaRepository = Depends(get_cobranca_repository),
-        gateway: StripeGateway = Depends(StripeGateway),
-        email_svc: EmailService = Depends(EmailService),
+        gateway: StripeGateway = Depends(container.dependencia(StripeGateway)),
+        email_svc: EmailService = Depends(container.dependencia(EmailService)),
         aluguel_client: AluguelMicroserviceClient = Depends(get_aluguel_client)
 ) -> CobrancaService:
 
@@ -41,4 +150,15 @@ def get_cobranca_service(
         payment_gateway=gateway,
         email_service=email_svc, # Argumento em falta adicionado
         aluguel_client=aluguel_client
-    )
\ No newline at end of file
+    )
+
+def submeter_pagamento_em_segundo_plano(id_cobranca: int) -> None:
+    """Executada pelas threads do SubmissorPagamentos: usa sessão própria, fora de qualquer requisição."""
+    with container.escopo() as escopo:
+        service = get_cobranca_service(
+            repo=CobrancaRepository(db=escopo.resolver(Session)),
+            gateway=escopo.resolver(StripeGateway),
+            email_svc=escopo.resolver(EmailService),
+            aluguel_client=escopo.resolver(AluguelMicroserviceClient)
+        )
+        service.submeter_pagamento(id_cobranca)
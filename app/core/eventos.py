@@ -0,0 +1,99 @@
+# app/core/eventos.py
+# Pub/sub em processo das transições de status das cobranças, consumido por GET /cobranca/eventos (SSE).
+# As transições são gravadas em eventos_cobranca no commit da troca de status; o PropagadorEventos de
+# cada worker lê as novas pelo id e as publica aqui, então o assinante vê as de todos os workers. Cada
+# assinante tem um buffer limitado no seu event loop. Quem não consome no ritmo (buffer cheio) é
+# desconectado em vez de fazer o publicador esperar ou acumular memória sem limite.
+
+import asyncio
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Optional, Set, Tuple
+
+from app.core.config import settings
+from app.core.metrics import EVENTOS_ASSINANTES, EVENTOS_DESCARTADOS
+
+Evento = Tuple[int, Dict[str, Any]]  # (id em eventos_cobranca, transição)
+
+
+class Assinatura:
+    def __init__(self, loop: asyncio.AbstractEventLoop, buffer_maximo: int,
+                 cobranca: Optional[int] = None, ciclista: Optional[int] = None):
+        self.loop = loop
+        self.buffer_maximo = buffer_maximo
+        self.cobranca = cobranca
+        self.ciclista = ciclista
+        self.descartada = False
+        # Só é tocado dentro do event loop do assinante (via call_soon_threadsafe): dispensa lock
+        self._buffer: Deque[Evento] = deque()
+        self._sinal = asyncio.Event()
+
+    def aceita(self, transicao: Dict[str, Any]) -> bool:
+        return (self.cobranca is None or transicao["id"] == self.cobranca) and \
+            (self.ciclista is None or transicao["ciclista"] == self.ciclista)
+
+    def _entregar(self, evento: Evento) -> None:
+        if self.descartada:
+            return
+        if len(self._buffer) >= self.buffer_maximo:
+            self.descartada = True
+            self._buffer.clear()
+            EVENTOS_DESCARTADOS.inc()
+        else:
+            self._buffer.append(evento)
+        self._sinal.set()
+
+    async def proximo(self, timeout: float) -> Optional[Evento]:
+        """Próximo evento, ou None se nada chegou no prazo (ou se o assinante foi descartado)."""
+        if not self._buffer and not self.descartada:
+            self._sinal.clear()
+            try:
+                await asyncio.wait_for(self._sinal.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._buffer.popleft() if self._buffer else None
+
+
+class BarramentoEventos:
+    def __init__(self, buffer_maximo: int = 256, assinantes_maximo: int = 1000):
+        self.buffer_maximo = buffer_maximo
+        self.assinantes_maximo = assinantes_maximo
+        self._assinantes: Set[Assinatura] = set()
+        self._lock = threading.Lock()
+
+    def assinar(self, cobranca: Optional[int] = None, ciclista: Optional[int] = None) -> Optional[Assinatura]:
+        """Chamado dentro do event loop do assinante. None quando o limite de assinantes foi atingido."""
+        assinatura = Assinatura(asyncio.get_running_loop(), self.buffer_maximo, cobranca, ciclista)
+        with self._lock:
+            if len(self._assinantes) >= self.assinantes_maximo:
+                return None
+            self._assinantes.add(assinatura)
+            EVENTOS_ASSINANTES.set(len(self._assinantes))
+        return assinatura
+
+    def cancelar(self, assinatura: Assinatura) -> None:
+        with self._lock:
+            self._assinantes.discard(assinatura)
+            EVENTOS_ASSINANTES.set(len(self._assinantes))
+
+    def publicar(self, eventos: Iterable[Evento]) -> None:
+        eventos = list(eventos)
+        if not eventos or not self._assinantes:
+            return
+        with self._lock:
+            assinantes = list(self._assinantes)
+        for assinatura in assinantes:
+            for evento in eventos:
+                if not assinatura.aceita(evento[1]):
+                    continue
+                try:
+                    assinatura.loop.call_soon_threadsafe(assinatura._entregar, evento)
+                except RuntimeError:  # event loop já encerrado
+                    self.cancelar(assinatura)
+                    break
+
+    def __len__(self) -> int:
+        return len(self._assinantes)
+
+
+barramento_cobrancas = BarramentoEventos(settings.EVENTOS_BUFFER_MAXIMO, settings.EVENTOS_ASSINANTES_MAXIMO)
@@ -0,0 +1,22 @@
+# app/core/logs.py
+# Logs estruturados: uma linha JSON por evento.
+
+import json
+import logging
+
+logger = logging.getLogger("app")
+
+
+def configurar_logs(nivel: str = "INFO") -> None:
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(nivel)
+
+
+def registrar_evento(evento: str, nivel: int = logging.INFO, **campos) -> None:
+    if not logger.isEnabledFor(nivel):
+        return
+    logger.log(nivel, json.dumps({"evento": evento, **campos}, ensure_ascii=False, default=str))
@@ -0,0 +1,289 @@
+# app/core/metrics.py
+# Registro de métricas em memória, exportado no formato de texto do Prometheus.
+
+import bisect
+import threading
+import time
+from functools import wraps
+from typing import Callable, Dict, Iterable, List, Tuple
+
+BUCKETS_PADRAO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escapar(valor: str) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatar_rotulos(nomes: Iterable[str], valores: Iterable[str], extra: str = "") -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _formatar_numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor))
+
+
+class _Metrica:
+    tipo = "untyped"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Tuple[str, ...] = ()):
+        self.nome = nome
+        self.descricao = descricao
+        self.rotulos = tuple(rotulos)
+        self._lock = threading.Lock()
+
+    def _chave(self, rotulos: Dict[str, str]) -> Tuple[str, ...]:
+        if set(rotulos) != set(self.rotulos):
+            raise ValueError(f"Rótulos esperados para '{self.nome}': {self.rotulos}")
+        return tuple(str(rotulos[nome]) for nome in self.rotulos)
+
+    def _cabecalho(self) -> List[str]:
+        return [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} {self.tipo}"]
+
+    def exportar(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Contador(_Metrica):
+    tipo = "counter"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Tuple[str, ...] = ()):
+        super().__init__(nome, descricao, rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, valor: float = 1.0, **rotulos: str) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def valor(self, **rotulos: str) -> float:
+        return self._valores.get(self._chave(rotulos), 0.0)
+
+    def exportar(self) -> List[str]:
+        linhas = self._cabecalho()
+        with self._lock:
+            itens = sorted(self._valores.items())
+        for chave, valor in itens:
+            linhas.append(f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(valor)}")
+        return linhas
+
+
+class Medidor(_Metrica):
+    tipo = "gauge"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Tuple[str, ...] = ()):
+        super().__init__(nome, descricao, rotulos)
+        self._valores: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, valor: float, **rotulos: str) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = float(valor)
+
+    def inc(self, valor: float = 1.0, **rotulos: str) -> None:
+        chave = self._chave(rotulos)
+        with self._lock:
+            self._valores[chave] = self._valores.get(chave, 0.0) + valor
+
+    def dec(self, valor: float = 1.0, **rotulos: str) -> None:
+        self.inc(-valor, **rotulos)
+
+    def valor(self, **rotulos: str) -> float:
+        return self._valores.get(self._chave(rotulos), 0.0)
+
+    def exportar(self) -> List[str]:
+        linhas = self._cabecalho()
+        with self._lock:
+            itens = sorted(self._valores.items())
+        for chave, valor in itens:
+            linhas.append(f"{self.nome}{_formatar_rotulos(self.rotulos, chave)} {_formatar_numero(valor)}")
+        return linhas
+
+
+class Histograma(_Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome: str, descricao: str, rotulos: Tuple[str, ...] = (), buckets: Tuple[float, ...] = BUCKETS_PADRAO):
+        super().__init__(nome, descricao, rotulos)
+        self.buckets = tuple(sorted(buckets))
+        # Por série: [contagem por bucket (+Inf incluído), soma, total]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observar(self, valor: float, **rotulos: str) -> None:
+        chave = self._chave(rotulos)
+        indice = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = self._series[chave] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            serie[0][indice] += 1
+            serie[1] += valor
+            serie[2] += 1
+
+    def total(self, **rotulos: str) -> int:
+        serie = self._series.get(self._chave(rotulos))
+        return serie[2] if serie else 0
+
+    def exportar(self) -> List[str]:
+        linhas = self._cabecalho()
+        with self._lock:
+            itens = sorted((chave, (list(s[0]), s[1], s[2])) for chave, s in self._series.items())
+        for chave, (contagens, soma, total) in itens:
+            acumulado = 0
+            for limite, contagem in zip(self.buckets + (float("inf"),), contagens):
+                acumulado += contagem
+                le = f'le="{_formatar_numero(limite)}"'
+                linhas.append(f"{self.nome}_bucket{_formatar_rotulos(self.rotulos, chave, le)} {acumulado}")
+            rotulos = _formatar_rotulos(self.rotulos, chave)
+            linhas.append(f"{self.nome}_sum{rotulos} {_formatar_numero(soma)}")
+            linhas.append(f"{self.nome}_count{rotulos} {total}")
+        return linhas
+
+
+class RegistroMetricas:
+    def __init__(self):
+        self._metricas: Dict[str, _Metrica] = {}
+
+    def _registrar(self, metrica: _Metrica) -> _Metrica:
+        if metrica.nome in self._metricas:
+            raise ValueError(f"Métrica '{metrica.nome}' já registrada.")
+        self._metricas[metrica.nome] = metrica
+        return metrica
+
+    def contador(self, nome: str, descricao: str, rotulos: Tuple[str, ...] = ()) -> Contador:
+        return self._registrar(Contador(nome, descricao, rotulos))
+
+    def medidor(self, nome: str, descricao: str, rotulos: Tuple[str, ...] = ()) -> Medidor:
+        return self._registrar(Medidor(nome, descricao, rotulos))
+
+    def histograma(self, nome: str, descricao: str, rotulos: Tuple[str, ...] = (), buckets: Tuple[float, ...] = BUCKETS_PADRAO) -> Histograma:
+        return self._registrar(Histograma(nome, descricao, rotulos, buckets))
+
+    def exportar(self) -> str:
+        linhas: List[str] = []
+        for metrica in self._metricas.values():
+            linhas.extend(metrica.exportar())
+        return "\n".join(linhas) + "\n"
+
+
+registro = RegistroMetricas()
+
+HTTP_DURACAO = registro.histograma(
+    "http_requisicao_duracao_segundos",
+    "Latência das requisições HTTP por rota.",
+    ("metodo", "rota", "status"),
+)
+DEPENDENCIA_DURACAO = registro.histograma(
+    "dependencia_chamada_duracao_segundos",
+    "Latência das chamadas a dependências externas.",
+    ("dependencia", "operacao"),
+)
+DEPENDENCIA_ERROS = registro.contador(
+    "dependencia_chamada_erros_total",
+    "Chamadas a dependências externas que terminaram em exceção.",
+    ("dependencia", "operacao", "erro"),
+)
+FILA_PENDENTES = registro.medidor(
+    "fila_cobrancas_pendentes",
+    "Cobranças com status PENDENTE aguardando processamento.",
+)
+FILA_LOTE_DURACAO = registro.histograma(
+    "fila_lote_duracao_segundos",
+    "Duração de cada execução do processamento da fila.",
+    buckets=(0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+FILA_PROCESSADAS = registro.contador(
+    "fila_cobrancas_processadas_total",
+    "Cobranças da fila processadas, por resultado.",
+    ("resultado",),
+)
+FILA_VAZAO = registro.medidor(
+    "fila_vazao_cobrancas_por_segundo",
+    "Vazão (cobranças/s) da última execução do processamento da fila.",
+)
+LIMITADOR_CONCORRENCIA = registro.medidor(
+    "limitador_concorrencia_limite",
+    "Limite de chamadas simultâneas (AIMD) do limitador de saída.",
+    ("dependencia",),
+)
+LIMITADOR_RECUOS = registro.contador(
+    "limitador_recuos_total",
+    "Reduções multiplicativas do limite de concorrência, por motivo (429 ou latência).",
+    ("dependencia", "motivo"),
+)
+LIMITADOR_ESPERA = registro.histograma(
+    "limitador_espera_segundos",
+    "Tempo de espera por ficha/vaga antes de chamar a dependência.",
+    ("dependencia",),
+)
+ADMISSAO_EM_ANDAMENTO = registro.medidor(
+    "admissao_requisicoes_em_andamento",
+    "Requisições admitidas em andamento, por classe de rota.",
+    ("classe",),
+)
+ADMISSAO_AGUARDANDO = registro.medidor(
+    "admissao_requisicoes_aguardando",
+    "Requisições na fila de admissão, por classe de rota.",
+    ("classe",),
+)
+ADMISSAO_ENFILEIRADAS = registro.contador(
+    "admissao_requisicoes_enfileiradas_total",
+    "Requisições que precisaram esperar por uma vaga, por classe de rota.",
+    ("classe",),
+)
+ADMISSAO_REJEITADAS = registro.contador(
+    "admissao_requisicoes_rejeitadas_total",
+    "Requisições recusadas com 503, por classe de rota e motivo.",
+    ("classe", "motivo"),
+)
+EMAIL_FILA_ENVIOS = registro.contador(
+    "email_fila_envios_total",
+    "Tentativas de entrega da fila de e-mails, por resultado (enviado, retentativa ou falha).",
+    ("resultado",),
+)
+EVENTOS_ASSINANTES = registro.medidor(
+    "eventos_cobranca_assinantes",
+    "Conexões abertas em GET /cobranca/eventos.",
+)
+EVENTOS_DESCARTADOS = registro.contador(
+    "eventos_cobranca_assinantes_descartados_total",
+    "Assinantes desconectados por não consumirem os eventos a tempo (buffer cheio).",
+)
+CALLBACK_LOTES = registro.contador(
+    "callback_aluguel_lotes_total",
+    "Lotes de cobranças finalizadas enviados ao aluguel, por resultado (confirmado ou falha).",
+    ("resultado",),
+)
+CALLBACK_DESCARTADAS = registro.contador(
+    "callback_aluguel_notificacoes_descartadas_total",
+    "Notificações ao aluguel que esgotaram as tentativas.",
+)
+SUBMISSOES_PAGAMENTO = registro.contador(
+    "submissoes_pagamento_total",
+    "Submissões de cobranças assíncronas à Stripe, por resultado (submetida, retentativa ou descartada).",
+    ("resultado",),
+)
+
+
+def medir_dependencia(dependencia: str, operacao: str) -> Callable:
+    """Decorador que registra latência e erros de uma chamada a dependência externa."""
+
+    def decorador(funcao: Callable) -> Callable:
+        @wraps(funcao)
+        def envolvida(*args, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            except Exception as e:
+                DEPENDENCIA_ERROS.inc(dependencia=dependencia, operacao=operacao, erro=type(e).__name__)
+                raise
+            finally:
+                DEPENDENCIA_DURACAO.observar(time.perf_counter() - inicio, dependencia=dependencia, operacao=operacao)
+
+        return envolvida
+
+    return decorador
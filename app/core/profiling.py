@@ -0,0 +1,33 @@
+# app/core/profiling.py
+# Perfilamento opcional (cProfile) de uma execução, salvo em arquivo .pstats.
+
+import cProfile
+import os
+import uuid
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from app.core.logs import registrar_evento
+
+
+@contextmanager
+def perfilar_execucao(nome: str, ativo: bool, diretorio: str) -> Iterator[Optional[str]]:
+    """
+    Quando ativo, executa o bloco sob o cProfile e salva '<diretorio>/<nome>-<run_id>.pstats'.
+    Produz o run_id (ou None quando desligado, sem custo algum).
+    """
+    if not ativo:
+        yield None
+        return
+
+    run_id = uuid.uuid4().hex
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield run_id
+    finally:
+        perfil.disable()
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, f"{nome}-{run_id}.pstats")
+        perfil.dump_stats(caminho)
+        registrar_evento("perfil.salvo", nome=nome, run_id=run_id, arquivo=caminho)
@@ -0,0 +1,71 @@
+# app/core/recursos.py
+# Ciclo de vida (lifespan) dos recursos de cada worker: abertos uma vez ao subir e fechados ao parar.
+# Com preload (gunicorn), o módulo da aplicação é importado no processo mestre antes do fork; por isso
+# as conexões herdadas do engine são descartadas aqui, já dentro do worker.
+
+from contextlib import asynccontextmanager
+
+import stripe
+from fastapi import FastAPI
+
+from app.clients import aluguel_client
+from app.core.admissao import dimensionar_threadpool
+from app.core.cache import cache_cobrancas
+from app.core.config import settings
+from app.core.container import container
+from app.core.dependencies import (
+    get_aplicador_eventos_stripe,
+    get_arquivador_cobrancas,
+    get_despachante_callbacks,
+    get_enviador_emails,
+    get_propagador_eventos,
+    get_submissor_pagamentos,
+)
+from app.core.logs import registrar_evento
+from app.db.session import engine
+from app.integrations import email
+
+
+def iniciar_recursos() -> None:
+    engine.dispose(close=False)  # não fecha conexões que pertencem ao processo mestre
+    aluguel_client.abrir_sessao()
+    email.abrir_cliente_sendgrid()
+    stripe.default_http_client = stripe.RequestsClient(timeout=settings.STRIPE_TIMEOUT_S)
+    stripe.max_network_retries = settings.STRIPE_TENTATIVAS_REDE
+    cache_cobrancas.limpar()
+    container.limpar()  # instâncias criadas antes do fork (preload) ou antes do cliente SendGrid compartilhado
+    if settings.EMAIL_ASSINCRONO:
+        get_enviador_emails().iniciar()  # entrega o que ficou na fila antes do reinício
+    if settings.ARQUIVAMENTO_ATIVO:
+        get_arquivador_cobrancas().iniciar()
+    get_despachante_callbacks().iniciar()  # só sobe com ALUGUEL_CALLBACK_URL configurada
+    get_propagador_eventos().iniciar()
+    get_aplicador_eventos_stripe()  # a thread só sobe com o primeiro webhook
+    if settings.STRIPE_WEBHOOK_SECRET:  # o modo assíncrono só existe com o webhook configurado
+        get_submissor_pagamentos().iniciar()  # submete o que ficou pendente antes do reinício
+    registrar_evento("recursos.iniciados")
+
+
+def encerrar_recursos() -> None:
+    # Para as threads dos serviços do container (e os descarta) antes de fechar os clientes que elas usam
+    container.limpar()
+    if stripe.default_http_client is not None:
+        stripe.default_http_client.close()
+        stripe.default_http_client = None
+    email.fechar_cliente_sendgrid()
+    aluguel_client.fechar_sessao()
+    cache_cobrancas.limpar()
+    engine.dispose()
+    registrar_evento("recursos.encerrados")
+
+
+@asynccontextmanager
+async def ciclo_de_vida(app: FastAPI):
+    # O limitador de threads pertence ao event loop: precisa ser ajustado aqui, já dentro dele
+    threads = dimensionar_threadpool(settings.ADMISSAO_LIMITES, settings.ADMISSAO_THREADS_EXTRAS)
+    registrar_evento("recursos.threadpool", threads=threads)
+    iniciar_recursos()
+    try:
+        yield
+    finally:
+        encerrar_recursos()
@@ -0,0 +1,39 @@
+# app/core/serializacao.py
+# Caminho rápido ORM -> bytes para CobrancaSchema, sem a validação dupla do response_model.
+# A saída é byte a byte igual à do caminho padrão (response_model + JSONResponse).
+
+from typing import Any, Dict, Iterable, Optional
+
+import orjson
+from fastapi import Response
+
+from app.schemas.cobranca_schema import CobrancaSchema
+
+# Mesma ordem de campos do schema (herdados de NovaCobrancaSchema primeiro)
+CAMPOS_COBRANCA = tuple(CobrancaSchema.model_fields)
+
+# OPT_UTC_Z: o Pydantic serializa datetimes em UTC com "Z" em vez de "+00:00"
+_OPCOES_ORJSON = orjson.OPT_UTC_Z
+
+
+def cobranca_para_dict(cobranca: Any) -> Dict[str, Any]:
+    dados = {campo: getattr(cobranca, campo) for campo in CAMPOS_COBRANCA}
+    dados["valor"] = float(dados["valor"])
+    return dados
+
+
+def serializar_cobranca(cobranca: Any) -> bytes:
+    return orjson.dumps(cobranca_para_dict(cobranca), option=_OPCOES_ORJSON)
+
+
+def serializar_cobrancas(cobrancas: Iterable[Any]) -> bytes:
+    return orjson.dumps([cobranca_para_dict(cobranca) for cobranca in cobrancas], option=_OPCOES_ORJSON)
+
+
+def serializar_pagina(cobrancas: Iterable[Any], proximo_cursor: Optional[str]) -> bytes:
+    pagina = {"itens": [cobranca_para_dict(cobranca) for cobranca in cobrancas], "proximoCursor": proximo_cursor}
+    return orjson.dumps(pagina, option=_OPCOES_ORJSON)
+
+
+class CobrancaResponse(Response):
+    media_type = "application/json"
@@ -0,0 +1,37 @@
+# app/core/timing.py
+# Coleta, por requisição, do tempo gasto em cada fase (db, aluguel, gateway...).
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Optional
+
+_fases: ContextVar[Optional[Dict[str, float]]] = ContextVar("fases_da_requisicao", default=None)
+
+
+def iniciar_coleta() -> Token:
+    return _fases.set({})
+
+
+def finalizar_coleta(token: Token) -> Dict[str, float]:
+    fases = _fases.get() or {}
+    _fases.reset(token)
+    return fases
+
+
+@contextmanager
+def medir_fase(nome: str):
+    # Sem coleta ativa (Server-Timing desligado) o custo é só a leitura do ContextVar.
+    fases = _fases.get()
+    if fases is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        fases[nome] = fases.get(nome, 0.0) + (time.perf_counter() - inicio) * 1000
+
+
+def formatar_server_timing(fases: Dict[str, float]) -> str:
+    return ", ".join(f"{nome};dur={duracao:.2f}" for nome, duracao in fases.items())
@@ -0,0 +1,23 @@
+# app/db/esquema.py
+# Criação das tabelas. Importa todos os modelos para registrá-los no metadata antes do create_all.
+
+from app.db.base_class import Base
+from app.db.session import engine
+import app.models.chave_idempotencia  # noqa: F401
+import app.models.cobranca  # noqa: F401
+import app.models.cobranca_arquivada  # noqa: F401
+import app.models.email_fila  # noqa: F401
+import app.models.evento_cobranca  # noqa: F401
+import app.models.evento_stripe  # noqa: F401
+import app.models.fila_estado  # noqa: F401
+import app.models.notificacao_aluguel  # noqa: F401
+import app.models.resumo_cobranca  # noqa: F401
+import app.models.submissao_pagamento  # noqa: F401
+
+
+def criar_tabelas() -> None:
+    Base.metadata.create_all(bind=engine)
+    # create_all pula tabelas que já existem; índices novos de tabelas antigas são criados aqui
+    for tabela in Base.metadata.sorted_tables:
+        for indice in tabela.indexes:
+            indice.create(bind=engine, checkfirst=True)
@@ -1,5 +1,15 @@
 from app.models.cobranca import Cobranca
+from app.models.cobranca_arquivada import CobrancaArquivada
+from app.models.resumo_cobranca import ResumoCobranca
+from app.models.evento_stripe import EventoStripe
+from app.models.chave_idempotencia import ChaveIdempotencia
+from app.models.email_fila import EmailFila
+from app.models.notificacao_aluguel import NotificacaoAluguel
+from app.models.fila_estado import FilaEstado
+from app.models.evento_cobranca import EventoCobranca
+from app.models.submissao_pagamento import SubmissaoPagamento
 from app.db.session import SessionLocal
+from app.core.cache import cache_cobrancas
 
 
 
@@ -9,7 +19,17 @@ def restaurar_dados_iniciais():
     try:
         # Remove todas as cobranças existentes
         db.query(Cobranca).delete()
+        db.query(CobrancaArquivada).delete()
+        db.query(ResumoCobranca).delete()
+        db.query(EventoStripe).delete()
+        db.query(ChaveIdempotencia).delete()
+        db.query(EmailFila).delete()
+        db.query(NotificacaoAluguel).delete()
+        db.query(FilaEstado).delete()
+        db.query(EventoCobranca).delete()
+        db.query(SubmissaoPagamento).delete()
         db.commit()
+        cache_cobrancas.limpar()
 
     finally:
         db.close()
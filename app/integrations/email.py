@@ -3,14 +3,33 @@ import sendgrid
 from sendgrid.helpers.mail import Mail
 
 from app.core.exceptions import CartaoApiError
+from app.core.metrics import medir_dependencia
+
+
+# Cliente do SendGrid criado uma vez por processo no ciclo de vida da aplicação (None fora dele)
+_cliente_compartilhado = None
+
+
+def abrir_cliente_sendgrid() -> None:
+    global _cliente_compartilhado
+    _cliente_compartilhado = sendgrid.SendGridAPIClient(
+        api_key=os.getenv("SENDGRID_API_KEY"), host=os.getenv("SENDGRID_HOST", "https://api.sendgrid.com")
+    )
+
+
+def fechar_cliente_sendgrid() -> None:
+    global _cliente_compartilhado
+    _cliente_compartilhado = None
 
 
 class EmailClient:
     def __init__(self):
         self.api_key = os.getenv("SENDGRID_API_KEY")
         self.remetente = os.getenv("EMAIL_REMETENTE")
-        self.sg = sendgrid.SendGridAPIClient(api_key=self.api_key)
+        self.host = os.getenv("SENDGRID_HOST", "https://api.sendgrid.com")
+        self.sg = _cliente_compartilhado or sendgrid.SendGridAPIClient(api_key=self.api_key, host=self.host)
 
+    @medir_dependencia("sendgrid", "enviar_email")
     def enviar_email(self, destinatario: str, assunto: str, mensagem: str):
         email = Mail(
             from_email=self.remetente,
@@ -0,0 +1,98 @@
+# app/integrations/limitador.py
+# Limitador de saída para um provedor externo: balde de fichas (taxa máxima por segundo) combinado
+# com um limite de concorrência adaptativo no estilo AIMD. Cada resposta rápida aumenta o limite
+# em 1/limite (≈ +1 por "janela" de chamadas); um 429 ou uma latência acima do alvo o multiplica
+# pelo fator de redução, no máximo uma vez por janela de recuo.
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from app.core.metrics import LIMITADOR_CONCORRENCIA, LIMITADOR_ESPERA, LIMITADOR_RECUOS
+
+
+class Chamada:
+    def __init__(self):
+        self.sobrecarga = False
+
+    def sinalizar_sobrecarga(self) -> None:
+        self.sobrecarga = True
+
+
+class LimitadorAdaptativo:
+    def __init__(
+            self,
+            nome: str,
+            taxa_por_s: float,
+            rajada: Optional[int] = None,
+            concorrencia_inicial: float = 4,
+            concorrencia_minima: float = 1,
+            concorrencia_maxima: float = 32,
+            latencia_alvo_s: float = 2.0,
+            fator_reducao: float = 0.5,
+            janela_recuo_s: float = 1.0,
+    ):
+        self.nome = nome
+        self.taxa_por_s = taxa_por_s
+        self.rajada = rajada if rajada is not None else max(1, int(taxa_por_s))
+        self.concorrencia_minima = concorrencia_minima
+        self.concorrencia_maxima = concorrencia_maxima
+        self.latencia_alvo_s = latencia_alvo_s
+        self.fator_reducao = fator_reducao
+        self.janela_recuo_s = janela_recuo_s
+        self.limite = float(concorrencia_inicial)
+        self.em_andamento = 0
+        self._fichas = float(self.rajada)
+        self._ultima_recarga = time.monotonic()
+        self._ultimo_recuo = 0.0
+        self._condicao = threading.Condition()
+        LIMITADOR_CONCORRENCIA.set(self.limite, dependencia=nome)
+
+    def _recarregar(self, agora: float) -> None:
+        self._fichas = min(self.rajada, self._fichas + (agora - self._ultima_recarga) * self.taxa_por_s)
+        self._ultima_recarga = agora
+
+    def _adquirir(self, prazo: Optional[float]) -> None:
+        with self._condicao:
+            while True:
+                agora = time.monotonic()
+                self._recarregar(agora)
+                if self.em_andamento < int(self.limite) and self._fichas >= 1:
+                    self._fichas -= 1
+                    self.em_andamento += 1
+                    return
+                if prazo is not None and agora >= prazo:
+                    raise TimeoutError(f"Sem capacidade para chamar '{self.nome}' dentro do prazo.")
+                # Sem ficha: dorme até a próxima; sem vaga: até alguém liberar (notify)
+                espera = (1 - self._fichas) / self.taxa_por_s if self._fichas < 1 else None
+                if prazo is not None:
+                    espera = min(espera, prazo - agora) if espera is not None else prazo - agora
+                self._condicao.wait(espera)
+
+    def _liberar(self, latencia_s: float, sobrecarga: bool) -> None:
+        with self._condicao:
+            self.em_andamento -= 1
+            if sobrecarga or latencia_s > self.latencia_alvo_s:
+                agora = time.monotonic()
+                if agora - self._ultimo_recuo >= self.janela_recuo_s:
+                    self._ultimo_recuo = agora
+                    self.limite = max(self.concorrencia_minima, self.limite * self.fator_reducao)
+                    LIMITADOR_RECUOS.inc(dependencia=self.nome, motivo="429" if sobrecarga else "latencia")
+            else:
+                self.limite = min(self.concorrencia_maxima, self.limite + 1 / self.limite)
+            LIMITADOR_CONCORRENCIA.set(self.limite, dependencia=self.nome)
+            self._condicao.notify_all()
+
+    @contextmanager
+    def permissao(self, timeout: Optional[float] = None) -> Iterator[Chamada]:
+        """Espera por uma ficha e uma vaga de concorrência; ao sair, ajusta o limite pelo resultado."""
+        inicio_espera = time.monotonic()
+        self._adquirir(None if timeout is None else inicio_espera + timeout)
+        LIMITADOR_ESPERA.observar(time.monotonic() - inicio_espera, dependencia=self.nome)
+        chamada = Chamada()
+        inicio = time.perf_counter()
+        try:
+            yield chamada
+        finally:
+            self._liberar(time.perf_counter() - inicio, chamada.sobrecarga)
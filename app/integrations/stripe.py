@@ -1,26 +1,104 @@
 import stripe
-from typing import Any, Dict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from app.core.config import settings
 from app.core.exceptions import CartaoApiError  # para lançar erros personalizados
+from app.core.metrics import medir_dependencia
+from app.integrations.limitador import LimitadorAdaptativo
+
+def criar_limitador_stripe() -> LimitadorAdaptativo:
+    # Os limites da conta valem para todos os workers juntos: cada processo fica com a sua parte
+    workers = max(1, settings.SERVIDOR_WORKERS_ATIVOS)
+    concorrencia_maxima = max(1, settings.STRIPE_CONCORRENCIA_MAXIMA // workers)
+    return LimitadorAdaptativo(
+        "stripe",
+        taxa_por_s=settings.STRIPE_TAXA_MAXIMA_POR_S / workers,
+        concorrencia_inicial=min(settings.STRIPE_CONCORRENCIA_INICIAL, concorrencia_maxima),
+        concorrencia_maxima=concorrencia_maxima,
+        latencia_alvo_s=settings.STRIPE_LATENCIA_ALVO_S,
+    )
+
+
+# Compartilhado por todas as chamadas à Stripe do processo
+limitador_stripe = criar_limitador_stripe()
+
+# A Stripe aceita no máximo 500 caracteres por valor de metadata
+LIMITE_VALOR_METADATA = 500
+
+
+def dividir_ids_para_metadata(ids_cobranca: List[int]) -> List[List[int]]:
+    """Divide os ids em lotes cujo "cobranca_ids" (ids separados por vírgula) cabe em um valor de metadata."""
+    lotes: List[List[int]] = []
+    tamanho = 0
+    for id_cobranca in ids_cobranca:
+        caracteres = len(str(id_cobranca))
+        if lotes and tamanho + 1 + caracteres <= LIMITE_VALOR_METADATA:
+            lotes[-1].append(id_cobranca)
+            tamanho += 1 + caracteres
+        else:
+            lotes.append([id_cobranca])
+            tamanho = caracteres
+    return lotes
+
+
+@contextmanager
+def _chamada_limitada() -> Iterator[None]:
+    try:
+        with limitador_stripe.permissao(settings.STRIPE_ESPERA_MAXIMA_S) as chamada:
+            try:
+                yield
+            except stripe.error.StripeError as e:
+                if getattr(e, "http_status", None) != 429:
+                    raise
+                chamada.sinalizar_sobrecarga()
+                raise CartaoApiError(503, "LIMITE_GATEWAY", "O provedor de pagamento limitou as requisições; tente novamente.")
+    except TimeoutError:
+        raise CartaoApiError(503, "LIMITE_GATEWAY", "Sem capacidade para chamar o provedor de pagamento no momento.")
+
 
 class StripeGateway:
 
     @staticmethod
-    def processar_pagamento(valor_em_centavos: int, payment_method_id: str) -> Any:
+    @medir_dependencia("stripe", "payment_intent")
+    def processar_pagamento(valor_em_centavos: int, payment_method_id: str, ids_cobranca: Optional[List[int]] = None,
+                            chave_idempotencia: Optional[str] = None) -> Any:
+        parametros: Dict[str, Any] = {}
+        if chave_idempotencia:
+            parametros["idempotency_key"] = chave_idempotencia
+        if ids_cobranca:
+            # Permite casar o PaymentIntent com as cobranças na reconciliação
+            parametros["metadata"] = {"cobranca_ids": ",".join(str(id_cobranca) for id_cobranca in ids_cobranca)}
         try:
-            return stripe.PaymentIntent.create(
-                amount=valor_em_centavos,
-                currency="brl",
-                payment_method=payment_method_id,
-                confirm=True,
-                off_session=True,
-                return_url="https://seu-dominio.com/cobranca-retorno"
-            )
+            with _chamada_limitada():
+                return stripe.PaymentIntent.create(
+                    amount=valor_em_centavos,
+                    currency="brl",
+                    payment_method=payment_method_id,
+                    confirm=True,
+                    off_session=True,
+                    return_url="https://seu-dominio.com/cobranca-retorno",
+                    **parametros
+                )
         except stripe.error.CardError:
 
             raise CartaoApiError(422, "CARTAO_RECUSADO", "O Cartão foi recusado")
         except stripe.error.StripeError:
             raise CartaoApiError(422, "ERRO_GATEWAY", "Ocorreu uma falha de comunicação com o provedor de pagamento.")
 
+    @staticmethod
+    @medir_dependencia("stripe", "listar_payment_intents")
+    def listar_payment_intents(criado_desde: Optional[int] = None, limite: int = 100, iniciar_apos: Optional[str] = None) -> Any:
+        parametros: Dict[str, Any] = {"limit": limite}
+        if criado_desde is not None:
+            parametros["created"] = {"gte": criado_desde}
+        if iniciar_apos:
+            parametros["starting_after"] = iniciar_apos
+        try:
+            with _chamada_limitada():
+                return stripe.PaymentIntent.list(**parametros)
+        except stripe.error.StripeError:
+            raise CartaoApiError(422, "ERRO_GATEWAY", "Ocorreu uma falha de comunicação com o provedor de pagamento.")
+
     @staticmethod
     def _obter_id_metodo_pagamento_teste(numero_cartao: str) -> str:
         numero_limpo = numero_cartao.replace(" ", "")
@@ -37,16 +115,18 @@ class StripeGateway:
         return payment_method_id
 
     @staticmethod
+    @medir_dependencia("stripe", "setup_intent")
     def _validar_metodo_de_pagamento_na_stripe(payment_method_id: str) -> None:
         try:
             return_url = "https://seu-dominio.com/validacao-retorno"
 
-            stripe.SetupIntent.create(
-                payment_method=payment_method_id,
-                confirm=True,
-                usage="off_session",
-                return_url=return_url
-            )
+            with _chamada_limitada():
+                stripe.SetupIntent.create(
+                    payment_method=payment_method_id,
+                    confirm=True,
+                    usage="off_session",
+                    return_url=return_url
+                )
 
         except stripe.error.CardError:
             raise CartaoApiError(422, "CARTAO_RECUSADO", "O cartão foi recusado.")
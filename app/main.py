@@ -2,22 +2,33 @@
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 import json  # ✅ Aqui está a correção
+import time
+from app.core.admissao import ControleAdmissao
 from app.core.config import settings
 from app.core.exceptions import CartaoApiError
-from app.db.base_class import Base
-from app.db.session import engine
+from app.core.logs import configurar_logs, registrar_evento
+from app.core.metrics import HTTP_DURACAO
+from app.core.recursos import ciclo_de_vida
+from app.core.timing import iniciar_coleta, finalizar_coleta, formatar_server_timing
+from app.db.esquema import criar_tabelas
 
 from app.controller import cobranca as cobranca_v1_router
 from app.controller import email as email_v1_router, cartao as cartao_v1_router , restaurar as restaurar_v1_router
+from app.controller import metricas as metricas_router
+from app.controller import webhook as webhook_router
 from app.schemas.error_schema import ErroSchema
 
-Base.metadata.create_all(bind=engine)
+if settings.BANCO_CRIAR_TABELAS:  # app.servidor já criou as tabelas antes de subir os workers
+    criar_tabelas()
+configurar_logs(settings.LOG_LEVEL)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
+    lifespan=ciclo_de_vida
 )
 
 @app.middleware("http")
@@ -35,6 +46,75 @@ async def catch_malformed_json(request: Request, call_next):
             )
     return await call_next(request)
 
+controle_admissao = ControleAdmissao(
+    settings.ADMISSAO_LIMITES, settings.ADMISSAO_FILA_MAXIMA, settings.ADMISSAO_ESPERA_MAXIMA_S
+)
+
+async def admitir_requisicao(request: Request, call_next):
+    classe = controle_admissao.classe_para(request.method, request.url.path)
+    if classe is None:
+        return await call_next(request)
+    if not await classe.entrar():
+        return JSONResponse(
+            status_code=503,
+            headers={"Retry-After": str(settings.ADMISSAO_RETRY_AFTER_S)},
+            content=ErroSchema(
+                codigo="SERVICO_SOBRECARREGADO",
+                mensagem="Muitas requisições em andamento; tente novamente em instantes."
+            ).model_dump()
+        )
+    try:
+        return await call_next(request)
+    finally:
+        classe.sair()
+
+# Registrado antes de medir_requisicoes para que as recusas (503) também entrem nas métricas
+if settings.ADMISSAO_ATIVA:
+    app.middleware("http")(admitir_requisicao)
+
+@app.middleware("http")
+async def medir_requisicoes(request: Request, call_next):
+    inicio = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Usa o template da rota (ex: /cobranca/{id_cobranca}) para não explodir a cardinalidade
+        rota = request.scope.get("route")
+        HTTP_DURACAO.observar(
+            time.perf_counter() - inicio,
+            metodo=request.method,
+            rota=getattr(rota, "path", "desconhecida"),
+            status=str(status_code)
+        )
+
+async def registrar_tempos_por_fase(request: Request, call_next):
+    inicio = time.perf_counter()
+    token = iniciar_coleta()
+    try:
+        response = await call_next(request)
+    finally:
+        fases = finalizar_coleta(token)
+
+    if fases:
+        response.headers["Server-Timing"] = formatar_server_timing(fases)
+    rota = request.scope.get("route")
+    registrar_evento(
+        "requisicao",
+        metodo=request.method,
+        rota=getattr(rota, "path", request.url.path),
+        status=response.status_code,
+        duracao_ms=round((time.perf_counter() - inicio) * 1000, 2),
+        fases={nome: round(duracao, 2) for nome, duracao in fases.items()}
+    )
+    return response
+
+# Só registra o middleware quando ligado: desligado, não há custo algum por requisição.
+if settings.SERVER_TIMING_ATIVO:
+    app.middleware("http")(registrar_tempos_por_fase)
+
 # Handler: erros de validação de dados (ex: tipo errado, campo ausente etc.)
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
@@ -67,4 +147,10 @@ app.include_router(
 )
 app.include_router(
     restaurar_v1_router.router,
-)
\ No newline at end of file
+)
+app.include_router(
+    metricas_router.router,
+)
+app.include_router(
+    webhook_router.router,
+)
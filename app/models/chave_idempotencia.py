@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class ChaveIdempotencia(Base):
+    """Resposta guardada para um Idempotency-Key, devolvida às repetições até expirar."""
+    __tablename__ = "chaves_idempotencia"
+
+    chave = Column(String(255), primary_key=True)
+    rota = Column(String(60), primary_key=True)  # a mesma chave em rotas diferentes são pedidos distintos
+    hashRequisicao = Column(String(64), nullable=False)
+    status = Column(String(20), nullable=False)  # EM_ANDAMENTO ou CONCLUIDA
+    statusHttp = Column(Integer, nullable=True)
+    corpo = Column(LargeBinary, nullable=True)
+    criadaEm = Column(DateTime(timezone=True), server_default=func.now())
+    expiraEm = Column(DateTime(timezone=True), nullable=False, index=True)
+    # Prazo da reserva EM_ANDAMENTO: vencido, o dono provavelmente caiu e outra requisição pode assumir a chave
+    reservaExpiraEm = Column(DateTime(timezone=True), nullable=True)
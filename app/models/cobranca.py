@@ -1,13 +1,21 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime
+from sqlalchemy import Column, Integer, Float, String, DateTime, Index
+from sqlalchemy.orm import mapped_column
 from sqlalchemy.sql import func
 from app.db.base_class import Base
 
 class Cobranca(Base):
     __tablename__ = "cobrancas"
+    __table_args__ = (
+        # Paginação por cursor (keyset): filtro + id crescente servidos pelo índice
+        Index("ix_cobrancas_ciclista_id", "ciclista", "id"),
+        Index("ix_cobrancas_status_id", "status", "id"),
+        Index("ix_cobrancas_hora_solicitacao_id", "horaSolicitacao", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     ciclista = Column(Integer, nullable=False)
     valor = Column(Float, nullable=False)
-    status = Column(String(20), nullable=False, index=True)  # PENDENTE, PAGA, FALHA etc
+    # active_history: mantém o status anterior mesmo com o atributo expirado, para o resumo incremental
+    status = mapped_column(String(20), nullable=False, active_history=True)  # PENDENTE, PAGA, FALHA etc
     horaSolicitacao = Column(DateTime(timezone=True), server_default=func.now())
-    horaFinalizacao = Column(DateTime(timezone=True), nullable=True)
\ No newline at end of file
+    horaFinalizacao = Column(DateTime(timezone=True), nullable=True)
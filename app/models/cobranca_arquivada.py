@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, String, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class CobrancaArquivada(Base):
+    """Cobranças finalizadas (PAGA/FALHA) movidas de cobrancas pelo arquivamento; mantêm o id original."""
+    __tablename__ = "cobrancas_arquivadas"
+    __table_args__ = (
+        Index("ix_cobrancas_arquivadas_ciclista_id", "ciclista", "id"),
+        Index("ix_cobrancas_arquivadas_status_id", "status", "id"),
+        Index("ix_cobrancas_arquivadas_hora_solicitacao_id", "horaSolicitacao", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    ciclista = Column(Integer, nullable=False)
+    valor = Column(Float, nullable=False)
+    status = Column(String(20), nullable=False)
+    horaSolicitacao = Column(DateTime(timezone=True))
+    horaFinalizacao = Column(DateTime(timezone=True), nullable=True)
+    arquivadaEm = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class EmailFila(Base):
+    """E-mail aceito por POST /enviarEmail?assincrono=true e entregue pelos enviadores em segundo plano."""
+    __tablename__ = "emails_fila"
+
+    id = Column(Integer, primary_key=True, index=True)
+    destinatario = Column(String(255), nullable=False)
+    assunto = Column(String(255), nullable=False)
+    mensagem = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="PENDENTE")  # PENDENTE, ENVIANDO, ENVIADO ou FALHA
+    tentativas = Column(Integer, nullable=False, default=0)
+    # PENDENTE: quando pode ser tentado de novo; ENVIANDO: até quando a reserva do enviador vale
+    proximaTentativaEm = Column(DateTime(timezone=True), nullable=False, index=True)
+    ultimoErro = Column(String(500), nullable=True)
+    criadoEm = Column(DateTime(timezone=True), server_default=func.now())
+    enviadoEm = Column(DateTime(timezone=True), nullable=True)
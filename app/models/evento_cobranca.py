@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class EventoCobranca(Base):
+    """
+    Transições de status das cobranças, gravadas na mesma transação da troca. Cada worker acompanha a
+    tabela pelo id e repassa as novas ao seu barramento (SSE); o id é também o Last-Event-ID do stream.
+    """
+    __tablename__ = "eventos_cobranca"
+    # Sem AUTOINCREMENT o SQLite reaproveita ids apagados pela limpeza e os leitores pulariam eventos
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True, index=True)
+    idCobranca = Column(Integer, nullable=False)
+    ciclista = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False)
+    statusAnterior = Column(String(20), nullable=True)  # None na criação
+    valor = Column(Float, nullable=False)
+    horaFinalizacao = Column(DateTime(timezone=True), nullable=True)
+    criadoEm = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class EventoStripe(Base):
+    """Eventos de webhook da Stripe já aplicados, para descartar reentregas."""
+    __tablename__ = "stripe_eventos"
+
+    id = Column(String(255), primary_key=True)  # evt_...
+    tipo = Column(String(60), nullable=False)
+    recebidoEm = Column(DateTime(timezone=True), server_default=func.now())
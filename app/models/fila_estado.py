@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, Float, DateTime
+from app.db.base_class import Base
+
+class FilaEstado(Base):
+    """
+    Linha única (id=1) com o estado da fila mantido pelo CobrancaRepository a cada transição: a pendente
+    mais antiga e os números da última execução do processamento da fila.
+    """
+    __tablename__ = "fila_estado"
+
+    id = Column(Integer, primary_key=True)
+    idPendenteMaisAntiga = Column(Integer, nullable=True)
+    pendenteMaisAntigaEm = Column(DateTime(timezone=True), nullable=True)
+    ultimaExecucaoEm = Column(DateTime(timezone=True), nullable=True)
+    ultimaExecucaoDuracaoS = Column(Float, nullable=True)
+    ultimaExecucaoPendentes = Column(Integer, nullable=True)
+    ultimaExecucaoPagas = Column(Integer, nullable=True)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class NotificacaoAluguel(Base):
+    """
+    Outbox das cobranças finalizadas a notificar ao microsserviço de aluguel. Gravada na mesma transação
+    da troca de status e apagada quando o aluguel confirma o recebimento (2xx).
+    """
+    __tablename__ = "notificacoes_aluguel"
+
+    id = Column(Integer, primary_key=True, index=True)
+    idCobranca = Column(Integer, nullable=False)
+    ciclista = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False)  # status da cobrança: PAGA ou FALHA
+    horaFinalizacao = Column(DateTime(timezone=True), nullable=True)
+    situacao = Column(String(20), nullable=False, default="PENDENTE")  # PENDENTE ou DESCARTADA
+    tentativas = Column(Integer, nullable=False, default=0)
+    proximaTentativaEm = Column(DateTime(timezone=True), nullable=False, index=True)
+    reserva = Column(String(32), nullable=True, index=True)  # lote do despachante que a reservou
+    ultimoErro = Column(String(500), nullable=True)
+    criadaEm = Column(DateTime(timezone=True), server_default=func.now())
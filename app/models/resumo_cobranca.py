@@ -0,0 +1,12 @@
+from sqlalchemy import Column, Integer, Float, String
+from app.db.base_class import Base
+
+class ResumoCobranca(Base):
+    """Totais de cobranças mantidos incrementalmente pelo CobrancaRepository."""
+    __tablename__ = "cobrancas_resumo"
+
+    dimensao = Column(String(20), primary_key=True)  # status, ciclista ou dia
+    chave = Column(String(40), primary_key=True)  # "" para status, id do ciclista ou AAAA-MM-DD
+    status = Column(String(20), primary_key=True)
+    quantidade = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Float, nullable=False, default=0.0)
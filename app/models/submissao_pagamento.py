@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from app.db.base_class import Base
+
+class SubmissaoPagamento(Base):
+    """
+    Pagamento de uma cobrança assíncrona (OCUPADA) ainda por submeter à Stripe. Gravada no mesmo commit
+    da cobrança e apagada quando a submissão termina; sobrevive à queda do worker que aceitou a cobrança.
+    """
+    __tablename__ = "submissoes_pagamento"
+
+    id = Column(Integer, primary_key=True, index=True)
+    idCobranca = Column(Integer, nullable=False, unique=True)
+    situacao = Column(String(20), nullable=False, default="PENDENTE")  # PENDENTE ou DESCARTADA
+    tentativas = Column(Integer, nullable=False, default=0)
+    # Quando pode ser tentada de novo; reservada, até quando vale a reserva do submissor
+    proximaTentativaEm = Column(DateTime(timezone=True), nullable=False, index=True)
+    ultimoErro = Column(String(500), nullable=True)
+    criadaEm = Column(DateTime(timezone=True), server_default=func.now())
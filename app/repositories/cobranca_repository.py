@@ -1,13 +1,32 @@
 # Em app/repositories/cobranca_repository.py
 
+from sqlalchemy import delete, func, insert, inspect, select, tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.cache import cache_cobrancas
+from app.core.config import settings
+from app.core.datas import em_utc
 from app.models.cobranca import Cobranca
+from app.models.cobranca_arquivada import CobrancaArquivada
+from app.models.notificacao_aluguel import NotificacaoAluguel
+from app.repositories.evento_cobranca_repository import EventoCobrancaRepository
+from app.repositories.fila_estado_repository import EstadoFila, FilaEstadoRepository
+from app.repositories.resumo_cobranca_repository import ResumoCobrancaRepository
+from app.repositories.submissao_pagamento_repository import SubmissaoPagamentoRepository
 from app.schemas.nova_cobranca_schema import NovaCobrancaSchema
 
+STATUS_FINALIZADOS = ("PAGA", "FALHA")
+_COLUNAS_ARQUIVO = ("id", "ciclista", "valor", "status", "horaSolicitacao", "horaFinalizacao")
+
+
 class CobrancaRepository:
     def __init__(self, db: Session):
         self.db = db
+        self.resumo = ResumoCobrancaRepository(db)
+        self.fila = FilaEstadoRepository(db)
+        self.eventos = EventoCobrancaRepository(db)
+        self.submissoes = SubmissaoPagamentoRepository(db)
 
     def criar(self, dados: NovaCobrancaSchema, hora_solicitacao) -> Cobranca:
         cobranca_db = Cobranca(
@@ -19,14 +38,206 @@ class CobrancaRepository:
         self.db.add(cobranca_db)
         return cobranca_db
 
-    def obter_por_id(self, id_cobranca: int) -> Cobranca | None:
-        return self.db.query(Cobranca).filter(Cobranca.id == id_cobranca).first()
+    def obter_por_id(self, id_cobranca: int) -> Cobranca | CobrancaArquivada | None:
+        cobranca = self.db.query(Cobranca).filter(Cobranca.id == id_cobranca).first()
+        if cobranca is None:
+            # Finalizadas antigas saem de cobrancas para o arquivo (somente leitura)
+            return self.db.query(CobrancaArquivada).filter(CobrancaArquivada.id == id_cobranca).first()
+        return cobranca
+
+    def obter_por_ids(self, ids: List[int], tamanho_lote: int = 500) -> List[Cobranca]:
+        cobrancas: List[Cobranca] = []
+        for inicio in range(0, len(ids), tamanho_lote):
+            lote = ids[inicio:inicio + tamanho_lote]
+            cobrancas += self.db.query(Cobranca).filter(Cobranca.id.in_(lote)).all()
+        return cobrancas
+
+    def recarregar(self, cobranca: Cobranca) -> Cobranca:
+        self.db.refresh(cobranca)
+        return cobranca
 
     def listar_pendentes(self) -> List[Cobranca]:
         return self.db.query(Cobranca).filter_by(status="PENDENTE").all()
 
+    def listar(
+            self,
+            status: Optional[str] = None,
+            ciclista: Optional[int] = None,
+            desde: Optional[datetime] = None,
+            ate: Optional[datetime] = None,
+            apos_id: Optional[int] = None,
+            limite: int = 50,
+            apos_hora: Optional[datetime] = None
+    ) -> List[Cobranca | CobrancaArquivada]:
+        # Keyset: "id > cursor ORDER BY id" custa o mesmo em qualquer página, ao contrário de OFFSET.
+        # Com período, ordena por (horaSolicitacao, id): o índice composto lê só as linhas do intervalo,
+        # e status/ciclista sem período usam (status, id)/(ciclista, id).
+        # As finalizadas antigas estão no arquivo: lê até `limite` de cada tabela e intercala pela chave.
+        por_periodo = desde is not None or ate is not None
+        modelos = [Cobranca]
+        if status is None or status in STATUS_FINALIZADOS:
+            modelos.append(CobrancaArquivada)
+        cobrancas = []
+        for modelo in modelos:
+            consulta = self.db.query(modelo)
+            if status is not None:
+                consulta = consulta.filter(modelo.status == status)
+            if ciclista is not None:
+                consulta = consulta.filter(modelo.ciclista == ciclista)
+            if desde is not None:
+                consulta = consulta.filter(modelo.horaSolicitacao >= desde)
+            if ate is not None:
+                consulta = consulta.filter(modelo.horaSolicitacao < ate)
+            if por_periodo:
+                if apos_id is not None and apos_hora is not None:
+                    consulta = consulta.filter(tuple_(modelo.horaSolicitacao, modelo.id) > tuple_(apos_hora, apos_id))
+                elif apos_id is not None:
+                    consulta = consulta.filter(modelo.id > apos_id)
+                consulta = consulta.order_by(modelo.horaSolicitacao, modelo.id)
+            else:
+                if apos_id is not None:
+                    consulta = consulta.filter(modelo.id > apos_id)
+                consulta = consulta.order_by(modelo.id)
+            cobrancas += consulta.limit(limite).all()
+        if por_periodo:
+            return sorted(cobrancas, key=lambda cobranca: (em_utc(cobranca.horaSolicitacao), cobranca.id))[:limite]
+        return sorted(cobrancas, key=lambda cobranca: cobranca.id)[:limite]
+
+    def arquivar_finalizadas(self, finalizadas_antes_de: datetime, limite: int) -> int:
+        """
+        Move até `limite` cobranças PAGA/FALHA finalizadas antes da data para cobrancas_arquivadas, em uma
+        transação. O resumo não muda: ele continua contando as arquivadas. Retorna quantas foram movidas.
+        """
+        # A cobrança de maior id nunca é arquivada: o SQLite gera o próximo id como max(id) + 1 e
+        # reutilizaria o id de uma cobrança já arquivada.
+        maior_id = select(func.max(Cobranca.id)).scalar_subquery()
+        ids = self.db.scalars(
+            select(Cobranca.id)
+            .where(
+                Cobranca.status.in_(STATUS_FINALIZADOS),
+                Cobranca.horaFinalizacao < finalizadas_antes_de,
+                Cobranca.id < maior_id,
+            )
+            .order_by(Cobranca.id)
+            .limit(limite)
+        ).all()
+        if not ids:
+            return 0
+        colunas = [getattr(Cobranca, coluna) for coluna in _COLUNAS_ARQUIVO]
+        self.db.execute(
+            insert(CobrancaArquivada).from_select(_COLUNAS_ARQUIVO, select(*colunas).where(Cobranca.id.in_(ids)))
+        )
+        self.db.execute(delete(Cobranca).where(Cobranca.id.in_(ids)).execution_options(synchronize_session=False))
+        self.db.commit()
+        return len(ids)
+
+    def contar_por_status(self, status: str) -> int:
+        return self.db.query(Cobranca).filter_by(status=status).count()
+
+    def obter_estado_fila(self) -> EstadoFila:
+        """Lido dos contadores do resumo e de fila_estado, mantidos a cada transição: não consulta cobrancas."""
+        contagens = self.resumo.contar_por_status()
+        estado = EstadoFila(pendentes=contagens.get("PENDENTE", 0), ocupadas=contagens.get("OCUPADA", 0))
+        linha = self.fila.obter()
+        if linha is not None:
+            estado.pendenteMaisAntigaEm = linha.pendenteMaisAntigaEm if estado.pendentes else None
+            estado.ultimaExecucaoEm = linha.ultimaExecucaoEm
+            estado.ultimaExecucaoDuracaoS = linha.ultimaExecucaoDuracaoS
+            estado.ultimaExecucaoPendentes = linha.ultimaExecucaoPendentes
+            estado.ultimaExecucaoPagas = linha.ultimaExecucaoPagas
+        return estado
+
+    def registrar_execucao_fila(self, inicio: datetime, duracao_s: float, pendentes: int, pagas: int) -> None:
+        self.fila.registrar_execucao(inicio, duracao_s, pendentes, pagas)
+        self.db.commit()
+
+    def obter_resumo(self, ciclista: int | None = None, dia: str | None = None):
+        return self.resumo.obter(ciclista, dia)
+
+    def _registrar_transicoes(self, cobrancas: List[Cobranca]) -> None:
+        # Roda antes do commit, na mesma transação: criações e trocas de status atualizam o resumo.
+        variacoes = {}
+        transicoes: List[Tuple[Cobranca, Dict[str, Any]]] = []
+        for cobranca in cobrancas:
+            estado = inspect(cobranca)
+            if estado.transient or estado.pending:
+                status_anterior = None
+            else:
+                historico = estado.attrs.status.history
+                if not historico.added or not historico.deleted or historico.deleted[0] == historico.added[0]:
+                    continue
+                status_anterior = historico.deleted[0]
+            transicoes.append((cobranca, {
+                "ciclista": cobranca.ciclista,
+                "status": cobranca.status,
+                "statusAnterior": status_anterior,
+                "valor": cobranca.valor,
+                "horaFinalizacao": cobranca.horaFinalizacao,
+            }))
+            for chave, (quantidade, valor) in self.resumo.calcular_variacoes(cobranca, status_anterior).items():
+                q, v = variacoes.get(chave, (0, 0.0))
+                variacoes[chave] = (q + quantidade, v + valor)
+        self.resumo.aplicar_variacoes(variacoes)
+
+        entraram = [cobranca for cobranca, dados in transicoes if dados["status"] == "PENDENTE"]
+        sairam = [cobranca.id for cobranca, dados in transicoes if dados["statusAnterior"] == "PENDENTE"]
+        if entraram or sairam:
+            if any(cobranca.id is None for cobranca in entraram):
+                self.db.flush()
+            self.fila.registrar_transicoes(entraram, sairam)
+
+        if transicoes:
+            # Lidas pelos workers em /cobranca/eventos (SSE): só existem se a troca de status for gravada
+            if any(cobranca.id is None for cobranca, _ in transicoes):
+                self.db.flush()
+            self.eventos.registrar({"id": cobranca.id, **dados} for cobranca, dados in transicoes)
+
+        if settings.ALUGUEL_CALLBACK_URL:
+            finalizadas = [
+                cobranca for cobranca, dados in transicoes
+                if dados["status"] in STATUS_FINALIZADOS and dados["statusAnterior"] != dados["status"]
+            ]
+            self._registrar_notificacoes(finalizadas)
+
+    def _registrar_notificacoes(self, cobrancas: List[Cobranca]) -> None:
+        # Outbox: a notificação ao aluguel só existe se a troca de status for gravada (mesmo commit)
+        if not cobrancas:
+            return
+        if any(cobranca.id is None for cobranca in cobrancas):
+            self.db.flush()  # cobranças novas já finalizadas: o id só existe depois do INSERT
+        agora = datetime.now(timezone.utc)
+        self.db.add_all(
+            NotificacaoAluguel(
+                idCobranca=cobranca.id, ciclista=cobranca.ciclista, status=cobranca.status,
+                horaFinalizacao=cobranca.horaFinalizacao, situacao="PENDENTE", tentativas=0, proximaTentativaEm=agora
+            )
+            for cobranca in cobrancas
+        )
+
     def salvar(self, cobranca: Cobranca) -> Cobranca:
         self.db.add(cobranca)
+        self._registrar_transicoes([cobranca])
         self.db.commit()
+        cache_cobrancas.invalidar([cobranca.id])
         self.db.refresh(cobranca)
-        return cobranca
\ No newline at end of file
+        return cobranca
+
+    def salvar_e_submeter(self, cobranca: Cobranca) -> Cobranca:
+        """Grava a cobrança (OCUPADA) e, no mesmo commit, a submissão do pagamento para o SubmissorPagamentos."""
+        self.db.add(cobranca)
+        self._registrar_transicoes([cobranca])
+        if cobranca.id is None:
+            self.db.flush()
+        self.submissoes.registrar(cobranca.id, datetime.now(timezone.utc))
+        self.db.commit()
+        cache_cobrancas.invalidar([cobranca.id])
+        self.db.refresh(cobranca)
+        return cobranca
+
+    def salvar_em_lote(self, cobrancas: List[Cobranca]) -> List[Cobranca]:
+        """Persiste várias cobranças em uma única transação."""
+        self.db.add_all(cobrancas)
+        self._registrar_transicoes(cobrancas)
+        self.db.commit()
+        cache_cobrancas.invalidar(cobranca.id for cobranca in cobrancas)
+        return cobrancas
@@ -0,0 +1,87 @@
+# Em app/repositories/email_fila_repository.py
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, update
+from sqlalchemy.orm import Session
+
+from app.models.email_fila import EmailFila
+
+
+class EmailFilaRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def enfileirar(self, destinatario: str, assunto: str, mensagem: str, agora: datetime) -> EmailFila:
+        email = EmailFila(
+            destinatario=destinatario, assunto=assunto, mensagem=mensagem,
+            status="PENDENTE", tentativas=0, proximaTentativaEm=agora
+        )
+        self.db.add(email)
+        self.db.commit()
+        self.db.refresh(email)
+        return email
+
+    def obter_por_id(self, id_email: int) -> Optional[EmailFila]:
+        return self.db.query(EmailFila).filter(EmailFila.id == id_email).populate_existing().first()
+
+    def reservar_proximo(self, agora: datetime, reservado_ate: datetime, tentativas_maximas: int) -> Optional[EmailFila]:
+        """Marca como ENVIANDO o próximo e-mail vencido. Uma reserva ENVIANDO expirada (enviador que
+        caiu no meio do envio) volta a ser elegível e conta como tentativa; esgotadas as tentativas, o
+        e-mail vai para FALHA. Retorna None se não houver nenhum."""
+        reserva_expirada = (EmailFila.status == "ENVIANDO") & (EmailFila.proximaTentativaEm <= agora)
+        # Uma mensagem que derruba o enviador toda vez não pode voltar para a fila para sempre
+        esgotados = self.db.execute(
+            update(EmailFila)
+            .where(reserva_expirada, EmailFila.tentativas + 1 >= tentativas_maximas)
+            .values(status="FALHA", tentativas=EmailFila.tentativas + 1, ultimoErro="Envio interrompido: a reserva do enviador expirou.")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if esgotados:
+            self.db.commit()
+        while True:
+            candidato = (
+                self.db.query(EmailFila.id)
+                .filter(EmailFila.status.in_(("PENDENTE", "ENVIANDO")), EmailFila.proximaTentativaEm <= agora)
+                .order_by(EmailFila.proximaTentativaEm, EmailFila.id)
+                .first()
+            )
+            if candidato is None:
+                return None
+            # UPDATE condicional: se outro enviador (thread ou worker) reservou antes, o rowcount é 0
+            reservado = self.db.execute(
+                update(EmailFila)
+                .where(
+                    EmailFila.id == candidato.id,
+                    EmailFila.status.in_(("PENDENTE", "ENVIANDO")),
+                    EmailFila.proximaTentativaEm <= agora,
+                )
+                .values(
+                    status="ENVIANDO",
+                    proximaTentativaEm=reservado_ate,
+                    tentativas=EmailFila.tentativas + case((EmailFila.status == "ENVIANDO", 1), else_=0),
+                )
+                .execution_options(synchronize_session=False)  # obter_por_id relê a linha
+            ).rowcount
+            self.db.commit()
+            if reservado:
+                return self.obter_por_id(candidato.id)
+
+    def marcar_enviado(self, email: EmailFila, agora: datetime) -> None:
+        email.status = "ENVIADO"
+        email.tentativas += 1
+        email.enviadoEm = agora
+        email.ultimoErro = None
+        self.db.commit()
+
+    def marcar_falha(self, email: EmailFila, erro: str, proxima_tentativa: Optional[datetime]) -> None:
+        """Sem próxima tentativa, a falha é definitiva."""
+        email.tentativas += 1
+        email.ultimoErro = erro[:500]
+        if proxima_tentativa is None:
+            email.status = "FALHA"
+        else:
+            email.status = "PENDENTE"
+            email.proximaTentativaEm = proxima_tentativa
+        self.db.commit()
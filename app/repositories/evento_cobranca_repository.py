@@ -0,0 +1,46 @@
+# Em app/repositories/evento_cobranca_repository.py
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.evento_cobranca import EventoCobranca
+
+
+class EventoCobrancaRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def registrar(self, transicoes: Iterable[Dict[str, Any]]) -> None:
+        """Só adiciona à sessão: o commit é o da troca de status."""
+        self.db.add_all(
+            EventoCobranca(
+                idCobranca=transicao["id"], ciclista=transicao["ciclista"], status=transicao["status"],
+                statusAnterior=transicao["statusAnterior"], valor=transicao["valor"],
+                horaFinalizacao=transicao["horaFinalizacao"],
+            )
+            for transicao in transicoes
+        )
+
+    def ultimo_id(self) -> int:
+        return self.db.execute(select(func.max(EventoCobranca.id))).scalar() or 0
+
+    def listar_apos(self, apos_id: int, limite: int, cobranca: Optional[int] = None,
+                    ciclista: Optional[int] = None) -> List[EventoCobranca]:
+        consulta = select(EventoCobranca).where(EventoCobranca.id > apos_id)
+        if cobranca is not None:
+            consulta = consulta.where(EventoCobranca.idCobranca == cobranca)
+        if ciclista is not None:
+            consulta = consulta.where(EventoCobranca.ciclista == ciclista)
+        return list(self.db.execute(consulta.order_by(EventoCobranca.id).limit(limite)).scalars())
+
+    def remover_anteriores(self, antes_de: datetime) -> int:
+        resultado = self.db.execute(
+            delete(EventoCobranca)
+            .where(EventoCobranca.criadoEm < antes_de)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return resultado.rowcount
@@ -0,0 +1,22 @@
+# Em app/repositories/evento_stripe_repository.py
+
+from typing import Iterable, List, Set
+
+from sqlalchemy.orm import Session
+
+from app.models.evento_stripe import EventoStripe
+
+
+class EventoStripeRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def ids_ja_processados(self, ids: List[str]) -> Set[str]:
+        if not ids:
+            return set()
+        linhas = self.db.query(EventoStripe.id).filter(EventoStripe.id.in_(ids)).all()
+        return {linha.id for linha in linhas}
+
+    def registrar(self, eventos: Iterable[EventoStripe]) -> None:
+        """Adiciona à transação corrente (o commit fica com quem chamou)."""
+        self.db.add_all(list(eventos))
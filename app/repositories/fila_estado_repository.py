@@ -0,0 +1,96 @@
+# Em app/repositories/fila_estado_repository.py
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.orm import Session
+
+from app.models.cobranca import Cobranca
+from app.models.fila_estado import FilaEstado
+
+ID_ESTADO = 1
+
+
+@dataclass
+class EstadoFila:
+    pendentes: int
+    ocupadas: int
+    pendenteMaisAntigaEm: Optional[datetime] = None
+    ultimaExecucaoEm: Optional[datetime] = None
+    ultimaExecucaoDuracaoS: Optional[float] = None
+    ultimaExecucaoPendentes: Optional[int] = None
+    ultimaExecucaoPagas: Optional[int] = None
+
+
+class FilaEstadoRepository:
+    """Mantém a linha de fila_estado. Como o resumo, só altera a transação corrente (o commit fica com quem chamou)."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _pendente_mais_antiga():
+        # WHERE status + ORDER BY id: busca no índice de status (que já inclui o rowid), sem varrer a tabela
+        return select(Cobranca.id, Cobranca.horaSolicitacao).where(Cobranca.status == "PENDENTE").order_by(Cobranca.id).limit(1)
+
+    def _existe(self) -> bool:
+        return self.db.execute(select(FilaEstado.id).where(FilaEstado.id == ID_ESTADO)).first() is not None
+
+    def recalcular(self) -> None:
+        """Relê a pendente mais antiga (usado quando ela sai da fila ou para criar a linha)."""
+        pendente = self.db.execute(self._pendente_mais_antiga()).first()
+        valores = {
+            "idPendenteMaisAntiga": pendente.id if pendente else None,
+            "pendenteMaisAntigaEm": pendente.horaSolicitacao if pendente else None,
+        }
+        if self._existe():
+            self.db.execute(update(FilaEstado).where(FilaEstado.id == ID_ESTADO).values(**valores))
+        else:
+            self.db.execute(insert(FilaEstado).values(id=ID_ESTADO, **valores))
+
+    def registrar_transicoes(self, entraram: List[Cobranca], sairam: List[int]) -> None:
+        """`entraram`: cobranças que passaram a PENDENTE; `sairam`: ids das que deixaram de ser PENDENTE."""
+        if not entraram and not sairam:
+            return
+        if not self._existe():
+            self.recalcular()
+            return
+        if sairam:
+            # Sem autoflush a troca de status ainda não chegou ao banco: exclui as que saíram explicitamente
+            proxima = self._pendente_mais_antiga().where(Cobranca.id.not_in(sairam))
+            self.db.execute(
+                update(FilaEstado)
+                .where(FilaEstado.id == ID_ESTADO, FilaEstado.idPendenteMaisAntiga.in_(sairam))
+                .values(
+                    idPendenteMaisAntiga=proxima.with_only_columns(Cobranca.id).scalar_subquery(),
+                    pendenteMaisAntigaEm=proxima.with_only_columns(Cobranca.horaSolicitacao).scalar_subquery(),
+                )
+            )
+        if entraram:
+            mais_antiga = min(entraram, key=lambda cobranca: cobranca.id)
+            # UPDATE condicional: correto mesmo com outro processo atualizando a linha ao mesmo tempo
+            self.db.execute(
+                update(FilaEstado)
+                .where(
+                    FilaEstado.id == ID_ESTADO,
+                    (FilaEstado.idPendenteMaisAntiga.is_(None)) | (FilaEstado.idPendenteMaisAntiga > mais_antiga.id),
+                )
+                .values(idPendenteMaisAntiga=mais_antiga.id, pendenteMaisAntigaEm=mais_antiga.horaSolicitacao)
+            )
+
+    def registrar_execucao(self, inicio: datetime, duracao_s: float, pendentes: int, pagas: int) -> None:
+        if not self._existe():
+            self.recalcular()
+        self.db.execute(
+            update(FilaEstado)
+            .where(FilaEstado.id == ID_ESTADO)
+            .values(
+                ultimaExecucaoEm=inicio, ultimaExecucaoDuracaoS=duracao_s,
+                ultimaExecucaoPendentes=pendentes, ultimaExecucaoPagas=pagas,
+            )
+        )
+
+    def obter(self) -> Optional[FilaEstado]:
+        return self.db.query(FilaEstado).filter(FilaEstado.id == ID_ESTADO).populate_existing().first()
@@ -0,0 +1,69 @@
+# Em app/repositories/idempotencia_repository.py
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.chave_idempotencia import ChaveIdempotencia
+
+
+class IdempotenciaRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def obter(self, chave: str, rota: str) -> Optional[ChaveIdempotencia]:
+        # populate_existing: relê do banco mesmo que o objeto já esteja na sessão (espera por outro processo)
+        return (
+            self.db.query(ChaveIdempotencia)
+            .filter_by(chave=chave, rota=rota)
+            .populate_existing()
+            .one_or_none()
+        )
+
+    def reservar(self, chave: str, rota: str, hash_requisicao: str, expira_em: datetime, reserva_expira_em: datetime) -> bool:
+        """Grava a chave como EM_ANDAMENTO. Retorna False se ela já existir."""
+        try:
+            self.db.execute(insert(ChaveIdempotencia).values(
+                chave=chave, rota=rota, hashRequisicao=hash_requisicao, status="EM_ANDAMENTO",
+                expiraEm=expira_em, reservaExpiraEm=reserva_expira_em
+            ))
+            self.db.commit()
+            return True
+        except IntegrityError:
+            self.db.rollback()
+            return False
+
+    def assumir_reserva_vencida(self, chave: str, rota: str, agora: datetime, expira_em: datetime, reserva_expira_em: datetime) -> bool:
+        """Toma para si uma reserva EM_ANDAMENTO cujo prazo venceu. Retorna False se outra requisição chegou antes."""
+        # UPDATE condicional: entre várias requisições (ou workers) esperando, só uma assume a chave
+        assumidas = self.db.execute(
+            update(ChaveIdempotencia)
+            .where(
+                ChaveIdempotencia.chave == chave,
+                ChaveIdempotencia.rota == rota,
+                ChaveIdempotencia.status == "EM_ANDAMENTO",
+                ChaveIdempotencia.reservaExpiraEm < agora,
+            )
+            .values(expiraEm=expira_em, reservaExpiraEm=reserva_expira_em)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        self.db.commit()
+        return assumidas == 1
+
+    def concluir(self, chave: str, rota: str, status_http: int, corpo: bytes) -> None:
+        self.db.query(ChaveIdempotencia).filter_by(chave=chave, rota=rota).update(
+            {"status": "CONCLUIDA", "statusHttp": status_http, "corpo": corpo, "reservaExpiraEm": None}
+        )
+        self.db.commit()
+
+    def remover(self, chave: str, rota: str) -> None:
+        self.db.query(ChaveIdempotencia).filter_by(chave=chave, rota=rota).delete()
+        self.db.commit()
+
+    def remover_expiradas(self, agora: datetime) -> int:
+        removidas = self.db.query(ChaveIdempotencia).filter(ChaveIdempotencia.expiraEm < agora).delete()
+        self.db.commit()
+        return removidas
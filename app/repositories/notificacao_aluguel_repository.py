@@ -0,0 +1,61 @@
+# Em app/repositories/notificacao_aluguel_repository.py
+
+from datetime import datetime
+from typing import List
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.orm import Session
+
+from app.models.notificacao_aluguel import NotificacaoAluguel
+
+
+class NotificacaoAluguelRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def reservar_lote(self, reserva: str, agora: datetime, reservado_ate: datetime, limite: int) -> List[NotificacaoAluguel]:
+        """
+        Reserva até `limite` notificações vencidas com um único UPDATE (atômico também entre workers).
+        Uma reserva expirada (despachante que caiu no meio do envio) volta a ser elegível.
+        """
+        vencidas = (
+            select(NotificacaoAluguel.id)
+            .where(NotificacaoAluguel.situacao == "PENDENTE", NotificacaoAluguel.proximaTentativaEm <= agora)
+            .order_by(NotificacaoAluguel.id)
+            .limit(limite)
+        )
+        self.db.execute(
+            update(NotificacaoAluguel)
+            .where(NotificacaoAluguel.id.in_(vencidas))
+            .values(reserva=reserva, proximaTentativaEm=reservado_ate)
+            .execution_options(synchronize_session=False)
+        )
+        self.db.commit()
+        return (
+            self.db.query(NotificacaoAluguel)
+            .filter(NotificacaoAluguel.reserva == reserva)
+            .order_by(NotificacaoAluguel.id)
+            .all()
+        )
+
+    def confirmar(self, reserva: str) -> int:
+        removidas = self.db.execute(delete(NotificacaoAluguel).where(NotificacaoAluguel.reserva == reserva)).rowcount
+        self.db.commit()
+        return removidas
+
+    def adiar(self, notificacoes: List[NotificacaoAluguel], erro: str, proxima_tentativa: datetime, tentativas_maximas: int) -> int:
+        """Devolve o lote à fila. As que esgotaram as tentativas viram DESCARTADA. Retorna quantas."""
+        descartadas = 0
+        for notificacao in notificacoes:
+            notificacao.tentativas += 1
+            notificacao.ultimoErro = erro[:500]
+            notificacao.reserva = None
+            notificacao.proximaTentativaEm = proxima_tentativa
+            if notificacao.tentativas >= tentativas_maximas:
+                notificacao.situacao = "DESCARTADA"
+                descartadas += 1
+        self.db.commit()
+        return descartadas
+
+    def contar_pendentes(self) -> int:
+        return self.db.query(NotificacaoAluguel).filter_by(situacao="PENDENTE").count()
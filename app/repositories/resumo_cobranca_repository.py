@@ -0,0 +1,144 @@
+# Em app/repositories/resumo_cobranca_repository.py
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import String, cast, func, insert, literal, or_, select, union_all, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models.cobranca import Cobranca
+from app.models.cobranca_arquivada import CobrancaArquivada
+from app.models.resumo_cobranca import ResumoCobranca
+
+DIMENSAO_STATUS = "status"
+DIMENSAO_CICLISTA = "ciclista"
+DIMENSAO_DIA = "dia"
+
+ChaveResumo = Tuple[str, str, str]  # (dimensao, chave, status)
+
+_UPSERT_POR_DIALETO = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def _dia(hora: datetime | None) -> str:
+    if hora is None:
+        hora = datetime.now(timezone.utc)
+    if hora.tzinfo is not None:
+        hora = hora.astimezone(timezone.utc)
+    return hora.date().isoformat()
+
+
+class ResumoCobrancaRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    @staticmethod
+    def _chaves(cobranca: Cobranca, status: str) -> List[ChaveResumo]:
+        return [
+            (DIMENSAO_STATUS, "", status),
+            (DIMENSAO_CICLISTA, str(cobranca.ciclista), status),
+            (DIMENSAO_DIA, _dia(cobranca.horaSolicitacao), status),
+        ]
+
+    def calcular_variacoes(self, cobranca: Cobranca, status_anterior: Optional[str]) -> Dict[ChaveResumo, Tuple[int, float]]:
+        """Variações (quantidade, valor) de uma criação (status_anterior=None) ou de uma troca de status."""
+        variacoes: Dict[ChaveResumo, Tuple[int, float]] = {}
+        for chave in self._chaves(cobranca, cobranca.status):
+            variacoes[chave] = (1, cobranca.valor)
+        if status_anterior is not None:
+            for chave in self._chaves(cobranca, status_anterior):
+                quantidade, valor = variacoes.get(chave, (0, 0.0))
+                variacoes[chave] = (quantidade - 1, valor - cobranca.valor)
+        return variacoes
+
+    def aplicar_variacoes(self, variacoes: Dict[ChaveResumo, Tuple[int, float]]) -> None:
+        """Aplica as variações na transação corrente (o commit fica com quem chamou)."""
+        linhas = [
+            {"dimensao": dimensao, "chave": chave, "status": status, "quantidade": quantidade, "valor_total": valor}
+            for (dimensao, chave, status), (quantidade, valor) in variacoes.items()
+            if quantidade != 0 or valor != 0
+        ]
+        if not linhas:
+            return
+        dialeto = self.db.get_bind().dialect.name
+        if dialeto in _UPSERT_POR_DIALETO:
+            # INSERT ... ON CONFLICT DO UPDATE: duas primeiras transições da mesma chave em paralelo
+            # somam na mesma linha em vez de uma delas violar a chave primária
+            comando = _UPSERT_POR_DIALETO[dialeto](ResumoCobranca).values(linhas)
+            self.db.execute(comando.on_conflict_do_update(
+                index_elements=[ResumoCobranca.dimensao, ResumoCobranca.chave, ResumoCobranca.status],
+                set_={
+                    "quantidade": ResumoCobranca.quantidade + comando.excluded.quantidade,
+                    "valor_total": ResumoCobranca.valor_total + comando.excluded.valor_total,
+                },
+            ))
+            return
+        for linha in linhas:  # demais bancos: UPDATE e, se a linha ainda não existe, INSERT
+            resultado = self.db.execute(
+                update(ResumoCobranca)
+                .where(
+                    ResumoCobranca.dimensao == linha["dimensao"],
+                    ResumoCobranca.chave == linha["chave"],
+                    ResumoCobranca.status == linha["status"],
+                )
+                .values(
+                    quantidade=ResumoCobranca.quantidade + linha["quantidade"],
+                    valor_total=ResumoCobranca.valor_total + linha["valor_total"],
+                )
+            )
+            if resultado.rowcount == 0:
+                self.db.execute(insert(ResumoCobranca).values(**linha))
+
+    @staticmethod
+    def _condicao(dimensao: str, chave: Optional[str]):
+        condicao = ResumoCobranca.dimensao == dimensao
+        return condicao if chave is None else condicao & (ResumoCobranca.chave == chave)
+
+    def obter(self, ciclista: Optional[int] = None, dia: Optional[str] = None) -> List[ResumoCobranca]:
+        """Totais gerais por status; os de ciclista e de dia só com o filtro (o custo não cresce com os dados)."""
+        condicoes = [self._condicao(DIMENSAO_STATUS, None)]
+        if ciclista is not None:
+            condicoes.append(self._condicao(DIMENSAO_CICLISTA, str(ciclista)))
+        if dia is not None:
+            condicoes.append(self._condicao(DIMENSAO_DIA, dia))
+        return (
+            self.db.query(ResumoCobranca)
+            .filter(or_(*condicoes), ResumoCobranca.quantidade != 0)
+            .order_by(ResumoCobranca.dimensao, ResumoCobranca.chave, ResumoCobranca.status)
+            .all()
+        )
+
+    def contar_por_status(self) -> Dict[str, int]:
+        """Quantidade por status lida do resumo (uma linha por status), sem contar linhas de cobrancas."""
+        linhas = self.db.query(ResumoCobranca.status, ResumoCobranca.quantidade).filter(
+            ResumoCobranca.dimensao == DIMENSAO_STATUS, ResumoCobranca.chave == ""
+        )
+        return {linha.status: linha.quantidade for linha in linhas}
+
+    def reconstruir(self) -> int:
+        """Recalcula todo o resumo a partir de cobrancas e do arquivo (backfill). Retorna o número de linhas."""
+        self.db.query(ResumoCobranca).delete()
+        origem = union_all(*(
+            select(tabela.ciclista, tabela.status, tabela.valor, tabela.horaSolicitacao)
+            for tabela in (Cobranca, CobrancaArquivada)
+        )).subquery()
+        agregacoes = [
+            (DIMENSAO_STATUS, literal("")),
+            (DIMENSAO_CICLISTA, cast(origem.c.ciclista, String)),
+            (DIMENSAO_DIA, cast(func.date(origem.c.horaSolicitacao), String)),
+        ]
+        for dimensao, chave in agregacoes:
+            consulta = select(
+                literal(dimensao),
+                chave,
+                origem.c.status,
+                func.count(),
+                func.coalesce(func.sum(origem.c.valor), 0.0),
+            ).group_by(chave, origem.c.status)
+            self.db.execute(
+                insert(ResumoCobranca).from_select(
+                    ["dimensao", "chave", "status", "quantidade", "valor_total"], consulta
+                )
+            )
+        self.db.commit()
+        return self.db.query(ResumoCobranca).count()
@@ -0,0 +1,77 @@
+# Em app/repositories/submissao_pagamento_repository.py
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.models.submissao_pagamento import SubmissaoPagamento
+
+
+class SubmissaoPagamentoRepository:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def registrar(self, id_cobranca: int, agora: datetime) -> None:
+        """Só adiciona à sessão: o commit é o da cobrança."""
+        self.db.add(SubmissaoPagamento(idCobranca=id_cobranca, situacao="PENDENTE", tentativas=0, proximaTentativaEm=agora))
+
+    def reservar_proxima(self, agora: datetime, reservado_ate: datetime, tentativas_maximas: int) -> Optional[SubmissaoPagamento]:
+        """
+        Reserva a próxima submissão vencida e conta a tentativa. Uma reserva expirada (submissor que caiu
+        no meio da chamada) volta a ser elegível; esgotadas as tentativas, a submissão vira DESCARTADA.
+        """
+        esgotadas = self.db.execute(
+            update(SubmissaoPagamento)
+            .where(
+                SubmissaoPagamento.situacao == "PENDENTE",
+                SubmissaoPagamento.proximaTentativaEm <= agora,
+                SubmissaoPagamento.tentativas >= tentativas_maximas,
+            )
+            .values(situacao="DESCARTADA")
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if esgotadas:
+            self.db.commit()
+        while True:
+            candidata = (
+                self.db.query(SubmissaoPagamento.id)
+                .filter(SubmissaoPagamento.situacao == "PENDENTE", SubmissaoPagamento.proximaTentativaEm <= agora)
+                .order_by(SubmissaoPagamento.proximaTentativaEm, SubmissaoPagamento.id)
+                .first()
+            )
+            if candidata is None:
+                return None
+            # UPDATE condicional: se outro submissor (thread ou worker) reservou antes, o rowcount é 0
+            reservada = self.db.execute(
+                update(SubmissaoPagamento)
+                .where(
+                    SubmissaoPagamento.id == candidata.id,
+                    SubmissaoPagamento.situacao == "PENDENTE",
+                    SubmissaoPagamento.proximaTentativaEm <= agora,
+                )
+                .values(proximaTentativaEm=reservado_ate, tentativas=SubmissaoPagamento.tentativas + 1)
+                .execution_options(synchronize_session=False)
+            ).rowcount
+            self.db.commit()
+            if reservada:
+                return (
+                    self.db.query(SubmissaoPagamento)
+                    .filter(SubmissaoPagamento.id == candidata.id)
+                    .populate_existing()
+                    .first()
+                )
+
+    def concluir(self, submissao: SubmissaoPagamento) -> None:
+        self.db.delete(submissao)
+        self.db.commit()
+
+    def adiar(self, submissao: SubmissaoPagamento, erro: str, proxima_tentativa: datetime, tentativas_maximas: int) -> bool:
+        """Devolve a submissão à fila. Retorna True se ela esgotou as tentativas (DESCARTADA)."""
+        submissao.ultimoErro = erro[:500]
+        submissao.proximaTentativaEm = proxima_tentativa
+        if submissao.tentativas >= tentativas_maximas:
+            submissao.situacao = "DESCARTADA"
+        self.db.commit()
+        return submissao.situacao == "DESCARTADA"
@@ -1,5 +1,6 @@
-from typing import Optional, Literal
+from typing import List, Optional, Literal
 from datetime import datetime
+from pydantic import BaseModel
 from app.schemas.nova_cobranca_schema import NovaCobrancaSchema
 
 
@@ -7,4 +8,9 @@ class CobrancaSchema(NovaCobrancaSchema):
     id: int
     status: Literal["PENDENTE", "PAGA", "FALHA", "CANCELADA", "OCUPADA"]
     horaSolicitacao: datetime
-    horaFinalizacao: Optional[datetime]
\ No newline at end of file
+    horaFinalizacao: Optional[datetime]
+
+
+class PaginaCobrancasSchema(BaseModel):
+    itens: List[CobrancaSchema]
+    proximoCursor: Optional[str]
\ No newline at end of file
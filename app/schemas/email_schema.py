@@ -1,3 +1,6 @@
+from datetime import datetime
+from typing import Optional
+
 from pydantic import BaseModel, field_validator
 from pydantic_core.core_schema import ValidationInfo
 
@@ -34,3 +37,21 @@ class EmailRequest(BaseModel):
             raise CartaoApiError(404, "DESTINATARIO_INVALIDO", "O domínio do e-mail está incompleto (ex: 'gmail.com').")
 
         return email
+
+
+class EmailAceitoSchema(BaseModel):
+    id: int
+    status: str
+
+
+class EmailStatusSchema(BaseModel):
+    id: int
+    destinatario: str
+    assunto: str
+    status: str
+    tentativas: int
+    ultimoErro: Optional[str] = None
+    criadoEm: Optional[datetime] = None
+    enviadoEm: Optional[datetime] = None
+
+    model_config = {"from_attributes": True}
@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class ExecucaoFilaSchema(BaseModel):
+    inicio: datetime
+    duracaoS: float
+    pendentes: int
+    pagas: int
+    vazaoPorS: float
+
+
+class StatusFilaSchema(BaseModel):
+    pendentes: int
+    ocupadas: int
+    pendenteMaisAntigaEm: Optional[datetime] = None
+    idadePendenteMaisAntigaS: Optional[float] = None
+    ultimaExecucao: Optional[ExecucaoFilaSchema] = None
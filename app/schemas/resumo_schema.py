@@ -0,0 +1,24 @@
+from datetime import date
+from typing import Dict, List
+from pydantic import BaseModel
+
+
+class TotalSchema(BaseModel):
+    quantidade: int
+    valorTotal: float
+
+
+class TotalPorCiclistaSchema(TotalSchema):
+    ciclista: int
+    status: str
+
+
+class TotalPorDiaSchema(TotalSchema):
+    dia: date
+    status: str
+
+
+class ResumoCobrancasSchema(BaseModel):
+    porStatus: Dict[str, TotalSchema]
+    porCiclista: List[TotalPorCiclistaSchema]
+    porDia: List[TotalPorDiaSchema]
@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class WebhookRecebidoSchema(BaseModel):
+    recebido: bool
+    duplicado: bool = False
@@ -0,0 +1,84 @@
+# app/services/arquivamento_service.py
+# Arquivamento das cobranças finalizadas: uma thread move, a cada `intervalo_s`, as PAGA/FALHA
+# finalizadas há mais de `idade` de cobrancas para cobrancas_arquivadas, em lotes pequenos (uma
+# transação curta por lote, com pausa entre eles) para não segurar o lock de escrita do SQLite.
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.logs import registrar_evento
+from app.repositories.cobranca_repository import CobrancaRepository
+
+
+class ArquivadorCobrancas:
+    def __init__(
+            self,
+            session_factory: Callable[[], Session],
+            idade: timedelta,
+            tamanho_lote: int = 500,
+            pausa_entre_lotes_s: float = 0.05,
+            intervalo_s: float = 3600.0,
+    ):
+        self.session_factory = session_factory
+        self.idade = idade
+        self.tamanho_lote = tamanho_lote
+        self.pausa_entre_lotes_s = pausa_entre_lotes_s
+        self.intervalo_s = intervalo_s
+        self._encerrar = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def arquivar(self) -> int:
+        """Uma rodada completa, lote a lote. Retorna quantas cobranças foram arquivadas."""
+        limite = datetime.now(timezone.utc) - self.idade
+        total, lotes, inicio = 0, 0, time.perf_counter()
+        while not self._encerrar.is_set():
+            db = self.session_factory()
+            try:
+                movidas = CobrancaRepository(db).arquivar_finalizadas(limite, self.tamanho_lote)
+            except IntegrityError:
+                # Outro worker arquivou as mesmas cobranças ao mesmo tempo: ele termina a rodada
+                db.rollback()
+                registrar_evento("arquivamento.concorrente", logging.WARNING, arquivadas=total)
+                break
+            finally:
+                db.close()
+            total += movidas
+            lotes += 1 if movidas else 0
+            if movidas < self.tamanho_lote:
+                break
+            time.sleep(self.pausa_entre_lotes_s)
+        registrar_evento(
+            "arquivamento.fim", arquivadas=total, lotes=lotes, duracao_ms=round((time.perf_counter() - inicio) * 1000, 2)
+        )
+        return total
+
+    def iniciar(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._encerrar.clear()
+            self._thread = threading.Thread(target=self._executar, name="arquivamento-cobrancas", daemon=True)
+            self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        """Interrompe entre dois lotes; o lote em andamento termina (ou é desfeito) por inteiro."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._encerrar.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _executar(self) -> None:
+        while not self._encerrar.is_set():
+            try:
+                self.arquivar()
+            except Exception as e:
+                registrar_evento("arquivamento.falha", logging.ERROR, erro=str(e))
+            self._encerrar.wait(self.intervalo_s)
@@ -0,0 +1,125 @@
+# app/services/callback_service.py
+# Despacho das notificações de cobrança finalizada ao microsserviço de aluguel. O CobrancaRepository
+# grava cada PAGA/FALHA na outbox (notificacoes_aluguel) no mesmo commit da troca de status; esta
+# thread reserva lotes de até `tamanho_lote`, envia cada lote em um único POST pela sessão HTTP com
+# pool do cliente de aluguel e apaga as notificações quando o aluguel responde 2xx. Falhas devolvem o
+# lote à outbox com espera exponencial.
+
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.clients.aluguel_client import AluguelMicroserviceClient
+from app.core.logs import registrar_evento
+from app.core.metrics import CALLBACK_DESCARTADAS, CALLBACK_LOTES
+from app.models.notificacao_aluguel import NotificacaoAluguel
+from app.repositories.notificacao_aluguel_repository import NotificacaoAluguelRepository
+
+
+def montar_lote(notificacoes: List[NotificacaoAluguel]) -> List[Dict[str, Any]]:
+    # Várias transições da mesma cobrança no lote (ex.: FALHA corrigida para PAGA): vale a última
+    por_cobranca: Dict[int, Dict[str, Any]] = {}
+    for notificacao in notificacoes:
+        por_cobranca[notificacao.idCobranca] = {
+            "id": notificacao.idCobranca,
+            "ciclista": notificacao.ciclista,
+            "status": notificacao.status,
+            "horaFinalizacao": notificacao.horaFinalizacao.isoformat() if notificacao.horaFinalizacao else None,
+        }
+    return list(por_cobranca.values())
+
+
+class DespachanteCallbacks:
+    def __init__(
+            self,
+            session_factory: Callable[[], Session],
+            url: Optional[str],
+            aluguel_client_factory: Callable[[], AluguelMicroserviceClient] = AluguelMicroserviceClient,
+            tamanho_lote: int = 100,
+            intervalo_s: float = 1.0,
+            tentativas_maximas: int = 10,
+            retentativa_base_s: float = 2.0,
+            prazo_envio_s: float = 60.0,
+    ):
+        self.session_factory = session_factory
+        self.url = url
+        self.aluguel_client_factory = aluguel_client_factory
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_s = intervalo_s
+        self.tentativas_maximas = tentativas_maximas
+        self.retentativa_base_s = retentativa_base_s
+        self.prazo_envio_s = prazo_envio_s
+        self._encerrar = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        with self._lock:
+            if not self.url or (self._thread is not None and self._thread.is_alive()):
+                return
+            self._encerrar.clear()
+            self._thread = threading.Thread(target=self._executar, name="callback-aluguel", daemon=True)
+            self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        """O lote em andamento termina; o restante fica na outbox para o próximo início."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._encerrar.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _executar(self) -> None:
+        while not self._encerrar.is_set():
+            try:
+                confirmadas = self.despachar_lote()
+            except Exception as e:
+                registrar_evento("callback.falha_despacho", logging.ERROR, erro=str(e))
+                confirmadas = 0
+            # Lote cheio: segue direto para o próximo; senão espera acumular
+            if confirmadas < self.tamanho_lote:
+                self._encerrar.wait(self.intervalo_s)
+
+    def despachar_pendentes(self) -> int:
+        """Envia, na thread atual, os lotes já vencidos até esvaziar ou falhar. Retorna quantas foram confirmadas."""
+        total = 0
+        while confirmadas := self.despachar_lote():
+            total += confirmadas
+        return total
+
+    def despachar_lote(self) -> int:
+        """Envia um lote. Retorna quantas notificações o aluguel confirmou (0 sem pendências ou em falha)."""
+        db = self.session_factory()
+        try:
+            repo = NotificacaoAluguelRepository(db)
+            agora = datetime.now(timezone.utc)
+            reserva = uuid.uuid4().hex
+            notificacoes = repo.reservar_lote(reserva, agora, agora + timedelta(seconds=self.prazo_envio_s), self.tamanho_lote)
+            if not notificacoes:
+                return 0
+            try:
+                self.aluguel_client_factory().notificar_cobrancas_finalizadas(self.url, montar_lote(notificacoes))
+            except Exception as e:
+                tentativas = max(notificacao.tentativas for notificacao in notificacoes)
+                espera = self.retentativa_base_s * 2 ** min(tentativas, 10)
+                descartadas = repo.adiar(
+                    notificacoes, str(e), datetime.now(timezone.utc) + timedelta(seconds=espera), self.tentativas_maximas
+                )
+                CALLBACK_LOTES.inc(resultado="falha")
+                if descartadas:
+                    CALLBACK_DESCARTADAS.inc(descartadas)
+                registrar_evento(
+                    "callback.falha", logging.WARNING,
+                    notificacoes=len(notificacoes), descartadas=descartadas, espera_s=espera, erro=str(e)
+                )
+                return 0
+            repo.confirmar(reserva)
+            CALLBACK_LOTES.inc(resultado="confirmado")
+            registrar_evento("callback.lote", notificacoes=len(notificacoes))
+            return len(notificacoes)
+        finally:
+            db.close()
@@ -6,8 +6,12 @@ import os
 import stripe
 from dotenv import load_dotenv
 
+from app.core.config import settings
+
 load_dotenv()
 stripe.api_key = os.getenv("STRIPE_API_KEY")
+if settings.STRIPE_API_BASE:
+    stripe.api_base = settings.STRIPE_API_BASE
 
 
 
@@ -17,7 +21,3 @@ class CartaoService:
 
     def validar_cartao(self, dados_cartao: NovoCartaoDeCreditoSchema) -> None:
             self.gateway.validar_cartao(dados_cartao.numero)
-
-def get_cartao_service() -> CartaoService:
-    gateway = StripeGateway()
-    return CartaoService(gateway)
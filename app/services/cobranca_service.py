@@ -1,14 +1,27 @@
 
-from datetime import datetime, timezone
+import base64
+import binascii
+from datetime import date, datetime, timedelta, timezone
+import logging
+import time
 import stripe
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from app.clients.aluguel_client import AluguelMicroserviceClient
 from app.repositories.cobranca_repository import CobrancaRepository
-from app.integrations.stripe import StripeGateway
+from app.integrations.stripe import StripeGateway, dividir_ids_para_metadata
 from app.models.cobranca import Cobranca
+from app.core.config import settings
+from app.core.datas import em_utc
 from app.core.exceptions import CartaoApiError
+from app.core.logs import registrar_evento
+from app.core.metrics import FILA_LOTE_DURACAO, FILA_PROCESSADAS, FILA_VAZAO
+from app.core.profiling import perfilar_execucao
+from app.core.timing import medir_fase
+from app.schemas.fila_schema import ExecucaoFilaSchema, StatusFilaSchema
 from app.schemas.nova_cobranca_schema import NovaCobrancaSchema
+from app.schemas.resumo_schema import ResumoCobrancasSchema
+from app.services.reconciliacao_service import status_esperado
 from app.services.email_service import EmailService
 
 
@@ -18,6 +31,7 @@ class CobrancaService:
         self.payment_gateway = payment_gateway
         self.email_service = email_service
         self.aluguel_client = aluguel_client
+        self.id_ultimo_perfil: str | None = None
 
 
     def _obter_payment_method_id_do_ciclista(self, ciclista_id: int) -> str:
@@ -36,8 +50,50 @@ class CobrancaService:
 
     def criar_cobranca_na_fila(self, dados: NovaCobrancaSchema) -> Cobranca:
         hora_solicitacao = datetime.now(timezone.utc)
-        nova_cobranca = self.cobranca_repo.criar(dados, hora_solicitacao)
-        return self.cobranca_repo.salvar(nova_cobranca)
+        with medir_fase("db"):
+            nova_cobranca = self.cobranca_repo.criar(dados, hora_solicitacao)
+            return self.cobranca_repo.salvar(nova_cobranca)
+
+    def criar_cobranca_assincrona(self, dados: NovaCobrancaSchema) -> Cobranca:
+        """Cria a cobrança já em OCUPADA com a submissão do pagamento gravada, feita depois por submeter_pagamento."""
+        hora_solicitacao = datetime.now(timezone.utc)
+        with medir_fase("db"):
+            nova_cobranca = self.cobranca_repo.criar(dados, hora_solicitacao)
+            nova_cobranca.status = "OCUPADA"
+            return self.cobranca_repo.salvar_e_submeter(nova_cobranca)
+
+    def submeter_pagamento(self, id_cobranca: int) -> None:
+        """
+        Envia o PaymentIntent de uma cobrança OCUPADA. Um intent já concluído (aprovado ou recusado) é
+        gravado aqui; os que ficam em processamento na Stripe são finalizados pelo webhook.
+        """
+        cobranca = self.obter_por_id(id_cobranca)
+        if cobranca.status != "OCUPADA":
+            return
+        try:
+            payment_method_id = self._obter_payment_method_id_do_ciclista(cobranca.ciclista)
+            intent = self.payment_gateway.processar_pagamento(
+                valor_em_centavos=int(cobranca.valor * 100),
+                payment_method_id=payment_method_id,
+                ids_cobranca=[cobranca.id],
+                # Uma submissão repetida (reserva vencida) recebe da Stripe o mesmo intent
+                chave_idempotencia=f"cobranca-{cobranca.id}"
+            )
+        except (CartaoApiError, stripe.error.StripeError) as e:
+            registrar_evento("cobranca.submissao_falhou", logging.WARNING, cobranca=cobranca.id, erro=str(e))
+            status_final = "FALHA"
+        else:
+            status_final = status_esperado([intent])
+            if status_final is None:
+                return
+
+        # O webhook pode ter chegado durante a chamada ao gateway: só grava se ninguém finalizou antes
+        self.cobranca_repo.recarregar(cobranca)
+        if cobranca.status != "OCUPADA":
+            return
+        cobranca.status = status_final
+        cobranca.horaFinalizacao = datetime.now(timezone.utc)
+        self.cobranca_repo.salvar(cobranca)
 
     def obter_por_id(self, id_cobranca: int) -> Cobranca:
         cobranca = self.cobranca_repo.obter_por_id(id_cobranca)
@@ -45,16 +101,84 @@ class CobrancaService:
             raise CartaoApiError(404,"COBRANCA_NAO_ENCONTRADA", f"Cobrança com ID {id_cobranca} não encontrada.")
         return cobranca
 
+    @staticmethod
+    def _codificar_cursor(id_cobranca: int, hora: Optional[datetime] = None) -> str:
+        # Listagens por período paginam por (horaSolicitacao, id); as demais só pelo id
+        valor = str(id_cobranca) if hora is None else f"{em_utc(hora).isoformat()}|{id_cobranca}"
+        return base64.urlsafe_b64encode(valor.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decodificar_cursor(cursor: str) -> Tuple[int, Optional[datetime]]:
+        try:
+            valor = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+            hora, _, id_cobranca = valor.rpartition("|")
+            return int(id_cobranca), em_utc(datetime.fromisoformat(hora)) if hora else None
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            raise CartaoApiError(422, "CURSOR_INVALIDO", "O cursor de paginação é inválido.")
+
+    def listar_cobrancas(
+            self,
+            status: Optional[str] = None,
+            ciclista: Optional[int] = None,
+            desde: Optional[datetime] = None,
+            ate: Optional[datetime] = None,
+            cursor: Optional[str] = None,
+            limite: int = 50
+    ) -> Tuple[List[Cobranca], Optional[str]]:
+        apos_id, apos_hora = self._decodificar_cursor(cursor) if cursor else (None, None)
+        # Busca um item a mais só para saber se existe próxima página
+        cobrancas = self.cobranca_repo.listar(status, ciclista, desde, ate, apos_id, limite + 1, apos_hora)
+        if len(cobrancas) > limite:
+            cobrancas = cobrancas[:limite]
+            ultima = cobrancas[-1]
+            por_periodo = desde is not None or ate is not None
+            return cobrancas, self._codificar_cursor(ultima.id, ultima.horaSolicitacao if por_periodo else None)
+        return cobrancas, None
+
+    def obter_resumo(self, ciclista: int | None = None, dia: date | None = None) -> ResumoCobrancasSchema:
+        por_status, por_ciclista, por_dia = {}, [], []
+        for linha in self.cobranca_repo.obter_resumo(ciclista, dia.isoformat() if dia else None):
+            total = {"quantidade": linha.quantidade, "valorTotal": round(linha.valor_total, 2)}
+            if linha.dimensao == "status":
+                por_status[linha.status] = total
+            elif linha.dimensao == "ciclista":
+                por_ciclista.append({"ciclista": int(linha.chave), "status": linha.status, **total})
+            else:
+                por_dia.append({"dia": linha.chave, "status": linha.status, **total})
+        return ResumoCobrancasSchema(porStatus=por_status, porCiclista=por_ciclista, porDia=por_dia)
+
+    def obter_status_fila(self) -> StatusFilaSchema:
+        estado = self.cobranca_repo.obter_estado_fila()
+        status_fila = StatusFilaSchema(pendentes=estado.pendentes, ocupadas=estado.ocupadas)
+        if estado.pendenteMaisAntigaEm is not None:
+            mais_antiga = em_utc(estado.pendenteMaisAntigaEm)
+            status_fila.pendenteMaisAntigaEm = mais_antiga
+            status_fila.idadePendenteMaisAntigaS = round((datetime.now(timezone.utc) - mais_antiga).total_seconds(), 3)
+        if estado.ultimaExecucaoEm is not None:
+            duracao = estado.ultimaExecucaoDuracaoS or 0.0
+            status_fila.ultimaExecucao = ExecucaoFilaSchema(
+                inicio=em_utc(estado.ultimaExecucaoEm),
+                duracaoS=round(duracao, 3),
+                pendentes=estado.ultimaExecucaoPendentes,
+                pagas=estado.ultimaExecucaoPagas,
+                vazaoPorS=round(estado.ultimaExecucaoPendentes / duracao, 2) if duracao > 0 else 0.0,
+            )
+        return status_fila
+
     def processar_pagamento_de_cobranca(self, id_cobranca: int) -> Cobranca:
 
-        cobranca = self.obter_por_id(id_cobranca)
+        with medir_fase("db"):
+            cobranca = self.obter_por_id(id_cobranca)
 
         try:
-            payment_method_id = self._obter_payment_method_id_do_ciclista(cobranca.ciclista)
-            intent = self.payment_gateway.processar_pagamento(
-                valor_em_centavos=int(cobranca.valor * 100),
-                payment_method_id=payment_method_id
-            )
+            with medir_fase("aluguel"):
+                payment_method_id = self._obter_payment_method_id_do_ciclista(cobranca.ciclista)
+            with medir_fase("gateway"):
+                intent = self.payment_gateway.processar_pagamento(
+                    valor_em_centavos=int(cobranca.valor * 100),
+                    payment_method_id=payment_method_id,
+                    ids_cobranca=[cobranca.id]
+                )
             # Sucesso: A chamada ao gateway não lançou exceção.
             cobranca.status = "PAGA" if intent.status == 'succeeded' else "FALHA"
 
@@ -62,7 +186,8 @@ class CobrancaService:
             cobranca.status = "FALHA"
         finally:
             cobranca.horaFinalizacao = datetime.now(timezone.utc)
-            self.cobranca_repo.salvar(cobranca)
+            with medir_fase("db"):
+                self.cobranca_repo.salvar(cobranca)
 
         return cobranca
 
@@ -71,7 +196,8 @@ class CobrancaService:
             payment_method_id = self._obter_payment_method_id_do_ciclista(cobranca.ciclista)
             intent = self.payment_gateway.processar_pagamento(
                 valor_em_centavos=int(cobranca.valor * 100),
-                payment_method_id=payment_method_id
+                payment_method_id=payment_method_id,
+                ids_cobranca=[cobranca.id]
             )
 
             if intent.status == "succeeded":
@@ -84,33 +210,103 @@ class CobrancaService:
 
         return None
 
-    def _processar_pagamentos_da_fila(self) -> List[Cobranca]:
-        print("Iniciando processamento de pagamentos em fila...")
+    def tentar_grupo_da_fila(self, cobrancas: List[Cobranca]) -> List[Cobranca]:
+        """
+        Cobra, em um único PaymentIntent, a soma das cobranças pendentes de um mesmo ciclista.
+        O resultado vale para todas: ou todas viram PAGA em uma só transação, ou todas continuam PENDENTE.
+        Grupos cujos ids não cabem no metadata do intent são cobrados em lotes, um intent por lote.
+        """
+        lotes = dividir_ids_para_metadata([cobranca.id for cobranca in cobrancas])
+        if len(lotes) > 1:
+            por_id = {cobranca.id: cobranca for cobranca in cobrancas}
+            return [paga for lote in lotes for paga in self.tentar_grupo_da_fila([por_id[id_cobranca] for id_cobranca in lote])]
+        if len(cobrancas) == 1:
+            resultado = self.tentar_cobranca_da_fila(cobrancas[0])
+            return [resultado] if resultado else []
+        try:
+            payment_method_id = self._obter_payment_method_id_do_ciclista(cobrancas[0].ciclista)
+            intent = self.payment_gateway.processar_pagamento(
+                valor_em_centavos=sum(int(cobranca.valor * 100) for cobranca in cobrancas),
+                payment_method_id=payment_method_id,
+                ids_cobranca=[cobranca.id for cobranca in cobrancas]
+            )
+        except (CartaoApiError, stripe.error.StripeError):
+            return []
+
+        if intent.status != "succeeded":
+            return []
+        hora_finalizacao = datetime.now(timezone.utc)
+        for cobranca in cobrancas:
+            cobranca.status = "PAGA"
+            cobranca.horaFinalizacao = hora_finalizacao
+        return self.cobranca_repo.salvar_em_lote(cobrancas)
+
+    def _processar_pagamentos_da_fila(self, agrupar_por_ciclista: bool = False) -> List[Cobranca]:
+        registrar_evento("fila.inicio", agrupar_por_ciclista=agrupar_por_ciclista)
+        inicio = time.perf_counter()
         lista_cobrancas_pendentes = self.cobranca_repo.listar_pendentes()
         lista_cobrancas_pagas = []
-        for cobranca in lista_cobrancas_pendentes:
-            resultado = self.tentar_cobranca_da_fila(cobranca)
-            if resultado and resultado.status == "PAGA":
-                lista_cobrancas_pagas.append(resultado)
-        print(f"{len(lista_cobrancas_pagas)} cobranças foram pagas com sucesso.")
+        if agrupar_por_ciclista:
+            grupos: Dict[int, List[Cobranca]] = {}
+            for cobranca in lista_cobrancas_pendentes:
+                grupos.setdefault(cobranca.ciclista, []).append(cobranca)
+            for grupo in grupos.values():
+                lista_cobrancas_pagas.extend(self.tentar_grupo_da_fila(grupo))
+        else:
+            for cobranca in lista_cobrancas_pendentes:
+                resultado = self.tentar_cobranca_da_fila(cobranca)
+                if resultado and resultado.status == "PAGA":
+                    lista_cobrancas_pagas.append(resultado)
+        duracao = time.perf_counter() - inicio
+
+        FILA_LOTE_DURACAO.observar(duracao)
+        FILA_PROCESSADAS.inc(len(lista_cobrancas_pagas), resultado="paga")
+        FILA_PROCESSADAS.inc(len(lista_cobrancas_pendentes) - len(lista_cobrancas_pagas), resultado="nao_paga")
+        FILA_VAZAO.set(len(lista_cobrancas_pendentes) / duracao if duracao > 0 else 0.0)
+        self.cobranca_repo.registrar_execucao_fila(
+            datetime.now(timezone.utc) - timedelta(seconds=duracao), duracao,
+            len(lista_cobrancas_pendentes), len(lista_cobrancas_pagas)
+        )
+
+        registrar_evento(
+            "fila.fim",
+            pendentes=len(lista_cobrancas_pendentes),
+            pagas=len(lista_cobrancas_pagas),
+            duracao_ms=round(duracao * 1000, 2)
+        )
         return lista_cobrancas_pagas
 
     def _enviar_notificacoes_de_pagamento(self, cobrancas_pagas: List[Cobranca]) -> None:
 
-        print(f"Iniciando envio de {len(cobrancas_pagas)} notificações...")
+        # Um e-mail (e uma consulta ao aluguel) por ciclista, não por cobrança
+        por_ciclista: Dict[int, List[Cobranca]] = {}
         for cobranca in cobrancas_pagas:
+            por_ciclista.setdefault(cobranca.ciclista, []).append(cobranca)
+
+        registrar_evento("notificacoes.inicio", quantidade=len(cobrancas_pagas), ciclistas=len(por_ciclista))
+        for ciclista, cobrancas in por_ciclista.items():
             try:
-                destinatario = self._obter_email_do_ciclista(cobranca.ciclista)
-                if destinatario:
-                    self.email_service.enviar_confirmacao_pagamento(cobranca, destinatario)
+                destinatario = self._obter_email_do_ciclista(ciclista)
+                if not destinatario:
+                    continue
+                if len(cobrancas) == 1:
+                    self.email_service.enviar_confirmacao_pagamento(cobrancas[0], destinatario)
+                else:
+                    self.email_service.enviar_resumo_pagamentos(cobrancas, destinatario)
             except Exception as e:
-                print(f"ALERTA: A notificação para a cobrança {cobranca.id} falhou. Erro: {e}")
-        print("Envio de notificações concluído.")
+                registrar_evento(
+                    "notificacoes.falha", logging.WARNING,
+                    ciclista=ciclista, cobrancas=[cobranca.id for cobranca in cobrancas], erro=str(e)
+                )
+        registrar_evento("notificacoes.fim")
 
-    def processar_cobrancas_em_fila(self) -> List[Cobranca]:
+    def processar_cobrancas_em_fila(self, agrupar_por_ciclista: bool = False) -> List[Cobranca]:
 
-        # Etapa 1: Processar os pagamentos
-        cobrancas_pagas = self._processar_pagamentos_da_fila()
+        # Etapa 1: Processar os pagamentos (sob o profiler só com PERFIL_FILA_ATIVO: é ligado pelo operador, não pelo cliente)
+        agrupar = agrupar_por_ciclista or settings.FILA_AGRUPAR_POR_CICLISTA
+        with perfilar_execucao("fila", settings.PERFIL_FILA_ATIVO, settings.PERFIL_DIRETORIO) as run_id:
+            cobrancas_pagas = self._processar_pagamentos_da_fila(agrupar)
+        self.id_ultimo_perfil = run_id
 
         # Etapa 2: Enviar as notificações para os pagamentos bem-sucedidos
         if cobrancas_pagas:
@@ -1,3 +1,5 @@
+from typing import List
+
 from app.integrations.email import EmailClient
 from app.models.cobranca import Cobranca
 
@@ -20,4 +22,22 @@ class EmailService:
             f"Data de Finalização: {cobranca.horaFinalizacao.strftime('%d/%m/%Y %H:%M')}\n\n"
             "Obrigado!"
         )
-        self.enviar(destinatario, assunto, mensagem)
\ No newline at end of file
+        self.enviar(destinatario, assunto, mensagem)
+
+    def enviar_resumo_pagamentos(self, cobrancas: List[Cobranca], destinatario: str):
+        """Um único e-mail para várias cobranças do mesmo ciclista pagas na mesma execução da fila."""
+        total = sum(cobranca.valor for cobranca in cobrancas)
+        assunto = f"Confirmação de Pagamentos Recebidos - {len(cobrancas)} cobranças"
+        linhas = [
+            f"#{cobranca.id} - R$ {cobranca.valor:.2f} - {cobranca.status} - "
+            f"{cobranca.horaFinalizacao.strftime('%d/%m/%Y %H:%M')}"
+            for cobranca in cobrancas
+        ]
+        mensagem = (
+            f"Olá!\n\n"
+            f"Confirmamos o recebimento de {len(cobrancas)} pagamentos, no total de R$ {total:.2f}.\n\n"
+            f"Cobranças:\n"
+            + "\n".join(linhas)
+            + "\n\nObrigado!"
+        )
+        self.enviar(destinatario, assunto, mensagem)
@@ -0,0 +1,109 @@
+# app/services/eventos_service.py
+# Propagação das transições gravadas em eventos_cobranca para o barramento SSE do worker. Cada worker
+# tem a sua thread, que lê as linhas com id maior que o último lido e as publica; assim um assinante
+# recebe as transições gravadas por qualquer processo. Sem assinantes, só acompanha o fim da tabela.
+# A mesma thread apaga os eventos mais velhos que a retenção (o que limita o replay do Last-Event-ID).
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.datas import em_utc
+from app.core.eventos import BarramentoEventos, Evento
+from app.core.logs import registrar_evento
+from app.models.evento_cobranca import EventoCobranca
+from app.repositories.evento_cobranca_repository import EventoCobrancaRepository
+
+
+def para_evento(linha: EventoCobranca) -> Evento:
+    transicao: Dict[str, Any] = {
+        "id": linha.idCobranca,
+        "ciclista": linha.ciclista,
+        "status": linha.status,
+        "statusAnterior": linha.statusAnterior,
+        "valor": linha.valor,
+        "horaFinalizacao": em_utc(linha.horaFinalizacao) if linha.horaFinalizacao else None,
+    }
+    return linha.id, transicao
+
+
+class PropagadorEventos:
+    def __init__(
+            self,
+            session_factory: Callable[[], Session],
+            barramento: BarramentoEventos,
+            intervalo_s: float = 0.2,
+            tamanho_lote: int = 500,
+            retencao: timedelta = timedelta(hours=1),
+            intervalo_limpeza_s: float = 60.0,
+    ):
+        self.session_factory = session_factory
+        self.barramento = barramento
+        self.intervalo_s = intervalo_s
+        self.tamanho_lote = tamanho_lote
+        self.retencao = retencao
+        self.intervalo_limpeza_s = intervalo_limpeza_s
+        self._ultimo_id: Optional[int] = None
+        self._proxima_limpeza = 0.0
+        self._encerrar = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self) -> None:
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._encerrar.clear()
+            self._ultimo_id = None  # começa do fim da tabela: o histórico só é lido via Last-Event-ID
+            self._thread = threading.Thread(target=self._executar, name="eventos-cobranca", daemon=True)
+            self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._encerrar.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _executar(self) -> None:
+        while not self._encerrar.is_set():
+            try:
+                lidos = self.propagar()
+            except Exception as e:
+                registrar_evento("eventos.falha_leitura", logging.ERROR, erro=str(e))
+                lidos = 0
+            if lidos < self.tamanho_lote:
+                self._encerrar.wait(self.intervalo_s)
+
+    def propagar(self) -> int:
+        """Publica um lote de eventos novos. Retorna quantos foram lidos."""
+        db = self.session_factory()
+        try:
+            repo = EventoCobrancaRepository(db)
+            if time.monotonic() >= self._proxima_limpeza:
+                self._proxima_limpeza = time.monotonic() + self.intervalo_limpeza_s
+                repo.remover_anteriores(datetime.now(timezone.utc) - self.retencao)
+            if self._ultimo_id is None or not len(self.barramento):
+                self._ultimo_id = repo.ultimo_id()
+                return 0
+            linhas = repo.listar_apos(self._ultimo_id, self.tamanho_lote)
+            if linhas:
+                self._ultimo_id = linhas[-1].id
+                self.barramento.publicar(para_evento(linha) for linha in linhas)
+            return len(linhas)
+        finally:
+            db.close()
+
+    def recuperar(self, apos_id: int, limite: int, cobranca: Optional[int] = None,
+                  ciclista: Optional[int] = None) -> List[Evento]:
+        """Eventos gravados depois de `apos_id` (Last-Event-ID de uma reconexão), já filtrados."""
+        db = self.session_factory()
+        try:
+            linhas = EventoCobrancaRepository(db).listar_apos(apos_id, limite, cobranca, ciclista)
+            return [para_evento(linha) for linha in linhas]
+        finally:
+            db.close()
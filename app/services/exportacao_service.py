@@ -0,0 +1,114 @@
+# app/services/exportacao_service.py
+# Exportação de cobranças em streaming (NDJSON ou CSV, opcionalmente gzip) com memória constante:
+# as linhas são lidas em páginas por keyset (id > último), das cobranças vivas e das arquivadas, cada
+# página em uma sessão curta, e codificadas lote a lote. Nenhuma transação de leitura fica aberta enquanto o cliente consome a resposta (no
+# SQLite ela impediria o checkpoint do WAL e seguraria os escritores durante toda a exportação).
+
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional, Sequence
+
+import orjson
+from sqlalchemy import select, union_all
+from sqlalchemy.orm import Session
+
+from app.core.serializacao import CAMPOS_COBRANCA, cobranca_para_dict
+from app.models.cobranca import Cobranca
+from app.models.cobranca_arquivada import CobrancaArquivada
+from app.repositories.cobranca_repository import STATUS_FINALIZADOS
+
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _filtrar(modelo, status: Optional[str], desde: Optional[datetime], ate: Optional[datetime],
+             apos_id: Optional[int], tamanho_lote: int):
+    consulta = select(*(getattr(modelo, campo) for campo in CAMPOS_COBRANCA))
+    if status is not None:
+        consulta = consulta.where(modelo.status == status)
+    if desde is not None:
+        consulta = consulta.where(modelo.horaSolicitacao >= desde)
+    if ate is not None:
+        consulta = consulta.where(modelo.horaSolicitacao < ate)
+    if apos_id is not None:
+        consulta = consulta.where(modelo.id > apos_id)
+    # Cada tabela lê no máximo um lote pelo índice do id; a união só ordena esses dois lotes
+    return select(consulta.order_by(modelo.id).limit(tamanho_lote).subquery())
+
+
+def _linhas_em_lotes(
+        session_factory: Callable[[], Session],
+        status: Optional[str],
+        desde: Optional[datetime],
+        ate: Optional[datetime],
+        tamanho_lote: int
+) -> Iterator[Sequence]:
+    # As finalizadas antigas foram movidas para o arquivo: períodos arquivados também são exportados
+    modelos = [Cobranca]
+    if status is None or status in STATUS_FINALIZADOS:
+        modelos.append(CobrancaArquivada)
+    ultimo_id = None
+    while True:
+        uniao = union_all(*(_filtrar(modelo, status, desde, ate, ultimo_id, tamanho_lote) for modelo in modelos))
+        pagina = uniao.order_by(uniao.selected_columns.id).limit(tamanho_lote)
+        db = session_factory()
+        try:
+            lote = db.execute(pagina).all()
+        finally:
+            db.close()  # encerra a transação antes de entregar o lote
+        if lote:
+            yield lote
+        if len(lote) < tamanho_lote:
+            return
+        ultimo_id = lote[-1].id
+
+
+def codificar_ndjson(lotes: Iterable[Sequence]) -> Iterator[bytes]:
+    for lote in lotes:
+        yield b"".join(orjson.dumps(cobranca_para_dict(linha), option=orjson.OPT_UTC_Z) + b"\n" for linha in lote)
+
+
+def codificar_csv(lotes: Iterable[Sequence]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(CAMPOS_COBRANCA)
+    for lote in lotes:
+        for linha in lote:
+            escritor.writerow(valor.isoformat() if isinstance(valor, datetime) else valor for valor in linha)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def comprimir_gzip(blocos: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # 31 = formato gzip
+    for bloco in blocos:
+        comprimido = compressor.compress(bloco)
+        if comprimido:
+            yield comprimido
+    yield compressor.flush()
+
+
+class ExportacaoService:
+    def __init__(self, session_factory: Callable[[], Session], tamanho_lote: int = 1000):
+        # Usa sessões próprias: o streaming continua depois que a dependência por requisição já fechou a dela.
+        self.session_factory = session_factory
+        self.tamanho_lote = tamanho_lote
+
+    def exportar(
+            self,
+            formato: str = "ndjson",
+            gzip: bool = False,
+            status: Optional[str] = None,
+            desde: Optional[datetime] = None,
+            ate: Optional[datetime] = None
+    ) -> Iterator[bytes]:
+        codificar = codificar_csv if formato == "csv" else codificar_ndjson
+        blocos = codificar(_linhas_em_lotes(self.session_factory, status, desde, ate, self.tamanho_lote))
+        yield from (comprimir_gzip(blocos) if gzip else blocos)
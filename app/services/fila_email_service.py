@@ -0,0 +1,106 @@
+# app/services/fila_email_service.py
+# Entrega dos e-mails aceitos em modo assíncrono. A fila é a tabela emails_fila (sobrevive a
+# reinícios); `concorrencia` threads reservam um e-mail por vez, chamam o SendGrid e registram o
+# resultado. Falhas voltam para a fila com espera exponencial até `tentativas_maximas`.
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+
+from app.core.logs import registrar_evento
+from app.core.metrics import EMAIL_FILA_ENVIOS
+from app.repositories.email_fila_repository import EmailFilaRepository
+from app.services.email_service import EmailService
+
+
+class EnviadorEmails:
+    def __init__(
+            self,
+            session_factory: Callable[[], Session],
+            email_service_factory: Callable[[], EmailService] = EmailService,
+            concorrencia: int = 4,
+            tentativas_maximas: int = 5,
+            retentativa_base_s: float = 2.0,
+            prazo_envio_s: float = 60.0,
+            intervalo_busca_s: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.email_service_factory = email_service_factory
+        self.concorrencia = concorrencia
+        self.tentativas_maximas = tentativas_maximas
+        self.retentativa_base_s = retentativa_base_s
+        self.prazo_envio_s = prazo_envio_s
+        self.intervalo_busca_s = intervalo_busca_s
+        self._acordar = threading.Event()
+        self._encerrar = threading.Event()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def iniciar(self) -> None:
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            if self._threads:
+                return
+            self._encerrar.clear()
+            for indice in range(self.concorrencia):
+                thread = threading.Thread(target=self._executar, name=f"enviador-email-{indice}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def acordar(self) -> None:
+        """Avisa que há e-mail novo na fila (inicia os enviadores na primeira vez)."""
+        self.iniciar()
+        self._acordar.set()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        """Os envios em andamento terminam; o que ficou na fila é entregue no próximo início."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            self._encerrar.set()
+            self._acordar.set()
+        for thread in threads:
+            thread.join(timeout)
+
+    def _executar(self) -> None:
+        while not self._encerrar.is_set():
+            if not self.enviar_proximo():
+                self._acordar.wait(self.intervalo_busca_s)
+                self._acordar.clear()
+
+    def processar_pendentes(self) -> int:
+        """Entrega, na thread atual, todos os e-mails já vencidos. Retorna quantos foram tentados."""
+        tentados = 0
+        while self.enviar_proximo():
+            tentados += 1
+        return tentados
+
+    def enviar_proximo(self) -> bool:
+        db = self.session_factory()
+        try:
+            repo = EmailFilaRepository(db)
+            agora = datetime.now(timezone.utc)
+            email = repo.reservar_proximo(agora, agora + timedelta(seconds=self.prazo_envio_s), self.tentativas_maximas)
+            if email is None:
+                return False
+            try:
+                self.email_service_factory().enviar(email.destinatario, email.assunto, email.mensagem)
+            except Exception as e:
+                erro = getattr(e, "mensagem", None) or str(e)
+                if email.tentativas + 1 >= self.tentativas_maximas:
+                    repo.marcar_falha(email, erro, None)
+                    EMAIL_FILA_ENVIOS.inc(resultado="falha")
+                    registrar_evento("email_fila.falha", logging.ERROR, email=email.id, tentativas=email.tentativas, erro=erro)
+                else:
+                    espera = self.retentativa_base_s * 2 ** email.tentativas
+                    repo.marcar_falha(email, erro, datetime.now(timezone.utc) + timedelta(seconds=espera))
+                    EMAIL_FILA_ENVIOS.inc(resultado="retentativa")
+                    registrar_evento("email_fila.retentativa", logging.WARNING, email=email.id, tentativas=email.tentativas, erro=erro)
+                return True
+            repo.marcar_enviado(email, datetime.now(timezone.utc))
+            EMAIL_FILA_ENVIOS.inc(resultado="enviado")
+            return True
+        finally:
+            db.close()
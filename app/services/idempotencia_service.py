@@ -0,0 +1,134 @@
+# app/services/idempotencia_service.py
+# Idempotency-Key: a primeira requisição com uma chave reserva a chave (EM_ANDAMENTO), executa a
+# operação e guarda a resposta; repetições recebem a resposta guardada sem executar nada de novo.
+# Repetições que chegam enquanto a original ainda roda esperam por ela (consultando a tabela, o que
+# funciona entre workers diferentes, com recuo exponencial e jitter). A reserva EM_ANDAMENTO tem um prazo
+# curto próprio: se o worker dono cair, uma repetição assume a chave depois desse prazo.
+# Uma falha só libera a chave se a operação ainda não gravou nada; depois do primeiro commit (a cobrança já
+# existe e o gateway pode ter sido chamado) a resposta de erro fica guardada como a resposta da chave.
+
+import hashlib
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Tuple
+
+from sqlalchemy import event
+
+from app.core.datas import em_utc
+from app.core.config import Settings
+from app.core.exceptions import CartaoApiError
+from app.repositories.idempotencia_repository import IdempotenciaRepository
+from app.schemas.error_schema import ErroSchema
+
+Resposta = Tuple[int, bytes]
+
+
+def prazo_reserva(config: Settings) -> timedelta:
+    """
+    Pior caso de uma cobrança síncrona: a consulta do cartão ao aluguel, a espera no limitador da Stripe,
+    cada tentativa de rede da Stripe e a espera por lock nos dois commits, com uma folga.
+    """
+    if config.IDEMPOTENCIA_RESERVA_S is not None:
+        return timedelta(seconds=config.IDEMPOTENCIA_RESERVA_S)
+    return timedelta(seconds=(
+        config.ALUGUEL_TIMEOUT_S
+        + config.STRIPE_ESPERA_MAXIMA_S
+        + (config.STRIPE_TENTATIVAS_REDE + 1) * config.STRIPE_TIMEOUT_S
+        + 2 * config.SQLITE_BUSY_TIMEOUT_MS / 1000
+        + 10
+    ))
+
+
+def resposta_de_erro(erro: Exception) -> Resposta:
+    if isinstance(erro, CartaoApiError):
+        return erro.status_code, ErroSchema(codigo=erro.codigo, mensagem=erro.mensagem).model_dump_json().encode()
+    return 500, ErroSchema(codigo="ERRO_INTERNO", mensagem="Falha inesperada ao processar a requisição.").model_dump_json().encode()
+
+
+class IdempotenciaService:
+    def __init__(
+            self,
+            repo: IdempotenciaRepository,
+            validade: timedelta,
+            espera_maxima_s: float,
+            reserva: timedelta = timedelta(seconds=120),
+            intervalo_s: float = 0.05,
+            intervalo_maximo_s: float = 1.0
+    ):
+        self.repo = repo
+        self.validade = validade
+        self.espera_maxima_s = espera_maxima_s
+        self.reserva = reserva
+        self.intervalo_s = intervalo_s
+        self.intervalo_maximo_s = intervalo_maximo_s
+
+    def _reservar(self, chave: str, rota: str, hash_requisicao: str) -> bool:
+        agora = datetime.now(timezone.utc)
+        return self.repo.reservar(chave, rota, hash_requisicao, agora + self.validade, agora + self.reserva)
+
+    def _assumir_se_vencida(self, chave: str, rota: str, reserva_expira_em: datetime | None) -> bool:
+        agora = datetime.now(timezone.utc)
+        if reserva_expira_em is None or em_utc(reserva_expira_em) >= agora:
+            return False
+        return self.repo.assumir_reserva_vencida(chave, rota, agora, agora + self.validade, agora + self.reserva)
+
+    def _aguardar_ou_reservar(self, chave: str, rota: str, hash_requisicao: str) -> Resposta | None:
+        """Retorna a resposta guardada, ou None quando esta requisição ficou com a reserva."""
+        self.repo.remover_expiradas(datetime.now(timezone.utc))
+        if self._reservar(chave, rota, hash_requisicao):
+            return None
+        prazo = time.monotonic() + self.espera_maxima_s
+        intervalo = self.intervalo_s
+        while True:
+            registro = self.repo.obter(chave, rota)
+            if registro is None:
+                # A original falhou e liberou a chave: tenta ficar com ela
+                if self._reservar(chave, rota, hash_requisicao):
+                    return None
+                continue
+            if registro.hashRequisicao != hash_requisicao:
+                raise CartaoApiError(422, "CHAVE_IDEMPOTENCIA_REUTILIZADA", "A Idempotency-Key já foi usada com outro corpo de requisição.")
+            if registro.status == "CONCLUIDA":
+                return registro.statusHttp, registro.corpo
+            if self._assumir_se_vencida(chave, rota, registro.reservaExpiraEm):
+                return None
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                raise CartaoApiError(409, "REQUISICAO_EM_ANDAMENTO", "Uma requisição com esta Idempotency-Key ainda está em processamento.")
+            # Recuo exponencial com jitter: as repetições não consultam a tabela todas juntas
+            time.sleep(min(restante, random.uniform(intervalo / 2, intervalo)))
+            intervalo = min(self.intervalo_maximo_s, intervalo * 2)
+
+    def executar(self, chave: str, rota: str, requisicao: bytes, operacao: Callable[[], Resposta]) -> Tuple[int, bytes, bool]:
+        """Retorna (status, corpo, reproduzida)."""
+        if not chave or len(chave) > 255:
+            raise CartaoApiError(422, "CHAVE_IDEMPOTENCIA_INVALIDA", "A Idempotency-Key deve ter entre 1 e 255 caracteres.")
+        hash_requisicao = hashlib.sha256(requisicao).hexdigest()
+
+        guardada = self._aguardar_ou_reservar(chave, rota, hash_requisicao)
+        if guardada is not None:
+            return guardada[0], guardada[1], True
+
+        # A operação usa a mesma sessão da requisição: um commit dela marca que já houve efeito
+        commits = []
+
+        def registrar_commit(_session: Any) -> None:
+            commits.append(True)
+
+        event.listen(self.repo.db, "after_commit", registrar_commit)
+        try:
+            status_http, corpo = operacao()
+        except Exception as erro:
+            event.remove(self.repo.db, "after_commit", registrar_commit)
+            self.repo.db.rollback()
+            if not commits:
+                # Nada foi gravado (validação, cartão ausente...): libera a chave para uma nova tentativa
+                self.repo.remover(chave, rota)
+            else:
+                # Repetir executaria de novo o que já aconteceu: a repetição recebe este mesmo erro
+                self.repo.concluir(chave, rota, *resposta_de_erro(erro))
+            raise
+        event.remove(self.repo.db, "after_commit", registrar_commit)
+        self.repo.concluir(chave, rota, status_http, corpo)
+        return status_http, corpo, False
@@ -0,0 +1,151 @@
+# app/services/importacao_cartoes_service.py
+# Importação em lote de cartões: validação local vetorizada (NumPy) e validação no gateway
+# apenas das linhas localmente válidas. Reproduz as regras e códigos de NovoCartaoDeCreditoSchema.
+
+import csv
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, TextIO, Tuple
+
+import numpy as np
+
+from app.core.exceptions import CartaoApiError
+from app.integrations.stripe import StripeGateway
+
+COLUNAS_ENTRADA = ("nomeTitular", "numero", "validade", "cvv")
+COLUNAS_SAIDA = ("linha", "numero", "status", "codigo", "mensagem")
+
+# (codigo, mensagem) na mesma ordem de prioridade em que o schema valida os campos
+TITULAR_VAZIO = ("TITULAR_VAZIO", "Nome do titular não pode ser vazio")
+NUMERO_NAO_NUMERICO = ("NUMERO_INVALIDO", "Número do cartão deve conter apenas dígitos")
+NUMERO_ZERADO = ("NUMERO_INVALIDO", "Número do cartão não pode ser composto apenas por zeros")
+NUMERO_LUHN = ("NUMERO_INVALIDO", "Número do cartão de crédito é inválido")
+CVV_VAZIO = ("CVV_VAZIO", "CVV não pode ser vazio")
+CVV_NAO_NUMERICO = ("CVV_INVALIDO", "CVV deve conter apenas números")
+CVV_TAMANHO = ("CVV_TAMANHO_INVALIDO", "CVV deve ter 3 ou 4 dígitos")
+
+
+@dataclass
+class ResultadoLinha:
+    linha: int
+    numero: str
+    status: str  # VALIDO, INVALIDO ou RECUSADO
+    codigo: str = ""
+    mensagem: str = ""
+
+
+def _apenas_digitos_ascii(valores: np.ndarray) -> np.ndarray:
+    # str.isdigit aceita dígitos Unicode ('²', '٣'); aqui só 0-9 entram no cálculo de Luhn.
+    nao_vazio = np.char.str_len(valores) > 0
+    return nao_vazio & (np.char.strip(valores, "0123456789") == "")
+
+
+def luhn_vetorizado(numeros: np.ndarray) -> np.ndarray:
+    """Aplica Luhn a um array de strings só com dígitos ASCII. Retorna um array booleano."""
+    if numeros.size == 0:
+        return np.zeros(0, dtype=bool)
+    tamanho = int(np.char.str_len(numeros).max())
+    # Zeros à esquerda não alteram a soma de Luhn e alinham a paridade pela direita
+    alinhados = np.char.rjust(numeros, tamanho, "0").astype(f"S{tamanho}")
+    digitos = alinhados.view(np.uint8).reshape(-1, tamanho).astype(np.int16) - ord("0")
+    dobrar = (np.arange(tamanho)[::-1] % 2) == 1
+    dobrados = digitos[:, dobrar] * 2
+    digitos[:, dobrar] = np.where(dobrados > 9, dobrados - 9, dobrados)
+    return digitos.sum(axis=1) % 10 == 0
+
+
+def validar_lote(titulares: List[str], numeros: List[str], cvvs: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Valida um lote localmente. Retorna (numeros_limpos, codigos, mensagens);
+    código vazio significa linha válida.
+    """
+    titulares_arr = np.asarray(titulares, dtype=str)
+    numeros_arr = np.char.replace(np.asarray(numeros, dtype=str), " ", "")
+    cvvs_arr = np.char.strip(np.asarray(cvvs, dtype=str))
+
+    titular_vazio = np.char.strip(titulares_arr) == ""
+
+    numero_digitos = _apenas_digitos_ascii(numeros_arr)
+    numero_zerado = numero_digitos & (np.char.strip(numeros_arr, "0") == "")
+    luhn_ok = np.zeros(numeros_arr.shape, dtype=bool)
+    candidatos = numero_digitos & ~numero_zerado
+    luhn_ok[candidatos] = luhn_vetorizado(numeros_arr[candidatos])
+
+    cvv_vazio = cvvs_arr == ""
+    cvv_digitos = _apenas_digitos_ascii(cvvs_arr)
+    cvv_tamanho = np.isin(np.char.str_len(cvvs_arr), (3, 4))
+
+    regras = [
+        (titular_vazio, TITULAR_VAZIO),
+        (~numero_digitos, NUMERO_NAO_NUMERICO),
+        (numero_zerado, NUMERO_ZERADO),
+        (~luhn_ok, NUMERO_LUHN),
+        (cvv_vazio, CVV_VAZIO),
+        (~cvv_digitos, CVV_NAO_NUMERICO),
+        (~cvv_tamanho, CVV_TAMANHO),
+    ]
+    condicoes = [condicao for condicao, _ in regras]
+    codigos = np.select(condicoes, [codigo for _, (codigo, _) in regras], default="")
+    mensagens = np.select(condicoes, [mensagem for _, (_, mensagem) in regras], default="")
+    return numeros_arr, codigos, mensagens
+
+
+def _mascarar(numero: str) -> str:
+    return f"****{numero[-4:]}" if len(numero) >= 4 else "****"
+
+
+def ler_lotes(arquivo: TextIO, tamanho_lote: int) -> Iterator[List[Dict[str, str]]]:
+    lote: List[Dict[str, str]] = []
+    for registro in csv.DictReader(arquivo):
+        lote.append(registro)
+        if len(lote) >= tamanho_lote:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+class ImportacaoCartoesService:
+    def __init__(self, stripe_gateway: StripeGateway, concorrencia: int = 4, validar_no_gateway: bool = True):
+        self.gateway = stripe_gateway
+        self.concorrencia = concorrencia
+        self.validar_no_gateway = validar_no_gateway
+
+    def _validar_no_gateway(self, resultado: ResultadoLinha, numero: str) -> ResultadoLinha:
+        try:
+            self.gateway.validar_cartao(numero)
+        except CartaoApiError as e:
+            resultado.status, resultado.codigo, resultado.mensagem = "RECUSADO", e.codigo, e.mensagem
+        return resultado
+
+    def processar_lote(self, registros: List[Dict[str, str]], primeira_linha: int) -> List[ResultadoLinha]:
+        def coluna(nome: str) -> List[str]:
+            return [registro.get(nome) or "" for registro in registros]
+
+        numeros, codigos, mensagens = validar_lote(coluna("nomeTitular"), coluna("numero"), coluna("cvv"))
+
+        resultados: List[ResultadoLinha] = []
+        pendentes_gateway = []
+        for indice, (numero, codigo, mensagem) in enumerate(zip(numeros.tolist(), codigos.tolist(), mensagens.tolist())):
+            resultado = ResultadoLinha(primeira_linha + indice, _mascarar(numero), "INVALIDO" if codigo else "VALIDO", codigo, mensagem)
+            resultados.append(resultado)
+            if not codigo and self.validar_no_gateway:
+                pendentes_gateway.append((resultado, numero))
+
+        if pendentes_gateway:
+            with ThreadPoolExecutor(max_workers=self.concorrencia) as executor:
+                list(executor.map(lambda par: self._validar_no_gateway(*par), pendentes_gateway))
+        return resultados
+
+    def importar(self, entrada: TextIO, saida: TextIO, tamanho_lote: int = 10_000) -> Dict[str, int]:
+        escritor = csv.DictWriter(saida, fieldnames=COLUNAS_SAIDA)
+        escritor.writeheader()
+        totais: Dict[str, int] = {}
+        linha = 2  # a linha 1 é o cabeçalho
+        for registros in ler_lotes(entrada, tamanho_lote):
+            for resultado in self.processar_lote(registros, linha):
+                escritor.writerow(resultado.__dict__)
+                chave = resultado.codigo or resultado.status
+                totais[chave] = totais.get(chave, 0) + 1
+            linha += len(registros)
+        return totais
@@ -0,0 +1,103 @@
+# app/services/reconciliacao_service.py
+# Reconciliação em lote das cobranças com os PaymentIntents da Stripe. Os intents são lidos em páginas,
+# casados com as cobranças pelo metadata "cobranca_ids" (gravado pelo StripeGateway) e os status
+# divergentes são corrigidos com um único commit por página. Um grupo grande da fila é cobrado em vários
+# intents, cada um com os seus ids: cada intent vale só para as cobranças do próprio metadata.
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from app.core.logs import registrar_evento
+from app.integrations.stripe import StripeGateway
+from app.models.cobranca import Cobranca
+from app.repositories.cobranca_repository import CobrancaRepository
+
+INTENTS_COM_FALHA = {"canceled", "requires_payment_method"}
+
+
+@dataclass
+class ResultadoReconciliacao:
+    paginas: int = 0
+    intents: int = 0
+    intents_sem_cobranca: int = 0
+    cobrancas_corrigidas: int = 0
+
+
+def ids_de_cobranca(intent: Any) -> List[int]:
+    bruto = (intent.get("metadata") or {}).get("cobranca_ids") or ""
+    return [int(parte) for parte in bruto.split(",") if parte.strip().isdigit()]
+
+
+def status_esperado(intents: List[Any]) -> Optional[str]:
+    # Um intent aprovado prevalece sobre tentativas anteriores recusadas da mesma cobrança.
+    if any(intent["status"] == "succeeded" for intent in intents):
+        return "PAGA"
+    if any(intent["status"] in INTENTS_COM_FALHA for intent in intents):
+        return "FALHA"
+    return None  # Ainda em processamento na Stripe
+
+
+def corrigir_status(cobranca: Cobranca, status: str, intents: List[Any]) -> bool:
+    if status == "PAGA" and cobranca.status != "PAGA":
+        criado = min(intent["created"] for intent in intents if intent["status"] == "succeeded")
+        cobranca.status = "PAGA"
+        cobranca.horaFinalizacao = datetime.fromtimestamp(criado, timezone.utc)
+        return True
+    # Cobranças PENDENTE seguem para novas tentativas da fila; só uma cobrança presa em OCUPADA vira FALHA.
+    if status == "FALHA" and cobranca.status == "OCUPADA":
+        cobranca.status = "FALHA"
+        cobranca.horaFinalizacao = datetime.now(timezone.utc)
+        return True
+    return False
+
+
+class ReconciliacaoService:
+    def __init__(self, cobranca_repo: CobrancaRepository, payment_gateway: StripeGateway, tamanho_pagina: int = 100):
+        self.cobranca_repo = cobranca_repo
+        self.payment_gateway = payment_gateway
+        self.tamanho_pagina = tamanho_pagina
+
+    def _reconciliar_pagina(self, intents: List[Any], resultado: ResultadoReconciliacao) -> None:
+        intents_por_cobranca: Dict[int, List[Any]] = {}
+        for intent in intents:
+            ids = ids_de_cobranca(intent)
+            if not ids:
+                resultado.intents_sem_cobranca += 1
+            for id_cobranca in ids:
+                intents_por_cobranca.setdefault(id_cobranca, []).append(intent)
+
+        corrigidas = []
+        for cobranca in self.cobranca_repo.obter_por_ids(list(intents_por_cobranca)):
+            relacionados = intents_por_cobranca[cobranca.id]
+            status = status_esperado(relacionados)
+            if status is not None and corrigir_status(cobranca, status, relacionados):
+                corrigidas.append(cobranca)
+
+        if corrigidas:
+            self.cobranca_repo.salvar_em_lote(corrigidas)
+        resultado.cobrancas_corrigidas += len(corrigidas)
+
+    def reconciliar(self, criado_desde: Optional[datetime] = None) -> ResultadoReconciliacao:
+        resultado = ResultadoReconciliacao()
+        desde = int(criado_desde.timestamp()) if criado_desde is not None else None
+        iniciar_apos = None
+        while True:
+            pagina = self.payment_gateway.listar_payment_intents(
+                criado_desde=desde, limite=self.tamanho_pagina, iniciar_apos=iniciar_apos
+            )
+            resultado.paginas += 1
+            resultado.intents += len(pagina.data)
+            self._reconciliar_pagina(pagina.data, resultado)
+            if not pagina.has_more or not pagina.data:
+                break
+            iniciar_apos = pagina.data[-1]["id"]
+
+        registrar_evento(
+            "reconciliacao.fim",
+            paginas=resultado.paginas,
+            intents=resultado.intents,
+            intents_sem_cobranca=resultado.intents_sem_cobranca,
+            cobrancas_corrigidas=resultado.cobrancas_corrigidas,
+        )
+        return resultado
@@ -0,0 +1,113 @@
+# app/services/submissao_service.py
+# Submissão à Stripe das cobranças aceitas em modo assíncrono. POST /cobranca grava a cobrança OCUPADA e
+# a submissão (submissoes_pagamento) no mesmo commit e acorda estes submissores; cada thread reserva uma
+# submissão por vez e chama CobrancaService.submeter_pagamento. Se o worker cair no meio, a reserva vence
+# e outra thread (de qualquer worker) submete de novo: o PaymentIntent leva uma chave de idempotência da
+# Stripe por cobrança, então a repetição não cobra duas vezes. Falhas voltam com espera exponencial.
+
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+
+from sqlalchemy.orm import Session
+
+from app.core.logs import registrar_evento
+from app.core.metrics import SUBMISSOES_PAGAMENTO
+from app.repositories.submissao_pagamento_repository import SubmissaoPagamentoRepository
+
+
+class SubmissorPagamentos:
+    def __init__(
+            self,
+            session_factory: Callable[[], Session],
+            submeter: Callable[[int], None],
+            concorrencia: int = 4,
+            tentativas_maximas: int = 10,
+            retentativa_base_s: float = 2.0,
+            prazo_s: float = 150.0,
+            intervalo_busca_s: float = 1.0,
+    ):
+        self.session_factory = session_factory
+        self.submeter = submeter
+        self.concorrencia = concorrencia
+        self.tentativas_maximas = tentativas_maximas
+        self.retentativa_base_s = retentativa_base_s
+        self.prazo_s = prazo_s
+        self.intervalo_busca_s = intervalo_busca_s
+        self._acordar = threading.Event()
+        self._encerrar = threading.Event()
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def iniciar(self) -> None:
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            if self._threads:
+                return
+            self._encerrar.clear()
+            for indice in range(self.concorrencia):
+                thread = threading.Thread(target=self._executar, name=f"submissor-pagamento-{indice}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def acordar(self) -> None:
+        """Avisa que há submissão nova (inicia os submissores na primeira vez)."""
+        self.iniciar()
+        self._acordar.set()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        """As submissões em andamento terminam; as demais ficam na tabela para o próximo início."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+            self._encerrar.set()
+            self._acordar.set()
+        for thread in threads:
+            thread.join(timeout)
+
+    def _executar(self) -> None:
+        while not self._encerrar.is_set():
+            try:
+                submeteu = self.submeter_proxima()
+            except Exception as e:
+                registrar_evento("submissao.falha_leitura", logging.ERROR, erro=str(e))
+                submeteu = False
+            if not submeteu:
+                self._acordar.wait(self.intervalo_busca_s)
+                self._acordar.clear()
+
+    def processar_pendentes(self) -> int:
+        """Submete, na thread atual, todas as submissões já vencidas. Retorna quantas foram tentadas."""
+        tentadas = 0
+        while self.submeter_proxima():
+            tentadas += 1
+        return tentadas
+
+    def submeter_proxima(self) -> bool:
+        db = self.session_factory()
+        try:
+            repo = SubmissaoPagamentoRepository(db)
+            agora = datetime.now(timezone.utc)
+            submissao = repo.reservar_proxima(agora, agora + timedelta(seconds=self.prazo_s), self.tentativas_maximas)
+            if submissao is None:
+                return False
+            try:
+                self.submeter(submissao.idCobranca)
+            except Exception as e:
+                espera = self.retentativa_base_s * 2 ** min(submissao.tentativas - 1, 10)
+                erro = getattr(e, "mensagem", None) or str(e)
+                if repo.adiar(submissao, erro, datetime.now(timezone.utc) + timedelta(seconds=espera), self.tentativas_maximas):
+                    SUBMISSOES_PAGAMENTO.inc(resultado="descartada")
+                    # A cobrança fica OCUPADA: um intent que tenha sido criado ainda chega pelo webhook
+                    registrar_evento("submissao.descartada", logging.ERROR, cobranca=submissao.idCobranca,
+                                     tentativas=submissao.tentativas, erro=erro)
+                else:
+                    SUBMISSOES_PAGAMENTO.inc(resultado="retentativa")
+                    registrar_evento("submissao.retentativa", logging.WARNING, cobranca=submissao.idCobranca,
+                                     tentativas=submissao.tentativas, espera_s=espera, erro=erro)
+                return True
+            repo.concluir(submissao)
+            SUBMISSOES_PAGAMENTO.inc(resultado="submetida")
+            return True
+        finally:
+            db.close()
@@ -0,0 +1,142 @@
+# app/services/webhook_service.py
+# Aplicação dos eventos de webhook da Stripe (payment_intent.succeeded / payment_failed).
+# As requisições entregam os eventos a uma thread que os agrupa em lotes: cada lote descarta
+# reentregas, corrige as cobranças e grava os ids dos eventos em um único commit. A requisição
+# só responde à Stripe depois que o lote do seu evento foi persistido.
+
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.logs import registrar_evento
+from app.models.evento_stripe import EventoStripe
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.repositories.evento_stripe_repository import EventoStripeRepository
+from app.services.reconciliacao_service import corrigir_status, ids_de_cobranca, status_esperado
+
+EVENTOS_DE_PAGAMENTO = {"payment_intent.succeeded", "payment_intent.payment_failed"}
+_FIM = object()  # sentinela de encerramento da thread
+
+
+def aplicar_lote(db: Session, eventos: List[Any]) -> List[bool]:
+    """Aplica os eventos em uma transação. Retorna, por evento, se ele era novo (False = reentrega)."""
+    ids = [evento["id"] for evento in eventos]
+    ja_processados = EventoStripeRepository(db).ids_ja_processados(ids)
+
+    novos: Dict[str, Any] = {}
+    for evento in eventos:
+        if evento["id"] not in ja_processados and evento["id"] not in novos:
+            novos[evento["id"]] = evento
+
+    intents_por_cobranca: Dict[int, List[Any]] = {}
+    for evento in novos.values():
+        intent = evento["data"]["object"]
+        for id_cobranca in ids_de_cobranca(intent):
+            intents_por_cobranca.setdefault(id_cobranca, []).append(intent)
+
+    cobranca_repo = CobrancaRepository(db)
+    corrigidas = []
+    for cobranca in cobranca_repo.obter_por_ids(list(intents_por_cobranca)):
+        relacionados = intents_por_cobranca[cobranca.id]
+        status = status_esperado(relacionados)
+        if status is not None and corrigir_status(cobranca, status, relacionados):
+            corrigidas.append(cobranca)
+
+    EventoStripeRepository(db).registrar(EventoStripe(id=evento["id"], tipo=evento["type"]) for evento in novos.values())
+    cobranca_repo.salvar_em_lote(corrigidas)  # commit único: cobranças, resumo e ids dos eventos
+
+    resultado, vistos = [], set()
+    for evento in eventos:
+        resultado.append(evento["id"] in novos and evento["id"] not in vistos)
+        vistos.add(evento["id"])
+    return resultado
+
+
+class AplicadorEventosStripe:
+    """Agrupa os eventos recebidos em lotes (group commit) aplicados por uma thread dedicada."""
+
+    def __init__(self, session_factory: Callable[[], Session], tamanho_lote: int = 100, espera_s: float = 0.01):
+        self.session_factory = session_factory
+        self.tamanho_lote = tamanho_lote
+        self.espera_s = espera_s
+        self._fila: "queue.Queue[Any]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._encerrar = False
+
+    def aplicar(self, evento: Any, timeout: Optional[float] = 30.0) -> bool:
+        """Bloqueia até o lote do evento ser persistido. Retorna False para reentregas."""
+        return self.enviar(evento).result(timeout)
+
+    def enviar(self, evento: Any) -> Future:
+        self._iniciar()
+        futuro: Future = Future()
+        self._fila.put((evento, futuro))
+        return futuro
+
+    def _iniciar(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._executar, name="webhook-stripe", daemon=True)
+                self._thread.start()
+
+    def parar(self, timeout: float = 5.0) -> None:
+        """Aplica o que já estiver na fila e encerra a thread."""
+        with self._lock:
+            thread = self._thread
+            if thread is None or not thread.is_alive():
+                return
+            self._fila.put(_FIM)
+        thread.join(timeout)
+
+    def _coletar_lote(self) -> List[Tuple[Any, Future]]:
+        lote = []
+        item = self._fila.get()
+        while item is not _FIM:
+            lote.append(item)
+            if len(lote) >= self.tamanho_lote:
+                break
+            try:
+                item = self._fila.get(timeout=self.espera_s)
+            except queue.Empty:
+                break
+        else:
+            self._encerrar = True
+        return lote
+
+    def _executar(self) -> None:
+        while not self._encerrar:
+            lote = self._coletar_lote()
+            if lote:
+                self._aplicar_e_responder(lote)
+        self._encerrar = False
+
+    def _aplicar_e_responder(self, lote: List[Tuple[Any, Future]]) -> None:
+        try:
+            resultados = self._aplicar_com_retentativa([evento for evento, _ in lote])
+        except Exception as e:
+            registrar_evento("webhook.falha_lote", logging.ERROR, eventos=len(lote), erro=str(e))
+            for _, futuro in lote:
+                futuro.set_exception(e)
+            return
+        for (_, futuro), novo in zip(lote, resultados):
+            futuro.set_result(novo)
+        registrar_evento("webhook.lote", eventos=len(lote), novos=sum(resultados))
+
+    def _aplicar_com_retentativa(self, eventos: List[Any]) -> List[bool]:
+        db = self.session_factory()
+        try:
+            try:
+                return aplicar_lote(db, eventos)
+            except IntegrityError:
+                # Outro processo gravou um dos eventos entre a consulta e o commit: refaz o lote,
+                # que agora enxerga esses ids como já processados.
+                db.rollback()
+                return aplicar_lote(db, eventos)
+        finally:
+            db.close()
@@ -0,0 +1,103 @@
+"""
+Ponto de entrada de produção: um worker uvicorn por CPU disponível.
+
+Uso:
+    python -m app.servidor                      # workers = CPUs disponíveis (afinidade/cgroup)
+    python -m app.servidor --workers 4 --preload
+
+Com --preload (ou SERVIDOR_PRELOAD=true) o gunicorn importa a aplicação uma vez no processo mestre
+e faz fork dos workers; sem ele, cada worker uvicorn importa a sua cópia. Nos dois casos as tabelas
+são criadas uma única vez, aqui, antes de subir os workers.
+"""
+
+import argparse
+import math
+import os
+import sys
+
+import uvicorn
+
+from app.core.config import settings
+
+APLICACAO = "app.main:app"
+
+
+def cpus_disponiveis() -> int:
+    """CPUs que o processo pode usar: afinidade do processo limitada pela cota do cgroup (containers)."""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # sem sched_getaffinity (macOS/Windows)
+        cpus = os.cpu_count() or 1
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as arquivo:
+            cota, periodo = arquivo.read().split()
+        if cota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(cota) / int(periodo))))
+    except (OSError, ValueError):
+        pass
+    return max(1, cpus)
+
+
+def preparar_workers(workers: int) -> None:
+    """Cria o esquema no processo mestre e repassa aos workers (pelo ambiente) quantos eles são."""
+    from app.db.esquema import criar_tabelas
+    from app.db.session import engine
+
+    criar_tabelas()
+    engine.dispose()  # não deixa conexões abertas para os workers herdarem
+    # Workers uvicorn são processos novos (lêem o ambiente); com preload, o mestre usa o próprio settings
+    os.environ["BANCO_CRIAR_TABELAS"] = "false"
+    os.environ["SERVIDOR_WORKERS_ATIVOS"] = str(workers)
+    settings.BANCO_CRIAR_TABELAS = False
+    settings.SERVIDOR_WORKERS_ATIVOS = workers
+
+
+def _executar_gunicorn(workers: int, host: str, porta: int) -> None:
+    from gunicorn.app.base import BaseApplication
+
+    class AplicacaoGunicorn(BaseApplication):
+        def load_config(self):
+            opcoes = {
+                "bind": f"{host}:{porta}",
+                "workers": workers,
+                "worker_class": "uvicorn.workers.UvicornWorker",
+                "preload_app": True,
+                "keepalive": settings.SERVIDOR_KEEPALIVE_S,
+                "graceful_timeout": 30,
+            }
+            for chave, valor in opcoes.items():
+                self.cfg.set(chave, valor)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    AplicacaoGunicorn().run()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Servidor HTTP da API.")
+    parser.add_argument("--host", default=settings.SERVIDOR_HOST)
+    parser.add_argument("--porta", type=int, default=settings.SERVIDOR_PORTA)
+    parser.add_argument("--workers", type=int, default=settings.SERVIDOR_WORKERS, help="0 = um por CPU disponível")
+    parser.add_argument("--preload", action="store_true", default=settings.SERVIDOR_PRELOAD)
+    args = parser.parse_args(argv)
+
+    workers = args.workers or cpus_disponiveis()
+    preparar_workers(workers)
+    if args.preload:
+        _executar_gunicorn(workers, args.host, args.porta)
+    else:
+        uvicorn.run(
+            APLICACAO,
+            host=args.host,
+            port=args.porta,
+            workers=workers,
+            timeout_keep_alive=settings.SERVIDOR_KEEPALIVE_S,
+            lifespan="on",
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Teste de carga ponta a ponta da API contra substitutos locais da Stripe, do SendGrid e do
+microsserviço de aluguel (ver tests/fakes/servicos_externos.py).
+
+Sobe os servidores falsos, aponta a aplicação para eles (e para um SQLite temporário), inicia o
+uvicorn em uma thread e dispara /cobranca, /filaCobranca e /processaCobrancasEmFila, reportando
+p50/p90/p99 e vazão de cada cenário.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.carga --requisicoes 500 --concorrencia 16 --latencia-stripe-ms 80
+    python -m benchmarks.carga --saida base.json
+    python -m benchmarks.carga --baseline base.json --tolerancia 0.2   # sai com código 1 se regredir
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from tests.fakes.servicos_externos import AluguelFalso, ConfiguracaoFalhas, SendGridFalso, StripeFalsa
+
+
+@dataclass
+class ResultadoCenario:
+    nome: str
+    requisicoes: int
+    erros: int
+    p50_ms: float
+    p90_ms: float
+    p99_ms: float
+    max_ms: float
+    vazao_rps: float
+    itens_por_segundo: float
+
+
+def percentil(valores: List[float], p: float) -> float:
+    """Percentil pelo método do posto mais próximo (valores em qualquer ordem)."""
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    posto = max(1, -(-len(ordenados) * p // 100))  # ceil sem importar math
+    return ordenados[int(posto) - 1]
+
+
+def executar_cenario(nome: str, chamada: Callable[[int], httpx.Response], requisicoes: int, concorrencia: int) -> ResultadoCenario:
+    latencias: List[float] = []
+    erros = 0
+    itens = 0
+    lock = threading.Lock()
+
+    def executar(indice: int) -> None:
+        nonlocal erros, itens
+        inicio = time.perf_counter()
+        try:
+            resposta = chamada(indice)
+            ok = resposta.status_code == 200
+            # /processaCobrancasEmFila devolve uma lista: conta as cobranças processadas
+            dados = resposta.json() if ok else None
+            quantidade = len(dados) if isinstance(dados, list) else 1
+        except httpx.HTTPError:
+            ok, quantidade = False, 0
+        duracao = (time.perf_counter() - inicio) * 1000
+        with lock:
+            latencias.append(duracao)
+            if ok:
+                itens += quantidade
+            else:
+                erros += 1
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concorrencia) as executor:
+        list(executor.map(executar, range(requisicoes)))
+    total = time.perf_counter() - inicio
+
+    return ResultadoCenario(
+        nome=nome,
+        requisicoes=requisicoes,
+        erros=erros,
+        p50_ms=round(percentil(latencias, 50), 2),
+        p90_ms=round(percentil(latencias, 90), 2),
+        p99_ms=round(percentil(latencias, 99), 2),
+        max_ms=round(max(latencias, default=0.0), 2),
+        vazao_rps=round(requisicoes / total, 2) if total else 0.0,
+        itens_por_segundo=round(itens / total, 2) if total else 0.0,
+    )
+
+
+def comparar_com_baseline(resultados: List[ResultadoCenario], baseline: Dict[str, Dict], tolerancia: float) -> List[str]:
+    regressoes = []
+    for resultado in resultados:
+        base = baseline.get(resultado.nome)
+        if not base:
+            continue
+        if resultado.p99_ms > base["p99_ms"] * (1 + tolerancia):
+            regressoes.append(f"{resultado.nome}: p99 {resultado.p99_ms}ms > baseline {base['p99_ms']}ms")
+        if resultado.vazao_rps < base["vazao_rps"] * (1 - tolerancia):
+            regressoes.append(f"{resultado.nome}: vazão {resultado.vazao_rps} req/s < baseline {base['vazao_rps']} req/s")
+    return regressoes
+
+
+def _iniciar_servidor(porta: int):
+    import uvicorn
+    from app.main import app  # importado só depois de configurar o ambiente
+
+    servidor = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=porta, log_level="warning"))
+    thread = threading.Thread(target=servidor.run, daemon=True)
+    thread.start()
+    while not servidor.started:
+        time.sleep(0.05)
+    return servidor, thread
+
+
+def _imprimir(resultados: List[ResultadoCenario]) -> None:
+    cabecalho = f"{'cenário':<32}{'req':>7}{'erros':>7}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'req/s':>10}{'itens/s':>10}"
+    print(cabecalho)
+    print("-" * len(cabecalho))
+    for r in resultados:
+        print(f"{r.nome:<32}{r.requisicoes:>7}{r.erros:>7}{r.p50_ms:>10}{r.p90_ms:>10}{r.p99_ms:>10}{r.max_ms:>10}{r.vazao_rps:>10}{r.itens_por_segundo:>10}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Teste de carga com substitutos locais dos serviços externos.")
+    parser.add_argument("--requisicoes", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=8)
+    parser.add_argument("--execucoes-fila", type=int, default=5)
+    parser.add_argument("--ciclistas", type=int, default=50)
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia-stripe-ms", type=float, default=50.0)
+    parser.add_argument("--latencia-aluguel-ms", type=float, default=20.0)
+    parser.add_argument("--latencia-sendgrid-ms", type=float, default=30.0)
+    parser.add_argument("--variacao-latencia-ms", type=float, default=5.0)
+    parser.add_argument("--taxa-erro-stripe", type=float, default=0.0)
+    parser.add_argument("--taxa-erro-aluguel", type=float, default=0.0)
+    parser.add_argument("--taxa-erro-sendgrid", type=float, default=0.0)
+    parser.add_argument("--saida", help="Salva os resultados em JSON.")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparação.")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Regressão tolerada (0.2 = 20%%).")
+    args = parser.parse_args(argv)
+
+    def config(latencia: float, taxa_erro: float) -> ConfiguracaoFalhas:
+        return ConfiguracaoFalhas(latencia_ms=latencia, variacao_latencia_ms=args.variacao_latencia_ms, taxa_erro=taxa_erro)
+
+    diretorio = tempfile.mkdtemp(prefix="carga-")
+    with StripeFalsa(config(args.latencia_stripe_ms, args.taxa_erro_stripe)) as stripe_falsa, \
+            SendGridFalso(config(args.latencia_sendgrid_ms, args.taxa_erro_sendgrid)) as sendgrid_falso, \
+            AluguelFalso(config(args.latencia_aluguel_ms, args.taxa_erro_aluguel)) as aluguel_falso:
+        os.environ.update({
+            "DATABASE_URL": f"sqlite:///{os.path.join(diretorio, 'carga.db')}",
+            "ALUGUEL_API_URL": aluguel_falso.url,
+            "STRIPE_API_BASE": stripe_falsa.url,
+            "STRIPE_API_KEY": "sk_test_carga",
+            # A Stripe falsa não tem teto por conta; o limitador AIMD continua ativo
+            "STRIPE_TAXA_MAXIMA_POR_S": "1000",
+            "SENDGRID_HOST": sendgrid_falso.url,
+            "SENDGRID_API_KEY": "SG.carga",
+            "EMAIL_REMETENTE": "carga@example.com",
+        })
+        servidor, thread = _iniciar_servidor(args.porta)
+
+        def nova_cobranca(indice: int) -> Dict:
+            return {"valor": 10.5, "ciclista": indice % args.ciclistas + 1}
+
+        limites = httpx.Limits(max_connections=args.concorrencia, max_keepalive_connections=args.concorrencia)
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.porta}", limits=limites, timeout=60) as cliente:
+            resultados = [
+                executar_cenario("POST /cobranca", lambda i: cliente.post("/cobranca", json=nova_cobranca(i)), args.requisicoes, args.concorrencia),
+                executar_cenario("POST /filaCobranca", lambda i: cliente.post("/filaCobranca", json=nova_cobranca(i)), args.requisicoes, args.concorrencia),
+                executar_cenario("POST /processaCobrancasEmFila", lambda i: cliente.post("/processaCobrancasEmFila"), args.execucoes_fila, 1),
+            ]
+
+        servidor.should_exit = True
+        thread.join()
+
+    _imprimir(resultados)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as arquivo:
+            json.dump({r.nome: asdict(r) for r in resultados}, arquivo, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as arquivo:
+            regressoes = comparar_com_baseline(resultados, json.load(arquivo), args.tolerancia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}", file=sys.stderr)
+        return 1 if regressoes else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,41 @@
+"""
+Executa os micro-benchmarks (pytest-benchmark) com baseline armazenada e limite de regressão.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.micro salvar                 # grava a baseline em benchmarks/.baselines
+    python -m benchmarks.micro comparar --limite 15   # falha se a média piorar mais de 15%
+
+As baselines só valem na máquina e no Python em que foram medidas, por isso não são versionadas
+(benchmarks/.baselines está no .gitignore). Localmente: rode `salvar` no branch de referência
+(ex.: develop), troque para o seu branch e rode `comparar`. No CI, o job benchmark-job faz o
+mesmo nos merge requests: mede o branch de destino e o do MR no mesmo runner.
+"""
+
+import argparse
+import sys
+
+import pytest
+
+ARMAZENAMENTO = "file://benchmarks/.baselines"
+NOME_BASELINE = "baseline"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks de validação e serialização.")
+    parser.add_argument("acao", choices=("salvar", "comparar", "executar"))
+    parser.add_argument("--limite", type=int, default=15, help="Regressão máxima tolerada na média, em %%.")
+    args, extras = parser.parse_known_args(argv)
+
+    opcoes = ["benchmarks/", "-q", f"--benchmark-storage={ARMAZENAMENTO}"]
+    if args.acao == "salvar":
+        opcoes.append(f"--benchmark-save={NOME_BASELINE}")
+    elif args.acao == "comparar":
+        opcoes += [
+            f"--benchmark-compare=*{NOME_BASELINE}",
+            f"--benchmark-compare-fail=mean:{args.limite}%",
+        ]
+    return pytest.main(opcoes + extras)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
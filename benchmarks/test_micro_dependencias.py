@@ -0,0 +1,72 @@
+"""
+Micro-benchmark da montagem das dependências de uma requisição de cobrança: tudo construído a cada
+requisição (como era get_cobranca_service) contra os clientes de escopo de aplicação do container.
+
+Execute com `python -m benchmarks.micro` (ver benchmarks/micro.py).
+"""
+
+import tracemalloc
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app.clients.aluguel_client import AluguelMicroserviceClient
+from app.core.container import container
+from app.core.dependencies import get_cobranca_service
+from app.integrations.stripe import StripeGateway
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.services.cobranca_service import CobrancaService
+from app.services.email_service import EmailService
+
+REPETICOES_ALOCACAO = 200
+
+
+def _montar_por_requisicao() -> CobrancaService:
+    with container.escopo() as escopo:
+        return CobrancaService(
+            cobranca_repo=CobrancaRepository(escopo.resolver(Session)),
+            payment_gateway=StripeGateway(),
+            email_service=EmailService(),
+            aluguel_client=AluguelMicroserviceClient(),
+        )
+
+
+def _montar_com_container() -> CobrancaService:
+    with container.escopo() as escopo:
+        return get_cobranca_service(
+            repo=CobrancaRepository(escopo.resolver(Session)),
+            gateway=escopo.resolver(StripeGateway),
+            email_svc=escopo.resolver(EmailService),
+            aluguel_client=escopo.resolver(AluguelMicroserviceClient),
+        )
+
+
+def _bytes_alocados_por_requisicao(montar) -> float:
+    montar()  # aquece as instâncias de aplicação
+    tracemalloc.start()
+    try:
+        antes = tracemalloc.take_snapshot()
+        servicos = [montar() for _ in range(REPETICOES_ALOCACAO)]  # mantidos vivos: mede o que cada uma retém
+        depois = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    total = sum(estatistica.size_diff for estatistica in depois.compare_to(antes, "filename"))
+    del servicos
+    return total / REPETICOES_ALOCACAO
+
+
+@pytest.mark.benchmark(group="dependencias")
+def test_montar_servico_por_requisicao(benchmark):
+    assert isinstance(benchmark(_montar_por_requisicao), CobrancaService)
+
+
+@pytest.mark.benchmark(group="dependencias")
+def test_montar_servico_com_container(benchmark):
+    assert isinstance(benchmark(_montar_com_container), CobrancaService)
+
+
+def test_container_aloca_menos_por_requisicao():
+    por_requisicao = _bytes_alocados_por_requisicao(_montar_por_requisicao)
+    com_container = _bytes_alocados_por_requisicao(_montar_com_container)
+    print(f"\nBytes retidos por requisição: {por_requisicao:.0f} (por requisição) x {com_container:.0f} (container)")
+    assert com_container < por_requisicao
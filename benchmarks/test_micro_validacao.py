@@ -0,0 +1,89 @@
+"""
+Micro-benchmarks dos caminhos quentes de validação (schemas de entrada) e de serialização
+(CobrancaSchema a partir de objetos ORM, como o FastAPI faz com response_model).
+
+Execute com `python -m benchmarks.micro` (ver benchmarks/micro.py).
+"""
+
+import json
+from datetime import datetime, timezone
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from app.core.serializacao import serializar_cobranca, serializar_cobrancas
+from app.models.cobranca import Cobranca
+from app.schemas.cartao_schema import NovoCartaoDeCreditoSchema
+from app.schemas.cobranca_schema import CobrancaSchema
+from app.schemas.email_schema import EmailRequest
+from app.schemas.nova_cobranca_schema import NovaCobrancaSchema
+
+TAMANHO_FILA = 5_000
+
+CARTAO = {"nomeTitular": "JOAO DA SILVA", "numero": "4242 4242 4242 4242", "validade": "12/2030", "cvv": "123"}
+EMAIL = {"destinatario": "ciclista@example.com", "assunto": "Cobrança", "mensagem": "Seu pagamento foi confirmado."}
+NOVA_COBRANCA = {"valor": 10.5, "ciclista": 1}
+
+
+def _cobranca_orm(indice: int) -> Cobranca:
+    agora = datetime(2025, 6, 1, 12, 0, tzinfo=timezone.utc)
+    return Cobranca(id=indice, ciclista=indice % 100, valor=10.5, status="PAGA", horaSolicitacao=agora, horaFinalizacao=agora)
+
+
+def _serializar_como_fastapi(adaptador: TypeAdapter, conteudo) -> bytes:
+    # Mesmo caminho do response_model: valida a partir dos atributos, dump em modo JSON e json.dumps
+    validado = adaptador.validate_python(conteudo, from_attributes=True)
+    dados = adaptador.dump_python(validado, mode="json")
+    return json.dumps(dados, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+@pytest.mark.benchmark(group="validacao")
+def test_validar_novo_cartao(benchmark):
+    resultado = benchmark(NovoCartaoDeCreditoSchema.model_validate, CARTAO)
+    assert resultado.numero == "4242424242424242"
+
+
+@pytest.mark.benchmark(group="validacao")
+def test_validar_luhn(benchmark):
+    assert benchmark(NovoCartaoDeCreditoSchema.validar_luhn, "4242424242424242")
+
+
+@pytest.mark.benchmark(group="validacao")
+def test_validar_email_request(benchmark):
+    resultado = benchmark(EmailRequest.model_validate, EMAIL)
+    assert resultado.destinatario == EMAIL["destinatario"]
+
+
+@pytest.mark.benchmark(group="validacao")
+def test_validar_nova_cobranca(benchmark):
+    resultado = benchmark(NovaCobrancaSchema.model_validate, NOVA_COBRANCA)
+    assert resultado.ciclista == 1
+
+
+@pytest.mark.benchmark(group="serializacao")
+def test_serializar_cobranca_orm(benchmark):
+    adaptador = TypeAdapter(CobrancaSchema)
+    corpo = benchmark(_serializar_como_fastapi, adaptador, _cobranca_orm(1))
+    assert corpo.startswith(b'{"valor":10.5')
+
+
+@pytest.mark.benchmark(group="serializacao")
+def test_serializar_lista_grande_da_fila(benchmark):
+    adaptador = TypeAdapter(List[CobrancaSchema])
+    cobrancas = [_cobranca_orm(i) for i in range(TAMANHO_FILA)]
+    corpo = benchmark.pedantic(_serializar_como_fastapi, args=(adaptador, cobrancas), rounds=10, iterations=1)
+    assert len(json.loads(corpo)) == TAMANHO_FILA
+
+
+@pytest.mark.benchmark(group="serializacao")
+def test_serializar_cobranca_orm_caminho_rapido(benchmark):
+    corpo = benchmark(serializar_cobranca, _cobranca_orm(1))
+    assert corpo.startswith(b'{"valor":10.5')
+
+
+@pytest.mark.benchmark(group="serializacao")
+def test_serializar_lista_grande_da_fila_caminho_rapido(benchmark):
+    cobrancas = [_cobranca_orm(i) for i in range(TAMANHO_FILA)]
+    corpo = benchmark.pedantic(serializar_cobrancas, args=(cobrancas,), rounds=10, iterations=1)
+    assert len(json.loads(corpo)) == TAMANHO_FILA
@@ -9,8 +9,9 @@ cd /home/ec2-user/externoapi || exit 1
 python3 -m pip install --upgrade pip
 python3 -m pip install -r requirements.txt
 
-# Mata qualquer processo uvicorn rodando (opcional, para evitar conflitos)
+# Mata qualquer servidor rodando (opcional, para evitar conflitos)
+pkill -f "app.servidor" || true
 pkill -f "uvicorn app.main:app" || true
 
-# Inicia o uvicorn em background, salvando log
-nohup uvicorn app.main:app --host 0.0.0.0 --port 8000 > log.txt 2>&1 &
\ No newline at end of file
+# Inicia o servidor (um worker por CPU, aplicação carregada antes do fork) em background, salvando log
+nohup python3 -m app.servidor --preload > log.txt 2>&1 &
\ No newline at end of file
@@ -0,0 +1,41 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.cache import cache_cobrancas
+from app.db.base_class import Base
+import app.models.cobranca  # noqa: F401  (registra os modelos no metadata)
+import app.models.resumo_cobranca  # noqa: F401
+import app.models.cobranca_arquivada  # noqa: F401
+import app.models.evento_stripe  # noqa: F401
+import app.models.chave_idempotencia  # noqa: F401
+import app.models.email_fila  # noqa: F401
+import app.models.notificacao_aluguel  # noqa: F401
+import app.models.fila_estado  # noqa: F401
+import app.models.evento_cobranca  # noqa: F401
+import app.models.submissao_pagamento  # noqa: F401
+
+
+@pytest.fixture
+def session_factory():
+    """Fábrica de sessões sobre um SQLite em memória, isolado por teste."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db_session(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def limpar_cache_cobrancas():
+    """O cache de respostas é global ao processo: cada teste começa com ele vazio."""
+    cache_cobrancas.limpar()
+    yield
+    cache_cobrancas.limpar()
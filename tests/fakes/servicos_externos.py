@@ -0,0 +1,232 @@
+# tests/fakes/servicos_externos.py
+# Servidores HTTP locais que imitam a Stripe, o SendGrid e o microsserviço de aluguel,
+# com latência e injeção de erros configuráveis. Usados nos testes de integração e benchmarks.
+
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+Resposta = Tuple[int, Optional[Dict[str, Any]]]
+
+
+@dataclass
+class ConfiguracaoFalhas:
+    latencia_ms: float = 0.0
+    variacao_latencia_ms: float = 0.0
+    taxa_erro: float = 0.0
+    status_erro: int = 500
+    semente: int = 42
+
+
+class ServidorFalso:
+    """Base: um ThreadingHTTPServer em uma thread daemon, roteando por (método, prefixo)."""
+
+    def __init__(self, configuracao: Optional[ConfiguracaoFalhas] = None, porta: int = 0):
+        self.configuracao = configuracao or ConfiguracaoFalhas()
+        self._aleatorio = random.Random(self.configuracao.semente)
+        self._lock = threading.Lock()
+        self.requisicoes = 0
+        self._rotas: List[Tuple[str, str, Callable[[str, Dict[str, Any]], Resposta]]] = []
+        self._servidor = ThreadingHTTPServer(("127.0.0.1", porta), self._criar_handler())
+        self._servidor.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, porta = self._servidor.server_address[:2]
+        return f"http://{host}:{porta}"
+
+    def rota(self, metodo: str, prefixo: str, funcao: Callable[[str, Dict[str, Any]], Resposta]) -> None:
+        self._rotas.append((metodo, prefixo, funcao))
+
+    def iniciar(self) -> "ServidorFalso":
+        self._thread = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def parar(self) -> None:
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.parar()
+
+    def _sortear_falha(self) -> Tuple[float, bool]:
+        config = self.configuracao
+        with self._lock:
+            self.requisicoes += 1
+            atraso = config.latencia_ms + self._aleatorio.uniform(-1, 1) * config.variacao_latencia_ms
+            falhar = self._aleatorio.random() < config.taxa_erro
+        return max(atraso, 0.0) / 1000, falhar
+
+    def _resposta_de_erro(self) -> Dict[str, Any]:
+        return {"erro": "falha injetada"}
+
+    def _despachar(self, metodo: str, caminho: str, corpo: Dict[str, Any]) -> Resposta:
+        atraso, falhar = self._sortear_falha()
+        if atraso:
+            time.sleep(atraso)
+        if falhar:
+            return self.configuracao.status_erro, self._resposta_de_erro()
+        # Normaliza barras duplicadas (o cliente de aluguel monta f"{BASE_URL}/...").
+        caminho = "/" + "/".join(parte for parte in caminho.split("/") if parte)
+        for metodo_rota, prefixo, funcao in self._rotas:
+            if metodo_rota == metodo and caminho.startswith(prefixo):
+                return funcao(caminho[len(prefixo):], corpo)
+        return 404, {"erro": "rota não encontrada"}
+
+    def _criar_handler(self):
+        servidor = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _processar(self, metodo: str):
+                url = urlparse(self.path)
+                tamanho = int(self.headers.get("Content-Length") or 0)
+                bruto = self.rfile.read(tamanho).decode() if tamanho else ""
+                corpo: Dict[str, Any] = dict(parse_qsl(url.query))
+                if bruto:
+                    if "json" in (self.headers.get("Content-Type") or ""):
+                        corpo.update(json.loads(bruto))
+                    else:
+                        corpo.update(parse_qsl(bruto))
+                status, dados = servidor._despachar(metodo, url.path, corpo)
+                conteudo = json.dumps(dados).encode() if dados is not None else b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(conteudo)))
+                self.end_headers()
+                self.wfile.write(conteudo)
+
+            def do_GET(self):
+                self._processar("GET")
+
+            def do_POST(self):
+                self._processar("POST")
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class StripeFalsa(ServidorFalso):
+    """
+    Imita /v1/payment_intents (criação e listagem paginada) e /v1/setup_intents.
+    Cartões 'pm_card_visa_chargeDeclined' são recusados.
+    """
+
+    def __init__(self, configuracao: Optional[ConfiguracaoFalhas] = None, porta: int = 0):
+        super().__init__(configuracao, porta)
+        self.payment_intents: List[Dict[str, Any]] = []
+        self.rota("POST", "/v1/payment_intents", self._criar_payment_intent)
+        self.rota("GET", "/v1/payment_intents", self._listar_payment_intents)
+        self.rota("POST", "/v1/setup_intents", self._criar_setup_intent)
+
+    def _resposta_de_erro(self) -> Dict[str, Any]:
+        tipo = "rate_limit_error" if self.configuracao.status_erro == 429 else "api_error"
+        return {"error": {"type": tipo, "message": "Falha injetada pela Stripe falsa."}}
+
+    @staticmethod
+    def _recusado() -> Resposta:
+        return 402, {"error": {"type": "card_error", "code": "card_declined", "message": "Your card was declined."}}
+
+    @staticmethod
+    def _metadata(corpo: Dict[str, Any]) -> Dict[str, str]:
+        return {chave[len("metadata["):-1]: valor for chave, valor in corpo.items() if chave.startswith("metadata[")}
+
+    def adicionar_payment_intent(self, status: str = "succeeded", amount: int = 1000, metadata: Optional[Dict[str, str]] = None, created: Optional[int] = None) -> Dict[str, Any]:
+        """Registra um PaymentIntent diretamente (ex.: cobrado na Stripe sem que a API tenha gravado o resultado)."""
+        intent = {
+            "id": f"pi_{uuid.uuid4().hex[:24]}",
+            "object": "payment_intent",
+            "amount": amount,
+            "currency": "brl",
+            "created": int(time.time()) if created is None else created,
+            "status": status,
+            "metadata": metadata or {},
+        }
+        with self._lock:
+            self.payment_intents.append(intent)
+        return intent
+
+    def _criar_payment_intent(self, _resto: str, corpo: Dict[str, Any]) -> Resposta:
+        if corpo.get("payment_method") == "pm_card_visa_chargeDeclined":
+            return self._recusado()
+        return 200, self.adicionar_payment_intent(amount=int(corpo.get("amount", 0)), metadata=self._metadata(corpo))
+
+    def _listar_payment_intents(self, _resto: str, corpo: Dict[str, Any]) -> Resposta:
+        # Como na Stripe: mais recentes primeiro, paginando com starting_after.
+        with self._lock:
+            intents = list(reversed(self.payment_intents))
+        if "created[gte]" in corpo:
+            intents = [intent for intent in intents if intent["created"] >= int(corpo["created[gte]"])]
+        if corpo.get("starting_after"):
+            ids = [intent["id"] for intent in intents]
+            intents = intents[ids.index(corpo["starting_after"]) + 1:]
+        limite = int(corpo.get("limit", 10))
+        return 200, {
+            "object": "list",
+            "url": "/v1/payment_intents",
+            "data": intents[:limite],
+            "has_more": len(intents) > limite,
+        }
+
+    def _criar_setup_intent(self, _resto: str, corpo: Dict[str, Any]) -> Resposta:
+        if corpo.get("payment_method") == "pm_card_visa_chargeDeclined":
+            return self._recusado()
+        return 200, {"id": f"seti_{uuid.uuid4().hex[:24]}", "object": "setup_intent", "status": "succeeded"}
+
+
+class SendGridFalso(ServidorFalso):
+    """Imita POST /v3/mail/send."""
+
+    def __init__(self, configuracao: Optional[ConfiguracaoFalhas] = None, porta: int = 0):
+        super().__init__(configuracao, porta)
+        self.emails: List[Dict[str, Any]] = []
+        self.rota("POST", "/v3/mail/send", self._enviar)
+
+    def _enviar(self, _resto: str, corpo: Dict[str, Any]) -> Resposta:
+        with self._lock:
+            self.emails.append(corpo)
+        return 202, None
+
+
+class AluguelFalso(ServidorFalso):
+    """
+    Imita GET /ciclista/{id} e GET /cartaoDeCredito/{id}. Ids em 'ciclistas_sem_cartao' respondem 404.
+    Guarda os lotes recebidos em POST /cobrancas/finalizadas (callback de cobranças finalizadas).
+    """
+
+    def __init__(self, configuracao: Optional[ConfiguracaoFalhas] = None, porta: int = 0, ciclistas_sem_cartao: Tuple[int, ...] = ()):
+        super().__init__(configuracao, porta)
+        self.ciclistas_sem_cartao = set(ciclistas_sem_cartao)
+        self.callbacks: List[Dict[str, Any]] = []
+        self.rota("GET", "/ciclista/", self._ciclista)
+        self.rota("GET", "/cartaoDeCredito/", self._cartao)
+        self.rota("POST", "/cobrancas/finalizadas", self._callback)
+
+    def _callback(self, _resto: str, corpo: Dict[str, Any]) -> Resposta:
+        with self._lock:
+            self.callbacks.append(corpo)
+        return 204, None
+
+    def _ciclista(self, resto: str, _corpo: Dict[str, Any]) -> Resposta:
+        ciclista_id = int(resto)
+        return 200, {"id": ciclista_id, "nome": f"Ciclista {ciclista_id}", "email": f"ciclista{ciclista_id}@example.com"}
+
+    def _cartao(self, resto: str, _corpo: Dict[str, Any]) -> Resposta:
+        ciclista_id = int(resto)
+        if ciclista_id in self.ciclistas_sem_cartao:
+            return 404, {"erro": "cartão não encontrado"}
+        return 200, {"id": ciclista_id, "nomeTitular": f"Ciclista {ciclista_id}", "numero": "4242424242424242", "validade": "2030-12", "cvv": "123"}
@@ -0,0 +1,12 @@
+import pytest
+import stripe
+from unittest.mock import patch
+
+from tests.fakes.servicos_externos import StripeFalsa
+
+
+@pytest.fixture
+def stripe_falsa():
+    with StripeFalsa() as servidor:
+        with patch.object(stripe, 'api_base', servidor.url), patch.object(stripe, 'api_key', 'sk_test_falsa'):
+            yield servidor
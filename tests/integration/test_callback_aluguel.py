@@ -0,0 +1,44 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from app.core.config import settings
+from app.models.cobranca import Cobranca
+from app.models.notificacao_aluguel import NotificacaoAluguel
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.services.callback_service import DespachanteCallbacks
+from tests.fakes.servicos_externos import AluguelFalso
+
+
+def test_cobrancas_finalizadas_sao_notificadas_em_lotes_ate_o_aluguel_confirmar(session_factory, db_session):
+    with AluguelFalso() as aluguel, \
+            patch.object(settings, "ALUGUEL_CALLBACK_URL", f"{aluguel.url}/cobrancas/finalizadas"):
+        repo = CobrancaRepository(db_session)
+        agora = datetime.now(timezone.utc)
+        ids = [
+            repo.salvar(Cobranca(ciclista=ciclista, valor=5.0, status="PENDENTE", horaSolicitacao=agora)).id
+            for ciclista in (1, 2, 3, 4)
+        ]
+        cobrancas = sorted(repo.obter_por_ids(ids), key=lambda cobranca: cobranca.id)
+        for cobranca, status in zip(cobrancas, ("PAGA", "FALHA", "PAGA", "OCUPADA")):
+            cobranca.status = status
+            cobranca.horaFinalizacao = agora
+        repo.salvar_em_lote(cobrancas)
+        assert db_session.query(NotificacaoAluguel).count() == 3  # OCUPADA não é finalizada
+
+        despachante = DespachanteCallbacks(session_factory, settings.ALUGUEL_CALLBACK_URL, tamanho_lote=2, retentativa_base_s=60)
+
+        aluguel.configuracao.taxa_erro = 1.0
+        assert despachante.despachar_pendentes() == 0
+        pendentes = db_session.query(NotificacaoAluguel).populate_existing().all()
+        assert [n.tentativas for n in pendentes] == [1, 1, 0]
+
+        aluguel.configuracao.taxa_erro = 0.0
+        assert despachante.despachar_pendentes() == 1  # o lote que falhou espera; a terceira segue sozinha
+        db_session.query(NotificacaoAluguel).update({"proximaTentativaEm": agora - timedelta(seconds=1)})
+        db_session.commit()
+        assert despachante.despachar_pendentes() == 2
+
+    assert db_session.query(NotificacaoAluguel).count() == 0
+    assert [len(lote["cobrancas"]) for lote in aluguel.callbacks] == [1, 2]
+    enviadas = {c["id"]: c["status"] for lote in aluguel.callbacks for c in lote["cobrancas"]}
+    assert enviadas == {ids[0]: "PAGA", ids[1]: "FALHA", ids[2]: "PAGA"}
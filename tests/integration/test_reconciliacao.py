@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+from app.integrations.stripe import StripeGateway
+from app.models.cobranca import Cobranca
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.services.reconciliacao_service import ReconciliacaoService
+
+
+def _cobranca(db, status, ciclista=1):
+    cobranca = Cobranca(ciclista=ciclista, valor=10.0, status=status, horaSolicitacao=datetime.now(timezone.utc))
+    db.add(cobranca)
+    db.commit()
+    return cobranca
+
+
+def test_gateway_grava_ids_das_cobrancas_no_metadata(stripe_falsa):
+    StripeGateway.processar_pagamento(1050, "pm_card_visa", ids_cobranca=[3, 4])
+
+    assert stripe_falsa.payment_intents[0]["metadata"] == {"cobranca_ids": "3,4"}
+
+
+def test_reconciliacao_corrige_status_em_lote_paginando(stripe_falsa, db_session):
+    ocupada_paga = _cobranca(db_session, "OCUPADA")
+    falha_paga = _cobranca(db_session, "FALHA")
+    ocupada_recusada = _cobranca(db_session, "OCUPADA")
+    pendente_recusada = _cobranca(db_session, "PENDENTE")
+    ja_paga = _cobranca(db_session, "PAGA")
+
+    stripe_falsa.adicionar_payment_intent("succeeded", metadata={"cobranca_ids": str(ocupada_paga.id)})
+    stripe_falsa.adicionar_payment_intent("requires_payment_method", metadata={"cobranca_ids": str(falha_paga.id)})
+    stripe_falsa.adicionar_payment_intent("succeeded", metadata={"cobranca_ids": str(falha_paga.id)})
+    stripe_falsa.adicionar_payment_intent("canceled", metadata={"cobranca_ids": f"{ocupada_recusada.id},{pendente_recusada.id}"})
+    stripe_falsa.adicionar_payment_intent("succeeded", metadata={"cobranca_ids": str(ja_paga.id)})
+    stripe_falsa.adicionar_payment_intent("succeeded")  # sem cobrança associada
+    stripe_falsa.adicionar_payment_intent("succeeded", created=int((datetime.now(timezone.utc) - timedelta(days=10)).timestamp()))
+
+    service = ReconciliacaoService(CobrancaRepository(db_session), StripeGateway(), tamanho_pagina=2)
+    resultado = service.reconciliar(datetime.now(timezone.utc) - timedelta(days=1))
+
+    assert resultado.paginas == 3
+    assert resultado.intents == 6
+    assert resultado.intents_sem_cobranca == 1
+    assert resultado.cobrancas_corrigidas == 3
+
+    db_session.expire_all()
+    assert ocupada_paga.status == "PAGA" and ocupada_paga.horaFinalizacao is not None
+    assert falha_paga.status == "PAGA"
+    assert ocupada_recusada.status == "FALHA"
+    assert pendente_recusada.status == "PENDENTE"  # continua na fila para nova tentativa
+    assert ja_paga.status == "PAGA"
+    assert CobrancaRepository(db_session).contar_por_status("PAGA") == 3
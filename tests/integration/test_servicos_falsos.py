@@ -0,0 +1,38 @@
+import pytest
+import requests
+from unittest.mock import patch
+
+from app.clients.aluguel_client import AluguelMicroserviceClient
+from app.integrations.stripe import StripeGateway
+from tests.fakes.servicos_externos import AluguelFalso, ConfiguracaoFalhas
+
+
+@pytest.fixture
+def aluguel_falso():
+    with AluguelFalso(ciclistas_sem_cartao=(2,)) as servidor:
+        with patch('app.clients.aluguel_client.BASE_URL', servidor.url):
+            yield servidor
+
+
+def test_cliente_aluguel_contra_servidor_falso(aluguel_falso):
+    cliente = AluguelMicroserviceClient()
+
+    assert cliente.get_ciclista(1)["email"] == "ciclista1@example.com"
+    assert cliente.get_cartao_de_credito(1)["numero"] == "4242424242424242"
+    assert cliente.get_cartao_de_credito(2) is None
+
+
+def test_servidor_falso_injeta_erros():
+    configuracao = ConfiguracaoFalhas(taxa_erro=1.0, status_erro=503)
+    with AluguelFalso(configuracao) as servidor:
+        with patch('app.clients.aluguel_client.BASE_URL', servidor.url):
+            with pytest.raises(requests.exceptions.HTTPError):
+                AluguelMicroserviceClient().get_ciclista(1)
+        assert servidor.requisicoes == 1
+
+
+def test_gateway_stripe_contra_servidor_falso(stripe_falsa):
+    intent = StripeGateway.processar_pagamento(1050, "pm_card_visa")
+
+    assert intent.status == "succeeded"
+    assert stripe_falsa.payment_intents[0]["amount"] == 1050
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import anyio.to_thread
+
+from fastapi.testclient import TestClient
+
+from app.core.admissao import ClasseAdmissao, ControleAdmissao, classificar_rota, dimensionar_threadpool
+from app.core.config import settings
+from app.core.metrics import ADMISSAO_REJEITADAS
+from app.main import app
+
+
+def test_classificar_rota():
+    assert classificar_rota("POST", "/cobranca") == "pagamento"
+    assert classificar_rota("POST", "/processaCobrancasEmFila") == "fila"
+    assert classificar_rota("GET", "/cobranca/7") == "leitura"
+    assert classificar_rota("GET", "/cobranca/eventos") is None
+    assert classificar_rota("GET", "/cobrancas/exportacao") == "leitura"
+    assert classificar_rota("POST", "/enviarEmail") == "email"
+    assert classificar_rota("GET", "/metrics") is None
+
+
+def test_excedentes_esperam_na_fila_e_recebem_a_vaga_liberada():
+    async def cenario():
+        classe = ClasseAdmissao("teste", limite=1, fila_maxima=1, espera_maxima_s=5)
+        assert await classe.entrar()
+
+        segunda = asyncio.ensure_future(classe.entrar())
+        await asyncio.sleep(0)
+        assert await classe.entrar() is False  # fila cheia: recusa imediata
+
+        classe.sair()
+        assert await segunda
+        assert classe.em_andamento == 1
+        classe.sair()
+        assert classe.em_andamento == 0
+
+    asyncio.run(cenario())
+
+
+def test_espera_acima_do_prazo_e_recusada():
+    async def cenario():
+        classe = ClasseAdmissao("teste", limite=1, fila_maxima=5, espera_maxima_s=0.01)
+        assert await classe.entrar()
+        assert await classe.entrar() is False
+        assert classe.em_andamento == 1 and not classe._fila
+
+    asyncio.run(cenario())
+
+
+def test_middleware_responde_503_com_retry_after():
+    sem_vagas = ControleAdmissao({"leitura": 0}, fila_maxima=0, espera_maxima_s=0)
+    rejeitadas_antes = ADMISSAO_REJEITADAS.valor(classe="leitura", motivo="fila_cheia")
+
+    with patch("app.main.controle_admissao", sem_vagas):
+        client = TestClient(app)
+        recusada = client.get("/cobranca/1")
+        livre = client.get("/metrics")
+
+    assert recusada.status_code == 503
+    assert recusada.headers["Retry-After"] == "1"
+    assert recusada.json()["codigo"] == "SERVICO_SOBRECARREGADO"
+    assert livre.status_code == 200
+    assert ADMISSAO_REJEITADAS.valor(classe="leitura", motivo="fila_cheia") == rejeitadas_antes + 1
+
+
+def test_classe_saturada_nao_toma_as_threads_das_outras():
+    limites = {"pagamento": 3, "leitura": 1}
+    controle = ControleAdmissao(limites, fila_maxima=8, espera_maxima_s=1.0)
+    liberar = threading.Event()
+
+    async def chamar(nome, funcao):
+        classe = controle.classes[nome]
+        assert await classe.entrar()
+        try:
+            return await anyio.to_thread.run_sync(funcao)
+        finally:
+            classe.sair()
+
+    async def cenario():
+        anyio.to_thread.current_default_thread_limiter().total_tokens = 3  # pool menor que a soma dos limites
+        assert dimensionar_threadpool(limites, extras=0) == 4
+        bloqueadas = [asyncio.ensure_future(chamar("pagamento", liberar.wait)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        try:
+            return await asyncio.wait_for(chamar("leitura", lambda: "ok"), 1.0)
+        finally:
+            liberar.set()
+            await asyncio.gather(*bloqueadas)
+
+    assert asyncio.run(cenario()) == "ok"
+
+
+def test_ciclo_de_vida_dimensiona_threadpool_para_os_limites():
+    async def threads_disponiveis():
+        return anyio.to_thread.current_default_thread_limiter().total_tokens
+
+    with TestClient(app) as client:
+        total = client.portal.call(threads_disponiveis)
+
+    assert total >= sum(settings.ADMISSAO_LIMITES.values()) + settings.ADMISSAO_THREADS_EXTRAS
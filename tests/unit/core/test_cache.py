@@ -0,0 +1,68 @@
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.core.cache import CacheRespostas, cache_cobrancas, etag_confere
+from app.core.dependencies import get_cobranca_service
+from app.main import app
+from app.models.cobranca import Cobranca
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.services.cobranca_service import CobrancaService
+
+
+def test_cache_descarta_o_menos_usado_ao_exceder_o_limite():
+    cache = CacheRespostas(maximo=2)
+    cache.guardar(1, b"1")
+    cache.guardar(2, b"2")
+    cache.obter(1)
+    cache.guardar(3, b"3")
+
+    assert cache.obter(2) is None
+    assert cache.obter(1)[0] == b"1"
+    assert cache.obter(3)[0] == b"3"
+
+
+def test_cache_expira_pelo_ttl():
+    cache = CacheRespostas(ttl_s=10)
+    with patch("app.core.cache.time.monotonic", return_value=100.0):
+        cache.guardar(1, b"1")
+    with patch("app.core.cache.time.monotonic", return_value=111.0):
+        assert cache.obter(1) is None
+
+
+def test_etag_confere_aceita_lista_fraca_e_curinga():
+    assert etag_confere('"a", W/"b"', '"b"')
+    assert etag_confere("*", '"c"')
+    assert not etag_confere('"a"', '"b"')
+    assert not etag_confere(None, '"b"')
+
+
+def test_rota_responde_304_sem_consultar_o_servico():
+    mock_service = MagicMock(spec=CobrancaService)
+    mock_service.obter_por_id.return_value = Cobranca(id=7, ciclista=3, valor=10.0, status="OCUPADA")
+    app.dependency_overrides[get_cobranca_service] = lambda: mock_service
+    try:
+        client = TestClient(app)
+        primeira = client.get("/cobranca/7")
+        segunda = client.get("/cobranca/7", headers={"If-None-Match": primeira.headers["ETag"]})
+        terceira = client.get("/cobranca/7", headers={"If-None-Match": '"outro"'})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert primeira.status_code == 200
+    assert segunda.status_code == 304 and segunda.content == b""
+    assert segunda.headers["ETag"] == primeira.headers["ETag"]
+    assert terceira.status_code == 200 and terceira.content == primeira.content
+    mock_service.obter_por_id.assert_called_once_with(7)
+
+
+def test_salvar_invalida_a_entrada_da_cobranca(db_session):
+    repo = CobrancaRepository(db_session)
+    cobranca = repo.salvar(Cobranca(ciclista=1, valor=10.0, status="OCUPADA", horaSolicitacao=datetime.now(timezone.utc)))
+    cache_cobrancas.guardar(cobranca.id, b"antigo")
+
+    cobranca.status = "PAGA"
+    repo.salvar(cobranca)
+
+    assert cache_cobrancas.obter(cobranca.id) is None
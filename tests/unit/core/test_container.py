@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.container import APLICACAO, REQUISICAO, Container
+
+
+class Cliente:
+    pass
+
+
+class Sessao:
+    def __init__(self):
+        self.fechada = False
+
+
+class Servico:
+    def __init__(self, cliente, sessao):
+        self.cliente = cliente
+        self.sessao = sessao
+
+
+def _container() -> Container:
+    container = Container()
+    container.registrar(Cliente, lambda c: Cliente(), escopo=APLICACAO)
+    container.registrar(Sessao, lambda c: Sessao(), escopo=REQUISICAO, finalizar=lambda s: setattr(s, "fechada", True))
+    container.registrar(Servico, lambda c: Servico(c.resolver(Cliente), c.resolver(Sessao)), escopo=REQUISICAO)
+    return container
+
+
+def test_escopo_de_aplicacao_e_de_requisicao():
+    container = _container()
+
+    with container.escopo() as primeiro:
+        servico = primeiro.resolver(Servico)
+        assert primeiro.resolver(Sessao) is servico.sessao  # uma sessão por escopo
+    with container.escopo() as segundo:
+        outro = segundo.resolver(Servico)
+
+    assert servico.cliente is outro.cliente is container.resolver(Cliente)
+    assert servico.sessao is not outro.sessao
+    assert servico.sessao.fechada and outro.sessao.fechada
+    with pytest.raises(LookupError):
+        container.resolver(Sessao)  # fora de um escopo de requisição
+
+
+def test_sobrescrita_vale_nos_dois_escopos_e_e_restaurada():
+    container = _container()
+    original = container.resolver(Cliente)
+    falso = MagicMock(spec=Cliente)
+
+    with container.sobrescrito(Cliente, falso):
+        assert container.resolver(Cliente) is falso
+        with container.escopo() as escopo:
+            assert escopo.resolver(Servico).cliente is falso
+
+    assert container.resolver(Cliente) is original
+
+
+def test_dependencia_fastapi_resolve_instancia_do_processo():
+    container = _container()
+    app = FastAPI()
+
+    @app.get("/cliente")
+    def obter(cliente: Cliente = Depends(container.dependencia(Cliente))):
+        return {"id": id(cliente)}
+
+    client = TestClient(app)
+    assert client.get("/cliente").json() == client.get("/cliente").json() == {"id": id(container.resolver(Cliente))}
+    assert container.dependencia(Cliente) is container.dependencia(Cliente)
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from datetime import datetime, timezone
+
+from app.controller.cobranca import _stream_eventos
+from app.core.eventos import BarramentoEventos, barramento_cobrancas
+from app.models.cobranca import Cobranca
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.services.eventos_service import PropagadorEventos
+
+
+def _transicao(id_cobranca, ciclista=1, status="PAGA"):
+    return id_cobranca, {"id": id_cobranca, "ciclista": ciclista, "status": status}
+
+
+class RequisicaoAberta:
+    async def is_disconnected(self):
+        return False
+
+
+def test_assinante_recebe_so_o_que_o_filtro_aceita_publicado_de_outra_thread():
+    async def cenario():
+        barramento = BarramentoEventos()
+        por_ciclista = barramento.assinar(ciclista=2)
+        por_cobranca = barramento.assinar(cobranca=1)
+
+        publicador = threading.Thread(target=barramento.publicar, args=([_transicao(1), _transicao(5, ciclista=2)],))
+        publicador.start()
+        publicador.join()
+
+        assert (await por_cobranca.proximo(1))[1]["id"] == 1
+        assert (await por_ciclista.proximo(1))[1]["id"] == 5
+        assert await por_cobranca.proximo(0.01) is None
+
+    asyncio.run(cenario())
+
+
+def test_assinante_lento_e_descartado_sem_bloquear_o_publicador():
+    async def cenario():
+        barramento = BarramentoEventos(buffer_maximo=2)
+        lento = barramento.assinar()
+        rapido = barramento.assinar()
+
+        for id_cobranca in range(1, 4):
+            barramento.publicar([_transicao(id_cobranca)])
+            await asyncio.sleep(0)
+            if id_cobranca < 3:
+                assert (await rapido.proximo(1))[1]["id"] == id_cobranca
+        await asyncio.sleep(0)
+
+        assert lento.descartada
+        assert await lento.proximo(1) is None
+        assert not rapido.descartada
+
+    asyncio.run(cenario())
+
+
+def test_transicoes_gravadas_por_outro_worker_chegam_ao_stream_pelo_propagador(session_factory):
+    async def cenario():
+        propagador = PropagadorEventos(session_factory, barramento_cobrancas)
+        propagador.propagar()  # posiciona no fim da tabela, como ao subir o worker
+        assinatura = barramento_cobrancas.assinar()
+        stream = _stream_eventos(RequisicaoAberta(), assinatura)
+        assert await stream.__anext__() == b"retry: 3000\n\n"
+
+        # Outra sessão (outro worker): nada é publicado em processo, só gravado em eventos_cobranca
+        db = session_factory()
+        repo = CobrancaRepository(db)
+        cobranca = repo.salvar(Cobranca(ciclista=4, valor=10.0, status="PENDENTE", horaSolicitacao=datetime.now(timezone.utc)))
+        cobranca.status = "PAGA"
+        repo.salvar_em_lote([cobranca])
+        id_cobranca = cobranca.id
+        db.close()
+
+        assert await assinatura.proximo(0.01) is None
+        assert propagador.propagar() == 2
+        await asyncio.sleep(0)
+
+        criada = await stream.__anext__()
+        paga = await stream.__anext__()
+        await stream.aclose()
+        return id_cobranca, criada, paga
+
+    id_cobranca, criada, paga = asyncio.run(cenario())
+
+    assert criada.startswith(b"id: ") and b"event: transicao\n" in criada
+    assert f'"id":{id_cobranca},"ciclista":4,"status":"PENDENTE","statusAnterior":null'.encode() in criada
+    assert b'"status":"PAGA","statusAnterior":"PENDENTE"' in paga
+    assert len(barramento_cobrancas) == 0
+
+
+def test_reconexao_com_last_event_id_recupera_o_que_foi_perdido_sem_repetir(session_factory):
+    repo = CobrancaRepository(session_factory())
+    cobrancas = [
+        repo.salvar(Cobranca(ciclista=7, valor=5.0, status="PENDENTE", horaSolicitacao=datetime.now(timezone.utc)))
+        for _ in range(3)
+    ]
+    propagador = PropagadorEventos(session_factory, barramento_cobrancas)
+    primeiro, *perdidos = propagador.recuperar(0, 10, ciclista=7)
+    assert [transicao["id"] for _, transicao in perdidos] == [cobranca.id for cobranca in cobrancas[1:]]
+
+    async def cenario():
+        assinatura = barramento_cobrancas.assinar(ciclista=7)
+        recuperados = propagador.recuperar(primeiro[0], assinatura.buffer_maximo, ciclista=7)
+        stream = _stream_eventos(RequisicaoAberta(), assinatura, recuperados, recuperados[-1][0])
+        await stream.__anext__()
+        enviados = [await stream.__anext__(), await stream.__anext__()]
+        # O último recuperado também chega pelo barramento (gravado entre a assinatura e o replay): é ignorado
+        barramento_cobrancas.publicar([recuperados[-1], _transicao(99, ciclista=7)])
+        await asyncio.sleep(0)
+        enviados.append(await stream.__anext__())
+        await stream.aclose()
+        return enviados
+
+    enviados = asyncio.run(cenario())
+
+    assert [linha.split(b"\n")[0] for linha in enviados] == [
+        b"id: %d" % perdidos[0][0], b"id: %d" % perdidos[1][0], b"id: 99"
+    ]
@@ -0,0 +1,76 @@
+import pytest
+from unittest.mock import MagicMock
+from fastapi.testclient import TestClient
+
+from app.core.metrics import RegistroMetricas, medir_dependencia, DEPENDENCIA_ERROS, DEPENDENCIA_DURACAO
+from app.core.dependencies import get_cobranca_repository
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.repositories.fila_estado_repository import EstadoFila
+from app.main import app
+
+
+def test_contador_exporta_formato_prometheus():
+    registro = RegistroMetricas()
+    contador = registro.contador("chamadas_total", "Total de chamadas.", ("rota",))
+
+    contador.inc(rota="/cobranca")
+    contador.inc(2, rota="/cobranca")
+
+    texto = registro.exportar()
+
+    assert "# TYPE chamadas_total counter" in texto
+    assert 'chamadas_total{rota="/cobranca"} 3.0' in texto
+
+
+def test_histograma_acumula_buckets():
+    registro = RegistroMetricas()
+    histograma = registro.histograma("latencia_segundos", "Latência.", buckets=(0.1, 1.0))
+
+    histograma.observar(0.05)
+    histograma.observar(0.5)
+    histograma.observar(5.0)
+
+    texto = registro.exportar()
+
+    assert 'latencia_segundos_bucket{le="0.1"} 1' in texto
+    assert 'latencia_segundos_bucket{le="1.0"} 2' in texto
+    assert 'latencia_segundos_bucket{le="+Inf"} 3' in texto
+    assert "latencia_segundos_count 3" in texto
+
+
+def test_metrica_rejeita_rotulos_inesperados():
+    registro = RegistroMetricas()
+    contador = registro.contador("x_total", "X.", ("rota",))
+
+    with pytest.raises(ValueError):
+        contador.inc(metodo="GET")
+
+
+def test_medir_dependencia_conta_erros_e_latencia():
+    @medir_dependencia("teste", "falha")
+    def chamada_com_falha():
+        raise RuntimeError("boom")
+
+    erros_antes = DEPENDENCIA_ERROS.valor(dependencia="teste", operacao="falha", erro="RuntimeError")
+    chamadas_antes = DEPENDENCIA_DURACAO.total(dependencia="teste", operacao="falha")
+
+    with pytest.raises(RuntimeError):
+        chamada_com_falha()
+
+    assert DEPENDENCIA_ERROS.valor(dependencia="teste", operacao="falha", erro="RuntimeError") == erros_antes + 1
+    assert DEPENDENCIA_DURACAO.total(dependencia="teste", operacao="falha") == chamadas_antes + 1
+
+
+def test_endpoint_metrics_expoe_profundidade_da_fila():
+    mock_repo = MagicMock(spec=CobrancaRepository)
+    mock_repo.obter_estado_fila.return_value = EstadoFila(pendentes=7, ocupadas=0)
+    app.dependency_overrides[get_cobranca_repository] = lambda: mock_repo
+    try:
+        response = TestClient(app).get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert "fila_cobrancas_pendentes 7.0" in response.text
+    mock_repo.obter_estado_fila.assert_called_once_with()
+    mock_repo.contar_por_status.assert_not_called()
@@ -0,0 +1,65 @@
+import os
+from unittest.mock import mock_open, patch
+
+import stripe
+from fastapi.testclient import TestClient
+
+from app.clients import aluguel_client
+from app.core.config import settings
+from app.core.dependencies import get_propagador_eventos
+from app.db.session import engine
+from app.integrations import email
+from app.integrations.stripe import criar_limitador_stripe
+from app.main import app
+from app.servidor import cpus_disponiveis, preparar_workers
+
+
+def test_ciclo_de_vida_abre_e_fecha_recursos_do_worker():
+    with TestClient(app):
+        assert aluguel_client._sessao is not None
+        assert email._cliente_compartilhado is not None
+        assert isinstance(stripe.default_http_client, stripe.RequestsClient)
+
+    assert aluguel_client._sessao is None
+    assert email._cliente_compartilhado is None
+    assert stripe.default_http_client is None
+
+
+def test_ciclo_de_vida_resolve_os_servicos_do_container_e_os_para_ao_encerrar():
+    with TestClient(app):
+        propagador = get_propagador_eventos()
+        assert propagador._thread is not None and propagador._thread.is_alive()
+        assert get_propagador_eventos() is propagador  # uma instância por processo
+
+    assert propagador._thread is None
+    assert get_propagador_eventos() is not propagador  # descartada: o próximo início cria outra
+
+
+def test_cpus_disponiveis_respeita_cota_do_cgroup():
+    with patch("app.servidor.os.sched_getaffinity", return_value=set(range(8))):
+        with patch("builtins.open", mock_open(read_data="200000 100000\n")):
+            assert cpus_disponiveis() == 2
+        with patch("builtins.open", mock_open(read_data="max 100000\n")):
+            assert cpus_disponiveis() == 8
+        with patch("builtins.open", side_effect=OSError):
+            assert cpus_disponiveis() == 8
+
+
+def test_preparar_workers_cria_tabelas_uma_vez_e_divide_limites_da_stripe():
+    with patch("app.db.esquema.criar_tabelas") as criar_tabelas, patch.dict(os.environ), \
+            patch.object(settings, "SERVIDOR_WORKERS_ATIVOS", 1), patch.object(settings, "BANCO_CRIAR_TABELAS", True), \
+            patch.object(settings, "STRIPE_TAXA_MAXIMA_POR_S", 25.0), patch.object(settings, "STRIPE_CONCORRENCIA_MAXIMA", 32):
+        preparar_workers(4)
+
+        criar_tabelas.assert_called_once_with()
+        assert os.environ["BANCO_CRIAR_TABELAS"] == "false"
+        assert os.environ["SERVIDOR_WORKERS_ATIVOS"] == "4"
+        limitador = criar_limitador_stripe()
+
+    assert (limitador.taxa_por_s, limitador.concorrencia_maxima) == (6.25, 8)
+
+
+def test_conexoes_sqlite_usam_wal_e_busy_timeout():
+    with engine.connect() as conexao:
+        assert conexao.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conexao.exec_driver_sql("PRAGMA busy_timeout").scalar() == settings.SQLITE_BUSY_TIMEOUT_MS
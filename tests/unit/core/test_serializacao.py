@@ -0,0 +1,71 @@
+import pytest
+from datetime import datetime, timedelta, timezone
+from typing import List
+from unittest.mock import MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.dependencies import get_cobranca_service
+from app.core.serializacao import serializar_cobranca, serializar_cobrancas
+from app.main import app
+from app.models.cobranca import Cobranca
+from app.schemas.cobranca_schema import CobrancaSchema
+from app.services.cobranca_service import CobrancaService
+
+DATAS = [
+    datetime(2025, 6, 1, 12, 30),
+    datetime(2025, 6, 1, 12, 30, 0, 1000),
+    datetime(2025, 6, 1, 12, 30, 15, 123456, tzinfo=timezone.utc),
+    datetime(2025, 6, 1, 9, 30, tzinfo=timezone(timedelta(hours=-3))),
+]
+
+
+def _cobranca(hora_solicitacao, hora_finalizacao, valor=10.5, status="PAGA") -> Cobranca:
+    return Cobranca(id=7, ciclista=3, valor=valor, status=status, horaSolicitacao=hora_solicitacao, horaFinalizacao=hora_finalizacao)
+
+
+def _corpo_pelo_caminho_padrao(conteudo, modelo) -> bytes:
+    """Serializa como antes: response_model + JSONResponse (json da stdlib)."""
+    app_referencia = FastAPI()
+
+    @app_referencia.get("/referencia", response_model=modelo)
+    def referencia():
+        return conteudo
+
+    return TestClient(app_referencia).get("/referencia").content
+
+
+@pytest.mark.parametrize("hora", DATAS)
+@pytest.mark.parametrize("valor", [10.5, 100, 0.01, 1234.56])
+def test_serializar_cobranca_igual_ao_caminho_padrao(hora, valor):
+    cobranca = _cobranca(hora, hora + timedelta(minutes=1), valor=valor)
+
+    assert serializar_cobranca(cobranca) == _corpo_pelo_caminho_padrao(cobranca, CobrancaSchema)
+
+
+def test_serializar_cobranca_pendente_sem_finalizacao():
+    cobranca = _cobranca(DATAS[0], None, status="PENDENTE")
+
+    assert serializar_cobranca(cobranca) == _corpo_pelo_caminho_padrao(cobranca, CobrancaSchema)
+
+
+def test_serializar_lista_de_cobrancas_igual_ao_caminho_padrao():
+    cobrancas = [_cobranca(hora, hora) for hora in DATAS]
+
+    assert serializar_cobrancas(cobrancas) == _corpo_pelo_caminho_padrao(cobrancas, List[CobrancaSchema])
+    assert serializar_cobrancas([]) == b"[]"
+
+
+def test_rota_obter_cobranca_usa_caminho_rapido():
+    cobranca = _cobranca(DATAS[2], DATAS[2])
+    mock_service = MagicMock(spec=CobrancaService)
+    mock_service.obter_por_id.return_value = cobranca
+    app.dependency_overrides[get_cobranca_service] = lambda: mock_service
+    try:
+        response = TestClient(app).get("/cobranca/7")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.content == _corpo_pelo_caminho_padrao(cobranca, CobrancaSchema)
@@ -0,0 +1,67 @@
+import json
+import logging
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.timing import iniciar_coleta, finalizar_coleta, medir_fase, formatar_server_timing
+from app.main import registrar_tempos_por_fase
+
+
+def test_medir_fase_sem_coleta_ativa_nao_registra_nada():
+    with medir_fase("db"):
+        pass
+
+    token = iniciar_coleta()
+    assert finalizar_coleta(token) == {}
+
+
+def test_medir_fase_acumula_duracao_por_fase():
+    token = iniciar_coleta()
+    with medir_fase("db"):
+        pass
+    with medir_fase("db"):
+        pass
+    with medir_fase("gateway"):
+        pass
+    fases = finalizar_coleta(token)
+
+    assert set(fases) == {"db", "gateway"}
+    assert all(duracao >= 0 for duracao in fases.values())
+
+
+def test_formatar_server_timing():
+    assert formatar_server_timing({"db": 1.234, "gateway": 10}) == "db;dur=1.23, gateway;dur=10.00"
+
+
+def test_middleware_emite_header_server_timing_e_log_estruturado(caplog):
+    """
+    Garante que as fases medidas dentro de um endpoint síncrono (executado no threadpool)
+    chegam ao middleware e são emitidas no header e no log.
+    """
+    app_teste = FastAPI()
+    app_teste.middleware("http")(registrar_tempos_por_fase)
+
+    @app_teste.get("/fases")
+    def endpoint_com_fases():
+        with medir_fase("db"):
+            pass
+        with medir_fase("aluguel"):
+            pass
+        return {}
+
+    logger = logging.getLogger("app")
+    logger.addHandler(caplog.handler)
+    try:
+        with caplog.at_level(logging.INFO, logger="app"):
+            response = TestClient(app_teste).get("/fases")
+    finally:
+        logger.removeHandler(caplog.handler)
+
+    assert response.status_code == 200
+    assert response.headers["Server-Timing"].startswith("db;dur=")
+    assert "aluguel;dur=" in response.headers["Server-Timing"]
+
+    registro = json.loads(caplog.records[-1].getMessage())
+    assert registro["evento"] == "requisicao"
+    assert registro["rota"] == "/fases"
+    assert set(registro["fases"]) == {"db", "aluguel"}
@@ -0,0 +1,87 @@
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+import stripe
+
+from app.core.exceptions import CartaoApiError
+from app.integrations.limitador import LimitadorAdaptativo
+from app.integrations.stripe import StripeGateway, limitador_stripe
+
+
+def test_limite_cresce_aditivamente_com_chamadas_rapidas():
+    limitador = LimitadorAdaptativo("teste", taxa_por_s=1000, concorrencia_inicial=2, concorrencia_maxima=3)
+
+    for _ in range(4):
+        with limitador.permissao():
+            pass
+
+    assert limitador.limite == 3  # 2 -> 2.5 -> 2.9 -> 3 (teto)
+
+
+def test_sobrecarga_reduz_limite_uma_vez_por_janela():
+    limitador = LimitadorAdaptativo("teste", taxa_por_s=1000, concorrencia_inicial=8, janela_recuo_s=60)
+
+    for _ in range(3):
+        with limitador.permissao() as chamada:
+            chamada.sinalizar_sobrecarga()
+
+    assert limitador.limite == 4
+
+
+def test_latencia_acima_do_alvo_reduz_limite():
+    limitador = LimitadorAdaptativo("teste", taxa_por_s=1000, concorrencia_inicial=8, latencia_alvo_s=0.0)
+
+    with limitador.permissao():
+        time.sleep(0.001)
+
+    assert limitador.limite == 4
+
+
+def test_concorrencia_acima_do_limite_espera_ate_o_prazo():
+    limitador = LimitadorAdaptativo("teste", taxa_por_s=1000, concorrencia_inicial=1)
+    dentro, liberar = threading.Event(), threading.Event()
+
+    def ocupar():
+        with limitador.permissao():
+            dentro.set()
+            liberar.wait(5)
+
+    thread = threading.Thread(target=ocupar)
+    thread.start()
+    dentro.wait(5)
+    try:
+        with pytest.raises(TimeoutError):
+            with limitador.permissao(timeout=0.05):
+                pass
+    finally:
+        liberar.set()
+        thread.join()
+
+
+def test_balde_de_fichas_limita_a_taxa():
+    limitador = LimitadorAdaptativo("teste", taxa_por_s=50, rajada=1, concorrencia_inicial=10)
+
+    inicio = time.monotonic()
+    for _ in range(4):
+        with limitador.permissao():
+            pass
+
+    assert time.monotonic() - inicio >= 0.05  # 3 fichas recarregadas a 50/s
+
+
+@patch('stripe.PaymentIntent')
+def test_gateway_traduz_429_e_sinaliza_o_limitador(mock_payment_intent_class):
+    erro = stripe.error.StripeError("Too many requests")
+    erro.http_status = 429
+    mock_payment_intent_class.create.side_effect = erro
+
+    with patch.object(limitador_stripe, "limite", 8.0), patch.object(limitador_stripe, "_ultimo_recuo", 0.0):
+        with pytest.raises(CartaoApiError) as exc_info:
+            StripeGateway.processar_pagamento(1000, "pm_card_visa")
+        limite_apos_429 = limitador_stripe.limite
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.codigo == "LIMITE_GATEWAY"
+    assert limite_apos_429 == 4.0
@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta, timezone
+
+from app.models.cobranca import Cobranca
+from app.models.cobranca_arquivada import CobrancaArquivada
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.services.arquivamento_service import ArquivadorCobrancas
+
+AGORA = datetime.now(timezone.utc)
+
+
+def _cobranca(repo, status, finalizada_ha_dias=None):
+    cobranca = Cobranca(ciclista=1, valor=10.0, status=status, horaSolicitacao=AGORA - timedelta(days=60))
+    if finalizada_ha_dias is not None:
+        cobranca.horaFinalizacao = AGORA - timedelta(days=finalizada_ha_dias)
+    return repo.salvar(cobranca)
+
+
+def test_arquivamento_move_so_finalizadas_antigas_em_lotes(session_factory, db_session):
+    repo = CobrancaRepository(db_session)
+    antigas = [_cobranca(repo, status, 40).id for status in ("PAGA", "FALHA", "PAGA")]
+    recente = _cobranca(repo, "PAGA", 1).id
+    pendente = _cobranca(repo, "PENDENTE").id
+    resumo_antes = repo.resumo.obter()
+
+    arquivadas = ArquivadorCobrancas(session_factory, timedelta(days=30), tamanho_lote=2, pausa_entre_lotes_s=0).arquivar()
+
+    assert arquivadas == 3
+    assert {c.id for c in db_session.query(Cobranca).all()} == {recente, pendente}
+    assert {c.id for c in db_session.query(CobrancaArquivada).all()} == set(antigas)
+    # O resumo continua contando as arquivadas
+    assert [(l.status, l.quantidade) for l in repo.resumo.obter()] == [(l.status, l.quantidade) for l in resumo_antes]
+
+
+def test_obter_por_id_busca_no_arquivo_e_maior_id_nunca_e_arquivado(db_session):
+    repo = CobrancaRepository(db_session)
+    id_arquivada = _cobranca(repo, "PAGA", 40).id
+    id_ultima = _cobranca(repo, "FALHA", 40).id
+
+    assert repo.arquivar_finalizadas(AGORA - timedelta(days=30), 100) == 1
+
+    encontrada = repo.obter_por_id(id_arquivada)
+    assert isinstance(encontrada, CobrancaArquivada)
+    assert (encontrada.status, encontrada.valor) == ("PAGA", 10.0)
+    assert isinstance(repo.obter_por_id(id_ultima), Cobranca)
+    assert repo.obter_por_id(999) is None
+
+    nova = _cobranca(repo, "PENDENTE")
+    assert nova.id > id_ultima
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.core.dependencies import get_cobranca_repository
+from app.main import app
+from app.models.cobranca import Cobranca
+from app.repositories.cobranca_repository import CobrancaRepository
+
+AGORA = datetime.now(timezone.utc)
+
+
+def _pendente(repo, ha_minutos):
+    return repo.salvar(Cobranca(ciclista=1, valor=10.0, status="PENDENTE", horaSolicitacao=AGORA - timedelta(minutes=ha_minutos)))
+
+
+def _mudar_status(repo, id_cobranca, status):
+    cobranca = repo.obter_por_ids([id_cobranca])[0]
+    cobranca.status = status
+    repo.salvar(cobranca)
+
+
+def _como_utc(valor):
+    return valor.replace(tzinfo=timezone.utc) if valor.tzinfo is None else valor
+
+
+def test_estado_acompanha_entrada_e_saida_da_fila(db_session):
+    repo = CobrancaRepository(db_session)
+    assert repo.obter_estado_fila().pendentes == 0
+
+    mais_antiga = _pendente(repo, 30).id
+    segunda = _pendente(repo, 20).id
+    _pendente(repo, 10)
+
+    estado = repo.obter_estado_fila()
+    assert (estado.pendentes, estado.ocupadas) == (3, 0)
+    assert _como_utc(estado.pendenteMaisAntigaEm) == AGORA - timedelta(minutes=30)
+
+    # A mais antiga sai da fila: a próxima passa a ser a segunda
+    _mudar_status(repo, mais_antiga, "OCUPADA")
+    estado = repo.obter_estado_fila()
+    assert (estado.pendentes, estado.ocupadas) == (2, 1)
+    assert _como_utc(estado.pendenteMaisAntigaEm) == AGORA - timedelta(minutes=20)
+
+    # Volta para a fila: é de novo a mais antiga
+    _mudar_status(repo, mais_antiga, "PENDENTE")
+    assert _como_utc(repo.obter_estado_fila().pendenteMaisAntigaEm) == AGORA - timedelta(minutes=30)
+
+    # Todas pagas em um lote: a fila fica vazia
+    pendentes = repo.listar_pendentes()
+    for cobranca in pendentes:
+        cobranca.status = "PAGA"
+    repo.salvar_em_lote(pendentes)
+    estado = repo.obter_estado_fila()
+    assert (estado.pendentes, estado.ocupadas, estado.pendenteMaisAntigaEm) == (0, 0, None)
+
+
+def test_saida_da_mais_antiga_sem_autoflush(session_factory):
+    # Produção usa SessionLocal(autoflush=False): a troca de status só chega ao banco no commit
+    db = session_factory(autoflush=False)
+    try:
+        repo = CobrancaRepository(db)
+        mais_antiga = _pendente(repo, 30).id
+        _pendente(repo, 20)
+
+        _mudar_status(repo, mais_antiga, "PAGA")
+        assert repo.fila.obter().idPendenteMaisAntiga != mais_antiga
+        assert _como_utc(repo.obter_estado_fila().pendenteMaisAntigaEm) == AGORA - timedelta(minutes=20)
+
+        pendentes = repo.listar_pendentes()
+        for cobranca in pendentes:
+            cobranca.status = "PAGA"
+        repo.salvar_em_lote(pendentes)
+        assert repo.fila.obter().idPendenteMaisAntiga is None
+    finally:
+        db.close()
+
+
+def test_endpoint_de_status_nao_consulta_cobrancas(db_session):
+    repo = CobrancaRepository(db_session)
+    _pendente(repo, 5)
+    _pendente(repo, 1)
+    repo.registrar_execucao_fila(AGORA - timedelta(seconds=4), 2.0, 10, 8)
+
+    repo.listar_pendentes = MagicMock(side_effect=AssertionError("não deveria listar"))
+    repo.contar_por_status = MagicMock(side_effect=AssertionError("não deveria contar"))
+    app.dependency_overrides[get_cobranca_repository] = lambda: repo
+    try:
+        response = TestClient(app).get("/filaCobranca/status")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    corpo = response.json()
+    assert (corpo["pendentes"], corpo["ocupadas"]) == (2, 0)
+    assert 299 <= corpo["idadePendenteMaisAntigaS"] < 360
+    ultima = corpo["ultimaExecucao"]
+    assert datetime.fromisoformat(ultima["inicio"].replace("Z", "+00:00")).tzinfo is not None
+    assert datetime.fromisoformat(corpo["pendenteMaisAntigaEm"].replace("Z", "+00:00")).tzinfo is not None
+    assert (ultima["duracaoS"], ultima["pendentes"], ultima["pagas"], ultima["vazaoPorS"]) == (2.0, 10, 8, 5.0)
@@ -0,0 +1,133 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import event
+
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.schemas.nova_cobranca_schema import NovaCobrancaSchema
+from app.services.cobranca_service import CobrancaService
+from unittest.mock import MagicMock
+
+
+def _popular(repo):
+    for i in range(1, 11):
+        hora = datetime(2025, 6, i, 10, 0, tzinfo=timezone.utc)
+        cobranca = repo.criar(NovaCobrancaSchema(ciclista=i % 2, valor=1.0 * i), hora)
+        if i % 3 == 0:
+            cobranca.status = "PAGA"
+        repo.salvar(cobranca)
+
+
+def _servico(repo):
+    return CobrancaService(repo, MagicMock(), MagicMock(), MagicMock())
+
+
+def test_listar_percorre_todas_as_paginas_pelo_cursor(db_session):
+    repo = CobrancaRepository(db_session)
+    _popular(repo)
+    service = _servico(repo)
+
+    ids, cursor, paginas = [], None, 0
+    while True:
+        itens, cursor = service.listar_cobrancas(cursor=cursor, limite=3)
+        ids += [c.id for c in itens]
+        paginas += 1
+        if cursor is None:
+            break
+
+    assert ids == list(range(1, 11))
+    assert paginas == 4
+
+
+def test_listar_com_filtros(db_session):
+    repo = CobrancaRepository(db_session)
+    _popular(repo)
+
+    pagas = repo.listar(status="PAGA")
+    do_ciclista = repo.listar(ciclista=1, limite=2)
+    no_periodo = repo.listar(desde=datetime(2025, 6, 3), ate=datetime(2025, 6, 5))
+
+    assert [c.id for c in pagas] == [3, 6, 9]
+    assert [c.id for c in do_ciclista] == [1, 3]
+    assert [c.id for c in no_periodo] == [3, 4]
+
+
+def test_listar_pagina_exata_nao_gera_cursor(db_session):
+    repo = CobrancaRepository(db_session)
+    _popular(repo)
+
+    itens, cursor = _servico(repo).listar_cobrancas(status="PAGA", limite=3)
+
+    assert len(itens) == 3
+    assert cursor is None
+
+
+def test_listar_inclui_as_arquivadas_na_ordem_do_cursor(db_session):
+    repo = CobrancaRepository(db_session)
+    _popular(repo)
+    for cobranca in repo.listar(status="PAGA"):
+        cobranca.horaFinalizacao = datetime(2025, 6, 20, tzinfo=timezone.utc)
+        repo.salvar(cobranca)
+    assert repo.arquivar_finalizadas(datetime(2025, 7, 1, tzinfo=timezone.utc), limite=100) == 3
+
+    itens, cursor = _servico(repo).listar_cobrancas(limite=4)
+    no_periodo = repo.listar(status="PAGA", desde=datetime(2025, 6, 3), ate=datetime(2025, 6, 7))
+
+    assert [c.id for c in itens] == [1, 2, 3, 4]
+    assert cursor is not None
+    assert [(c.id, c.status) for c in no_periodo] == [(3, "PAGA"), (6, "PAGA")]
+
+
+def test_listar_por_periodo_percorre_as_paginas_pela_hora_e_id(db_session):
+    repo = CobrancaRepository(db_session)
+    _popular(repo)
+    service = _servico(repo)
+    desde, ate = datetime(2025, 6, 2, tzinfo=timezone.utc), datetime(2025, 6, 9, tzinfo=timezone.utc)
+
+    ids, cursor = [], None
+    while True:
+        itens, cursor = service.listar_cobrancas(desde=desde, ate=ate, cursor=cursor, limite=3)
+        ids += [c.id for c in itens]
+        if cursor is None:
+            break
+
+    assert ids == [2, 3, 4, 5, 6, 7, 8]
+
+
+def _planos_da_listagem(db_session, **filtros):
+    consultas = []
+
+    def capturar(conn, cursor, sql, parametros, contexto, executemany):
+        if sql.lstrip().upper().startswith("SELECT"):
+            consultas.append((sql, parametros))
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        CobrancaRepository(db_session).listar(limite=3, **filtros)
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+    return [
+        " ".join(linha[-1] for linha in db_session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", parametros))
+        for sql, parametros in consultas
+    ]
+
+
+def test_listar_por_periodo_usa_o_indice_composto_sem_ordenar_em_memoria(db_session):
+    _popular(CobrancaRepository(db_session))
+
+    planos = _planos_da_listagem(db_session, desde=datetime(2025, 6, 3), ate=datetime(2025, 6, 5))
+
+    assert len(planos) == 2
+    assert "ix_cobrancas_hora_solicitacao_id" in planos[0]
+    assert "ix_cobrancas_arquivadas_hora_solicitacao_id" in planos[1]
+    assert all("TEMP B-TREE" not in plano for plano in planos)
+
+
+def test_listar_por_status_usa_o_indice_de_status_e_id(db_session):
+    _popular(CobrancaRepository(db_session))
+
+    planos = _planos_da_listagem(db_session, status="PAGA")
+
+    assert "ix_cobrancas_status_id" in planos[0]
+    assert "ix_cobrancas_arquivadas_status_id" in planos[1]
+    assert all("TEMP B-TREE" not in plano for plano in planos)
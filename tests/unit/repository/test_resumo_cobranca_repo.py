@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+
+from app.models.resumo_cobranca import ResumoCobranca
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.schemas.nova_cobranca_schema import NovaCobrancaSchema
+
+
+def _totais(db_session):
+    return {
+        (r.dimensao, r.chave, r.status): (r.quantidade, round(r.valor_total, 2))
+        for r in db_session.query(ResumoCobranca).all()
+        if r.quantidade
+    }
+
+
+def _criar(repo, ciclista, valor, dia):
+    hora = datetime(2025, 6, dia, 10, 0, tzinfo=timezone.utc)
+    return repo.salvar(repo.criar(NovaCobrancaSchema(ciclista=ciclista, valor=valor), hora))
+
+
+def test_resumo_incremental_acompanha_criacao_e_troca_de_status(db_session):
+    repo = CobrancaRepository(db_session)
+    c1 = _criar(repo, 1, 10.0, 1)
+    _criar(repo, 1, 5.5, 2)
+    c3 = _criar(repo, 2, 7.0, 2)
+
+    c1.status = "PAGA"
+    repo.salvar(c1)
+    c3.status = "FALHA"
+    repo.salvar_em_lote([c3])
+
+    assert _totais(db_session) == {
+        ("status", "", "PAGA"): (1, 10.0),
+        ("status", "", "PENDENTE"): (1, 5.5),
+        ("status", "", "FALHA"): (1, 7.0),
+        ("ciclista", "1", "PAGA"): (1, 10.0),
+        ("ciclista", "1", "PENDENTE"): (1, 5.5),
+        ("ciclista", "2", "FALHA"): (1, 7.0),
+        ("dia", "2025-06-01", "PAGA"): (1, 10.0),
+        ("dia", "2025-06-02", "PENDENTE"): (1, 5.5),
+        ("dia", "2025-06-02", "FALHA"): (1, 7.0),
+    }
+
+
+def test_salvar_sem_troca_de_status_nao_altera_resumo(db_session):
+    repo = CobrancaRepository(db_session)
+    cobranca = _criar(repo, 1, 10.0, 1)
+    antes = _totais(db_session)
+
+    cobranca.horaFinalizacao = datetime.now(timezone.utc)
+    repo.salvar(cobranca)
+
+    assert _totais(db_session) == antes
+
+
+def test_reconstruir_produz_o_mesmo_resumo_incremental(db_session):
+    repo = CobrancaRepository(db_session)
+    for ciclista, valor, dia in [(1, 10.0, 1), (1, 2.5, 1), (3, 4.0, 3)]:
+        cobranca = _criar(repo, ciclista, valor, dia)
+    cobranca.status = "PAGA"
+    repo.salvar(cobranca)
+    incremental = _totais(db_session)
+
+    repo.resumo.reconstruir()
+
+    assert _totais(db_session) == incremental
+
+
+def test_obter_resumo_filtrado_por_ciclista(db_session):
+    repo = CobrancaRepository(db_session)
+    _criar(repo, 1, 10.0, 1)
+    _criar(repo, 2, 3.0, 1)
+
+    linhas = repo.resumo.obter(ciclista=2)
+
+    assert {(l.dimensao, l.chave) for l in linhas} == {("status", ""), ("ciclista", "2")}
+
+
+def test_obter_resumo_sem_filtros_devolve_so_os_totais_gerais(db_session):
+    repo = CobrancaRepository(db_session)
+    for ciclista in range(1, 6):
+        _criar(repo, ciclista, 1.0, ciclista)
+
+    assert {(l.dimensao, l.chave, l.quantidade) for l in repo.resumo.obter()} == {("status", "", 5)}
+    assert {(l.dimensao, l.chave) for l in repo.resumo.obter(dia="2025-06-03")} == {("status", ""), ("dia", "2025-06-03")}
+
+
+def test_aplicar_variacoes_soma_em_linha_criada_por_outra_transacao(session_factory):
+    # A primeira transição da chave em outra transação já criou a linha: o upsert soma em vez de violar a PK
+    chave = ("status", "", "PAGA")
+    outra = session_factory()
+    CobrancaRepository(outra).resumo.aplicar_variacoes({chave: (1, 10.0)})
+    outra.commit()
+    outra.close()
+
+    db = session_factory()
+    CobrancaRepository(db).resumo.aplicar_variacoes({chave: (1, 2.5), ("status", "", "FALHA"): (0, 0.0)})
+    db.commit()
+
+    assert _totais(db) == {chave: (2, 12.5)}
+    db.close()
@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock
 
 # Import real do Stripe para usar suas classes de exceção
 import stripe
@@ -8,7 +8,9 @@ import stripe
 # Garanta que o pytest seja executado da raiz do projeto.
 from app.integrations.stripe import StripeGateway
 from app.core.exceptions import CartaoApiError
-from app.services.cartao_service import CartaoService, get_cartao_service
+from app.core.container import container
+from app.core.dependencies import get_cartao_service
+from app.services.cartao_service import CartaoService
 from app.schemas.cartao_schema import NovoCartaoDeCreditoSchema
 
 # --- Testes para a Lógica de Negócio do CartaoService ---
@@ -52,18 +54,22 @@ class TestCartaoService:
 
 # --- Testes para a Factory do CartaoService ---
 
-# O patch deve apontar para onde o objeto é USADO.
-@patch('app.services.cartao_service.StripeGateway')
-def test_get_cartao_service_cria_servico_com_gateway(MockStripeGateway):
+def test_get_cartao_service_reutiliza_servico_do_processo():
     """
-    Testa se a factory get_cartao_service constrói e retorna
-    uma instância de CartaoService, que por sua vez contém uma instância de StripeGateway.
+    Testa se a factory get_cartao_service devolve o CartaoService de escopo de aplicação,
+    construído uma única vez com o StripeGateway do container.
     """
-    mock_instancia_gateway = MagicMock()
-    MockStripeGateway.return_value = mock_instancia_gateway
-
     servico = get_cartao_service()
 
-    MockStripeGateway.assert_called_once()
     assert isinstance(servico, CartaoService)
-    assert servico.gateway is mock_instancia_gateway
+    assert servico is get_cartao_service()
+    assert servico.gateway is container.resolver(StripeGateway)
+
+
+def test_get_cartao_service_respeita_sobrescrita_do_container():
+    mock_servico = MagicMock(spec=CartaoService)
+
+    with container.sobrescrito(CartaoService, mock_servico):
+        assert get_cartao_service() is mock_servico
+
+    assert get_cartao_service() is not mock_servico
@@ -1,8 +1,11 @@
 import pytest
 from unittest.mock import MagicMock, patch
 from datetime import datetime
+from fastapi.testclient import TestClient
 
 # Assumindo que os componentes estão nestes caminhos
+from app.core.dependencies import get_cobranca_service
+from app.main import app
 from app.services.cobranca_service import CobrancaService
 from app.repositories.cobranca_repository import CobrancaRepository
 from app.integrations.stripe import StripeGateway
@@ -200,3 +203,178 @@ class TestCobrancaService:
 
         mock_gateway.processar_pagamento.assert_not_called()
         assert resultados == []
+
+    def test_processar_cobrancas_em_fila_com_perfil_salva_pstats(self, cobranca_service, mock_repo, tmp_path):
+        """Testa que o modo de perfilamento salva um arquivo .pstats identificado pelo run id."""
+        mock_repo.listar_pendentes.return_value = []
+
+        with patch('app.services.cobranca_service.settings.PERFIL_DIRETORIO', str(tmp_path)), \
+                patch('app.services.cobranca_service.settings.PERFIL_FILA_ATIVO', True):
+            cobranca_service.processar_cobrancas_em_fila()
+
+        assert cobranca_service.id_ultimo_perfil is not None
+        arquivo = tmp_path / f"fila-{cobranca_service.id_ultimo_perfil}.pstats"
+        assert arquivo.exists()
+
+    def test_rota_da_fila_nao_liga_o_perfil_pelo_cliente(self, cobranca_service, mock_repo):
+        """O cProfile só é ligado por PERFIL_FILA_ATIVO; um ?perfilar=true do cliente é ignorado."""
+        mock_repo.listar_pendentes.return_value = []
+        app.dependency_overrides[get_cobranca_service] = lambda: cobranca_service
+        try:
+            resposta = TestClient(app).post("/processaCobrancasEmFila?perfilar=true")
+        finally:
+            app.dependency_overrides.clear()
+
+        assert resposta.status_code == 200
+        assert "X-Perfil-Id" not in resposta.headers
+        assert cobranca_service.id_ultimo_perfil is None
+
+    def test_processar_cobrancas_em_fila_sem_perfil(self, cobranca_service, mock_repo):
+        """Sem perfilamento, nenhum run id é gerado."""
+        mock_repo.listar_pendentes.return_value = []
+
+        cobranca_service.processar_cobrancas_em_fila()
+
+        assert cobranca_service.id_ultimo_perfil is None
+
+    def test_obter_resumo_agrupa_linhas_por_dimensao(self, cobranca_service, mock_repo):
+        """Testa a montagem do resumo a partir das linhas da tabela de totais."""
+        from app.models.resumo_cobranca import ResumoCobranca
+        mock_repo.obter_resumo.return_value = [
+            ResumoCobranca(dimensao="ciclista", chave="1", status="PAGA", quantidade=2, valor_total=30.0),
+            ResumoCobranca(dimensao="dia", chave="2025-06-01", status="PAGA", quantidade=2, valor_total=30.0),
+            ResumoCobranca(dimensao="status", chave="", status="PAGA", quantidade=2, valor_total=30.0),
+        ]
+
+        resumo = cobranca_service.obter_resumo(ciclista=1)
+
+        mock_repo.obter_resumo.assert_called_once_with(1, None)
+        assert resumo.porStatus["PAGA"].quantidade == 2
+        assert resumo.porCiclista[0].ciclista == 1
+        assert str(resumo.porDia[0].dia) == "2025-06-01"
+
+    def test_listar_cobrancas_cursor_invalido(self, cobranca_service):
+        """Um cursor adulterado resulta em erro 422."""
+        with pytest.raises(CartaoApiError) as exc_info:
+            cobranca_service.listar_cobrancas(cursor="não-é-cursor")
+
+        assert exc_info.value.status_code == 422
+        assert exc_info.value.codigo == "CURSOR_INVALIDO"
+
+    def test_submeter_pagamento_intent_em_processamento_fica_para_o_webhook(self, cobranca_service, mock_repo, mock_gateway, mock_aluguel_client):
+        """Um intent ainda em processamento na Stripe é finalizado pelo webhook; a cobrança continua OCUPADA."""
+        cobranca = Cobranca(id=5, ciclista=1, valor=10.0, status="OCUPADA")
+        mock_repo.obter_por_id.return_value = cobranca
+        mock_aluguel_client.get_cartao_de_credito.return_value = {"numero": "4242"}
+        mock_gateway.processar_pagamento.return_value = {"status": "processing"}
+
+        cobranca_service.submeter_pagamento(5)
+
+        mock_gateway.processar_pagamento.assert_called_once_with(
+            valor_em_centavos=1000, payment_method_id="pm_card_visa", ids_cobranca=[5], chave_idempotencia="cobranca-5"
+        )
+        assert cobranca.status == "OCUPADA"
+        mock_repo.salvar.assert_not_called()
+
+    @pytest.mark.parametrize("status_intent, status_final", [("succeeded", "PAGA"), ("requires_payment_method", "FALHA")])
+    def test_submeter_pagamento_grava_intent_concluido(self, status_intent, status_final, cobranca_service, mock_repo, mock_gateway, mock_aluguel_client):
+        """Um intent que já volta concluído é gravado na hora, sem depender do webhook."""
+        cobranca = Cobranca(id=5, ciclista=1, valor=10.0, status="OCUPADA")
+        mock_repo.obter_por_id.return_value = cobranca
+        mock_aluguel_client.get_cartao_de_credito.return_value = {"numero": "4242"}
+        mock_gateway.processar_pagamento.return_value = {"status": status_intent}
+
+        cobranca_service.submeter_pagamento(5)
+
+        assert cobranca.status == status_final
+        assert cobranca.horaFinalizacao is not None
+        mock_repo.recarregar.assert_called_once_with(cobranca)
+        mock_repo.salvar.assert_called_once_with(cobranca)
+
+    def test_submeter_pagamento_nao_sobrescreve_o_webhook(self, cobranca_service, mock_repo, mock_gateway, mock_aluguel_client):
+        """Se o webhook finalizou a cobrança durante a chamada ao gateway, nada é gravado de novo."""
+        cobranca = Cobranca(id=5, ciclista=1, valor=10.0, status="OCUPADA")
+        mock_repo.obter_por_id.return_value = cobranca
+        mock_repo.recarregar.side_effect = lambda c: setattr(c, "status", "PAGA")
+        mock_aluguel_client.get_cartao_de_credito.return_value = {"numero": "4242"}
+        mock_gateway.processar_pagamento.return_value = {"status": "succeeded"}
+
+        cobranca_service.submeter_pagamento(5)
+
+        assert cobranca.status == "PAGA"
+        mock_repo.salvar.assert_not_called()
+
+    def test_submeter_pagamento_recusado_marca_falha(self, cobranca_service, mock_repo, mock_aluguel_client):
+        """Sem cartão não há intent (nem webhook): a falha é gravada na hora."""
+        cobranca = Cobranca(id=5, ciclista=1, valor=10.0, status="OCUPADA")
+        mock_repo.obter_por_id.return_value = cobranca
+        mock_aluguel_client.get_cartao_de_credito.return_value = None
+
+        cobranca_service.submeter_pagamento(5)
+
+        assert cobranca.status == "FALHA"
+        assert cobranca.horaFinalizacao is not None
+        mock_repo.salvar.assert_called_once_with(cobranca)
+
+    @patch.object(CobrancaService, '_obter_payment_method_id_do_ciclista', return_value="pm_card_visa")
+    def test_fila_agrupada_faz_um_pagamento_por_ciclista(self, mock_get_card, cobranca_service, mock_repo, mock_gateway):
+        """Com agrupamento, as pendências do mesmo ciclista viram um único PaymentIntent e um único commit."""
+        mock_repo.listar_pendentes.return_value = [
+            Cobranca(id=1, ciclista=1, valor=10.0, status="PENDENTE"),
+            Cobranca(id=2, ciclista=2, valor=7.5, status="PENDENTE"),
+            Cobranca(id=3, ciclista=1, valor=2.5, status="PENDENTE"),
+        ]
+        mock_repo.salvar_em_lote.side_effect = lambda cobrancas: cobrancas
+        mock_gateway.processar_pagamento.return_value = MagicMock(status="succeeded")
+
+        with patch.object(CobrancaService, '_enviar_notificacoes_de_pagamento'):
+            resultados = cobranca_service.processar_cobrancas_em_fila(agrupar_por_ciclista=True)
+
+        assert sorted(c.id for c in resultados) == [1, 2, 3]
+        assert mock_gateway.processar_pagamento.call_count == 2
+        mock_gateway.processar_pagamento.assert_any_call(
+            valor_em_centavos=1250, payment_method_id="pm_card_visa", ids_cobranca=[1, 3]
+        )
+        mock_repo.salvar_em_lote.assert_called_once()
+        assert [c.id for c in mock_repo.salvar_em_lote.call_args.args[0]] == [1, 3]
+        mock_repo.salvar.assert_called_once()  # ciclista 2 tem uma só pendência
+
+    @patch.object(CobrancaService, '_obter_payment_method_id_do_ciclista', return_value="pm_card_visa")
+    def test_grupo_recusado_mantem_todas_pendentes(self, mock_get_card, cobranca_service, mock_repo, mock_gateway):
+        grupo = [Cobranca(id=1, ciclista=1, valor=10.0, status="PENDENTE"), Cobranca(id=2, ciclista=1, valor=5.0, status="PENDENTE")]
+        mock_gateway.processar_pagamento.side_effect = stripe.error.StripeError("API Error")
+
+        assert cobranca_service.tentar_grupo_da_fila(grupo) == []
+        assert all(c.status == "PENDENTE" for c in grupo)
+        mock_repo.salvar_em_lote.assert_not_called()
+
+    @patch.object(CobrancaService, '_obter_payment_method_id_do_ciclista', return_value="pm_card_visa")
+    def test_grupo_grande_e_dividido_para_caber_no_metadata_da_stripe(self, mock_get_card, cobranca_service, mock_repo, mock_gateway):
+        """300 ids de 6 dígitos não cabem nos 500 caracteres de um valor de metadata: um intent por lote."""
+        grupo = [Cobranca(id=100000 + i, ciclista=1, valor=1.0, status="PENDENTE") for i in range(300)]
+        mock_repo.salvar_em_lote.side_effect = lambda cobrancas: cobrancas
+        mock_gateway.processar_pagamento.return_value = MagicMock(status="succeeded")
+
+        pagas = cobranca_service.tentar_grupo_da_fila(grupo)
+
+        chamadas = mock_gateway.processar_pagamento.call_args_list
+        assert len(chamadas) == 5
+        assert all(len(",".join(map(str, c.kwargs["ids_cobranca"]))) <= 500 for c in chamadas)
+        assert [i for c in chamadas for i in c.kwargs["ids_cobranca"]] == [c.id for c in grupo]
+        assert sum(c.kwargs["valor_em_centavos"] for c in chamadas) == 30000
+        assert [c.id for c in pagas] == [c.id for c in grupo]
+
+    @patch.object(CobrancaService, '_obter_email_do_ciclista', return_value="ciclista@example.com")
+    def test_notificacoes_agrupam_cobrancas_por_ciclista(self, mock_get_email, cobranca_service, mock_email_service):
+        """Várias cobranças do mesmo ciclista geram um só e-mail de resumo e uma só consulta."""
+        pagas = [
+            Cobranca(id=1, ciclista=1, valor=10.0, status="PAGA", horaFinalizacao=datetime(2025, 6, 1, 12, 0)),
+            Cobranca(id=2, ciclista=2, valor=5.0, status="PAGA", horaFinalizacao=datetime(2025, 6, 1, 12, 0)),
+            Cobranca(id=3, ciclista=1, valor=2.5, status="PAGA", horaFinalizacao=datetime(2025, 6, 1, 12, 1)),
+        ]
+
+        cobranca_service._enviar_notificacoes_de_pagamento(pagas)
+
+        assert mock_get_email.call_count == 2
+        mock_email_service.enviar_resumo_pagamentos.assert_called_once_with([pagas[0], pagas[2]], "ciclista@example.com")
+        mock_email_service.enviar_confirmacao_pagamento.assert_called_once_with(pagas[1], "ciclista@example.com")
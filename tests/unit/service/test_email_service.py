@@ -59,6 +59,28 @@ class TestEmailService(unittest.TestCase):
         service.client.enviar_email.assert_called_once_with(
             destinatario, assunto_esperado, mensagem_esperada
         )
+    @patch('app.services.email_service.EmailClient')
+    def test_enviar_resumo_pagamentos_lista_todas_as_cobrancas(self, mock_email_client):
+
+        service = EmailService()
+        service.client = mock_email_client.return_value
+        cobrancas = [
+            Cobranca(id=1, valor=10.0, status="PAGA", horaFinalizacao=datetime(2023, 10, 27, 14, 30)),
+            Cobranca(id=2, valor=2.5, status="PAGA", horaFinalizacao=datetime(2023, 10, 27, 14, 31)),
+        ]
+
+        service.enviar_resumo_pagamentos(cobrancas, "cliente@example.com")
+
+        service.client.enviar_email.assert_called_once_with(
+            "cliente@example.com",
+            "Confirmação de Pagamentos Recebidos - 2 cobranças",
+            "Olá!\n\n"
+            "Confirmamos o recebimento de 2 pagamentos, no total de R$ 12.50.\n\n"
+            "Cobranças:\n"
+            "#1 - R$ 10.00 - PAGA - 27/10/2023 14:30\n"
+            "#2 - R$ 2.50 - PAGA - 27/10/2023 14:31\n\n"
+            "Obrigado!"
+        )
 
 if __name__ == '__main__':
     unittest.main(argv=['first-arg-is-ignored'], exit=False)
\ No newline at end of file
@@ -0,0 +1,91 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+
+from app.models.cobranca import Cobranca
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.services.exportacao_service import ExportacaoService
+
+
+def _popular(session_factory, quantidade):
+    db = session_factory()
+    db.add_all(
+        Cobranca(ciclista=i, valor=1.5 * i, status="PAGA" if i % 2 else "PENDENTE",
+                 horaSolicitacao=datetime(2025, 6, 1 + i % 28, 8, 0, tzinfo=timezone.utc))
+        for i in range(1, quantidade + 1)
+    )
+    db.commit()
+    db.close()
+
+
+def test_exportar_ndjson_em_lotes(session_factory):
+    _popular(session_factory, 25)
+
+    blocos = list(ExportacaoService(session_factory, tamanho_lote=10).exportar("ndjson"))
+
+    # 25 linhas em lotes de 10 -> 3 blocos, cada um com as linhas de um lote
+    assert len(blocos) == 3
+    linhas = [json.loads(linha) for linha in b"".join(blocos).splitlines()]
+    assert [linha["id"] for linha in linhas] == list(range(1, 26))
+    assert list(linhas[0]) == ["valor", "ciclista", "id", "status", "horaSolicitacao", "horaFinalizacao"]
+
+
+def test_exportar_csv_com_filtros(session_factory):
+    _popular(session_factory, 10)
+
+    corpo = b"".join(ExportacaoService(session_factory, tamanho_lote=3).exportar(
+        "csv", status="PAGA", desde=datetime(2025, 6, 3), ate=datetime(2025, 6, 9)
+    ))
+
+    linhas = list(csv.DictReader(io.StringIO(corpo.decode("utf-8"))))
+    assert [linha["id"] for linha in linhas] == ["3", "5", "7"]
+    assert linhas[0]["horaSolicitacao"] == "2025-06-04T08:00:00"
+
+
+def test_exportar_gzip(session_factory):
+    _popular(session_factory, 5)
+
+    comprimido = b"".join(ExportacaoService(session_factory).exportar("ndjson", gzip=True))
+
+    assert len(gzip.decompress(comprimido).splitlines()) == 5
+
+
+def test_exportar_nao_segura_transacao_enquanto_o_cliente_consome(session_factory):
+    _popular(session_factory, 7)
+    sessoes = []
+
+    def fabrica():
+        sessao = session_factory()
+        sessoes.append(sessao)
+        return sessao
+
+    blocos = ExportacaoService(fabrica, tamanho_lote=3).exportar("csv")
+    next(blocos)
+    # Com o primeiro lote nas mãos do cliente, nenhuma sessão mantém a leitura aberta
+    assert len(sessoes) == 1
+    assert not sessoes[0].in_transaction()
+
+    list(blocos)
+    assert len(sessoes) == 3  # páginas de 3, 3 e 1 linha, uma sessão curta por página
+    assert not any(sessao.in_transaction() for sessao in sessoes)
+
+
+def test_exportar_periodo_ja_arquivado(session_factory):
+    _popular(session_factory, 10)
+    db = session_factory()
+    for cobranca in db.query(Cobranca).filter(Cobranca.status == "PAGA"):
+        cobranca.horaFinalizacao = datetime(2025, 6, 15, tzinfo=timezone.utc)
+    db.commit()
+    assert CobrancaRepository(db).arquivar_finalizadas(datetime(2025, 7, 1, tzinfo=timezone.utc), limite=100) == 5
+    db.close()
+
+    corpo = b"".join(ExportacaoService(session_factory, tamanho_lote=2).exportar(
+        "ndjson", desde=datetime(2025, 6, 3), ate=datetime(2025, 6, 9)
+    ))
+
+    linhas = [json.loads(linha) for linha in corpo.splitlines()]
+    assert [(linha["id"], linha["status"]) for linha in linhas] == [
+        (2, "PENDENTE"), (3, "PAGA"), (4, "PENDENTE"), (5, "PAGA"), (6, "PENDENTE"), (7, "PAGA")
+    ]
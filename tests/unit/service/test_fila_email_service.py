@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from fastapi.testclient import TestClient
+
+from app.core.dependencies import get_email_fila_repository, get_enviador_emails
+from app.core.exceptions import CartaoApiError
+from app.main import app
+from app.repositories.email_fila_repository import EmailFilaRepository
+from app.services.fila_email_service import EnviadorEmails
+
+
+def _enviador(session_factory, email_service, **kwargs) -> EnviadorEmails:
+    return EnviadorEmails(session_factory, email_service_factory=lambda: email_service, **kwargs)
+
+
+def _enfileirar(db, destinatario="ciclista@example.com"):
+    return EmailFilaRepository(db).enfileirar(destinatario, "Assunto", "Mensagem", datetime.now(timezone.utc))
+
+
+def test_processar_pendentes_entrega_e_marca_enviado(session_factory, db_session):
+    email_service = MagicMock()
+    email = _enfileirar(db_session)
+
+    assert _enviador(session_factory, email_service).processar_pendentes() == 1
+
+    email_service.enviar.assert_called_once_with("ciclista@example.com", "Assunto", "Mensagem")
+    registro = EmailFilaRepository(db_session).obter_por_id(email.id)
+    assert registro.status == "ENVIADO"
+    assert registro.tentativas == 1
+    assert registro.enviadoEm is not None
+
+
+def test_falha_volta_para_fila_com_espera_e_desiste_apos_tentativas_maximas(session_factory, db_session):
+    email_service = MagicMock()
+    email_service.enviar.side_effect = CartaoApiError(422, "FALHA_ENVIO_EMAIL", "Houve um erro no envio do email")
+    email = _enfileirar(db_session)
+    enviador = _enviador(session_factory, email_service, tentativas_maximas=2, retentativa_base_s=60)
+    repo = EmailFilaRepository(db_session)
+
+    assert enviador.processar_pendentes() == 1
+    registro = repo.obter_por_id(email.id)
+    assert (registro.status, registro.tentativas) == ("PENDENTE", 1)
+    assert registro.ultimoErro == "Houve um erro no envio do email"
+    assert enviador.processar_pendentes() == 0  # ainda esperando o intervalo de retentativa
+
+    registro.proximaTentativaEm = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+    assert enviador.processar_pendentes() == 1
+    assert (repo.obter_por_id(email.id).status, repo.obter_por_id(email.id).tentativas) == ("FALHA", 2)
+
+
+def test_reserva_expirada_de_enviador_que_caiu_volta_a_ser_entregue(session_factory, db_session):
+    repo = EmailFilaRepository(db_session)
+    email = _enfileirar(db_session)
+    agora = datetime.now(timezone.utc)
+
+    assert repo.reservar_proximo(agora, agora + timedelta(seconds=60), 5).id == email.id
+    assert repo.reservar_proximo(agora, agora + timedelta(seconds=60), 5) is None  # já reservado
+
+    depois = agora + timedelta(seconds=61)
+    reservado = repo.reservar_proximo(depois, depois + timedelta(seconds=60), 5)
+    assert reservado.id == email.id
+    assert reservado.tentativas == 1  # o envio interrompido conta como tentativa
+
+
+def test_mensagem_que_derruba_o_enviador_desiste_apos_tentativas_maximas(db_session):
+    repo = EmailFilaRepository(db_session)
+    email = _enfileirar(db_session)
+    agora = datetime.now(timezone.utc)
+
+    # O enviador cai a cada reserva: ela só volta a ser elegível quando expira
+    for _ in range(3):
+        assert repo.reservar_proximo(agora, agora + timedelta(seconds=60), 3).id == email.id
+        agora += timedelta(seconds=61)
+
+    assert repo.reservar_proximo(agora, agora + timedelta(seconds=60), 3) is None
+    registro = repo.obter_por_id(email.id)
+    assert (registro.status, registro.tentativas) == ("FALHA", 3)
+    assert "reserva do enviador expirou" in registro.ultimoErro
+
+
+def test_enviar_email_assincrono_responde_202_e_status_acompanha_entrega(session_factory):
+    email_service = MagicMock()
+    enviador = _enviador(session_factory, email_service)
+    enviador.acordar = MagicMock()  # entrega feita pelo teste, sem threads
+
+    def repo_do_teste():
+        db = session_factory()
+        try:
+            yield EmailFilaRepository(db)
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_email_fila_repository] = repo_do_teste
+    app.dependency_overrides[get_enviador_emails] = lambda: enviador
+    try:
+        client = TestClient(app)
+        corpo = {"destinatario": "ciclista@example.com", "assunto": "Aluguel", "mensagem": "Bicicleta liberada"}
+        aceito = client.post("/enviarEmail?assincrono=true", json=corpo)
+        assert aceito.status_code == 202
+        id_email = aceito.json()["id"]
+        assert aceito.json()["status"] == "PENDENTE"
+        enviador.acordar.assert_called_once()
+        email_service.enviar.assert_not_called()
+
+        enviador.processar_pendentes()
+        situacao = client.get(f"/enviarEmail/{id_email}")
+        nao_existe = client.get("/enviarEmail/999")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert situacao.status_code == 200
+    assert situacao.json()["status"] == "ENVIADO"
+    assert nao_existe.status_code == 404
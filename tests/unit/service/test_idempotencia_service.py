@@ -0,0 +1,160 @@
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core.config import Settings
+from app.core.dependencies import get_cobranca_service, get_idempotencia_service
+from app.core.exceptions import CartaoApiError
+from app.main import app
+from app.models.cobranca import Cobranca
+from app.repositories.idempotencia_repository import IdempotenciaRepository
+from app.services.cobranca_service import CobrancaService
+from app.services.idempotencia_service import IdempotenciaService, prazo_reserva
+
+HASH_CORPO_VAZIO = hashlib.sha256(b"{}").hexdigest()
+
+
+def _service(db, validade=timedelta(hours=1), espera_maxima_s=5.0) -> IdempotenciaService:
+    return IdempotenciaService(IdempotenciaRepository(db), validade, espera_maxima_s, intervalo_s=0.01)
+
+
+def test_repeticao_devolve_resposta_guardada_sem_executar(db_session):
+    operacao = MagicMock(return_value=(200, b'{"id":1}'))
+    service = _service(db_session)
+
+    primeira = service.executar("chave-1", "POST /cobranca", b"{}", operacao)
+    segunda = service.executar("chave-1", "POST /cobranca", b"{}", operacao)
+
+    assert primeira == (200, b'{"id":1}', False)
+    assert segunda == (200, b'{"id":1}', True)
+    operacao.assert_called_once()
+
+
+def test_mesma_chave_com_outro_corpo_e_recusada(db_session):
+    service = _service(db_session)
+    service.executar("chave-1", "POST /cobranca", b'{"valor":1}', lambda: (200, b"{}"))
+
+    with pytest.raises(CartaoApiError) as exc_info:
+        service.executar("chave-1", "POST /cobranca", b'{"valor":2}', lambda: (200, b"{}"))
+
+    assert exc_info.value.codigo == "CHAVE_IDEMPOTENCIA_REUTILIZADA"
+
+
+def test_falha_libera_a_chave_e_chave_expirada_executa_de_novo(db_session):
+    service = _service(db_session, validade=timedelta(seconds=-1))
+
+    with pytest.raises(RuntimeError):
+        service.executar("chave-1", "POST /cobranca", b"{}", MagicMock(side_effect=RuntimeError("boom")))
+    assert service.executar("chave-1", "POST /cobranca", b"{}", lambda: (200, b"a")) == (200, b"a", False)
+    # Já expirada (validade negativa): a próxima requisição executa outra vez
+    assert service.executar("chave-1", "POST /cobranca", b"{}", lambda: (200, b"b")) == (200, b"b", False)
+
+
+def test_falha_depois_de_gravar_guarda_o_erro_como_resposta_da_chave(db_session):
+    service = _service(db_session)
+    operacao_executada = MagicMock()
+
+    def cobrar_e_falhar():
+        operacao_executada()
+        db_session.add(Cobranca(ciclista=1, valor=10.0, status="OCUPADA"))
+        db_session.commit()  # a cobrança existe e o gateway pode ter sido chamado
+        raise CartaoApiError(422, "ERRO_GATEWAY", "Falha no provedor.")
+
+    with pytest.raises(CartaoApiError):
+        service.executar("chave-1", "POST /cobranca", b"{}", cobrar_e_falhar)
+    status_http, corpo, reproduzida = service.executar("chave-1", "POST /cobranca", b"{}", cobrar_e_falhar)
+
+    assert (status_http, reproduzida) == (422, True)
+    assert b'"codigo":"ERRO_GATEWAY"' in corpo
+    operacao_executada.assert_called_once()
+
+
+def test_prazo_da_reserva_cobre_a_cobranca_mais_lenta():
+    config = Settings(IDEMPOTENCIA_RESERVA_S=None, ALUGUEL_TIMEOUT_S=5, STRIPE_ESPERA_MAXIMA_S=30,
+                      STRIPE_TIMEOUT_S=20, STRIPE_TENTATIVAS_REDE=2, SQLITE_BUSY_TIMEOUT_MS=5000)
+
+    assert prazo_reserva(config) >= timedelta(seconds=5 + 30 + 3 * 20 + 2 * 5)
+    assert prazo_reserva(Settings(IDEMPOTENCIA_RESERVA_S=90)) == timedelta(seconds=90)
+
+
+def test_repeticao_em_andamento_espera_pela_original(session_factory):
+    em_execucao, liberar = threading.Event(), threading.Event()
+    resultados = {}
+
+    def original():
+        def operacao():
+            em_execucao.set()
+            liberar.wait(5)
+            return 200, b"original"
+        db = session_factory()
+        resultados["original"] = _service(db).executar("chave-1", "POST /cobranca", b"{}", operacao)
+        db.close()
+
+    thread = threading.Thread(target=original)
+    thread.start()
+    em_execucao.wait(5)
+    threading.Timer(0.05, liberar.set).start()
+
+    db = session_factory()
+    repeticao = _service(db).executar("chave-1", "POST /cobranca", b"{}", MagicMock(side_effect=AssertionError))
+    db.close()
+    thread.join()
+
+    assert resultados["original"] == (200, b"original", False)
+    assert repeticao == (200, b"original", True)
+
+
+def test_reserva_de_worker_que_caiu_e_assumida_depois_do_prazo(db_session):
+    # Simula um worker que reservou a chave e caiu antes de concluir: a reserva já venceu
+    agora = datetime.now(timezone.utc)
+    IdempotenciaRepository(db_session).reservar("chave-1", "POST /cobranca", HASH_CORPO_VAZIO, agora + timedelta(hours=1), agora - timedelta(seconds=1))
+
+    resultado = _service(db_session, espera_maxima_s=0).executar("chave-1", "POST /cobranca", b"{}", lambda: (200, b"nova"))
+
+    assert resultado == (200, b"nova", False)
+
+
+def test_reserva_dentro_do_prazo_espera_com_recuo_e_jitter(db_session):
+    IdempotenciaRepository(db_session).reservar(
+        "chave-1", "POST /cobranca", HASH_CORPO_VAZIO,
+        datetime.now(timezone.utc) + timedelta(hours=1), datetime.now(timezone.utc) + timedelta(minutes=1)
+    )
+    service = IdempotenciaService(IdempotenciaRepository(db_session), timedelta(hours=1), espera_maxima_s=0.3,
+                                  intervalo_s=0.01, intervalo_maximo_s=0.04)
+    esperas, dormir = [], time.sleep
+
+    with patch("app.services.idempotencia_service.time.sleep", side_effect=lambda s: esperas.append(s) or dormir(s)):
+        with pytest.raises(CartaoApiError) as exc_info:
+            service.executar("chave-1", "POST /cobranca", b"{}", MagicMock(side_effect=AssertionError))
+
+    assert exc_info.value.status_code == 409
+    assert 0.005 <= esperas[0] <= 0.01
+    assert 0.01 <= esperas[1] <= 0.02
+    assert all(espera <= 0.04 for espera in esperas)
+
+
+def test_rota_fila_cobranca_honra_idempotency_key(db_session):
+    mock_service = MagicMock(spec=CobrancaService)
+    mock_service.criar_cobranca_na_fila.return_value = Cobranca(id=9, ciclista=1, valor=10.0, status="PENDENTE")
+    app.dependency_overrides[get_cobranca_service] = lambda: mock_service
+    app.dependency_overrides[get_idempotencia_service] = lambda: _service(db_session)
+    try:
+        client = TestClient(app)
+        corpo = {"valor": 10.0, "ciclista": 1}
+        primeira = client.post("/filaCobranca", json=corpo, headers={"Idempotency-Key": "abc"})
+        segunda = client.post("/filaCobranca", json=corpo, headers={"Idempotency-Key": "abc"})
+        sem_chave = client.post("/filaCobranca", json=corpo)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert primeira.status_code == segunda.status_code == 200
+    assert segunda.content == primeira.content
+    assert segunda.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in primeira.headers
+    assert sem_chave.status_code == 200
+    assert mock_service.criar_cobranca_na_fila.call_count == 2
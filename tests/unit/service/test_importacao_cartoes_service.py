@@ -0,0 +1,83 @@
+import io
+import csv
+import pytest
+from unittest.mock import MagicMock
+
+from app.core.exceptions import CartaoApiError
+from app.integrations.stripe import StripeGateway
+from app.schemas.cartao_schema import NovoCartaoDeCreditoSchema
+from app.services.importacao_cartoes_service import ImportacaoCartoesService, validar_lote, luhn_vetorizado
+
+import numpy as np
+
+CASOS = [
+    ("JOAO", "4242424242424242", "123"),
+    ("JOAO", "4242 4242 4242 4242", "1234"),
+    ("JOAO", "4012001037141112", "999"),
+    ("JOAO", "79927398713", "123"),
+    ("JOAO", "4242424242424241", "123"),
+    ("JOAO", "0000 0000", "123"),
+    ("JOAO", "4242-4242", "123"),
+    ("JOAO", "", "123"),
+    ("   ", "4242424242424242", "123"),
+    ("JOAO", "4242424242424242", ""),
+    ("JOAO", "4242424242424242", "12a"),
+    ("JOAO", "4242424242424242", "12"),
+    ("JOAO", "4242424242424242", " 12345 "),
+    ("", "abc", ""),
+]
+
+
+def _codigo_do_schema(titular, numero, cvv):
+    try:
+        NovoCartaoDeCreditoSchema(nomeTitular=titular, numero=numero, validade="12/2030", cvv=cvv)
+        return "", ""
+    except CartaoApiError as e:
+        return e.codigo, e.mensagem
+
+
+def test_validar_lote_reproduz_o_schema_linha_a_linha():
+    titulares, numeros, cvvs = zip(*CASOS)
+
+    _, codigos, mensagens = validar_lote(list(titulares), list(numeros), list(cvvs))
+
+    for caso, codigo, mensagem in zip(CASOS, codigos.tolist(), mensagens.tolist()):
+        assert (codigo, mensagem) == _codigo_do_schema(*caso), caso
+
+
+def test_luhn_vetorizado_igual_ao_escalar():
+    numeros = ["4242424242424242", "79927398713", "79927398710", "0", "18", "4012001037141112", "1234567812345678"]
+
+    resultado = luhn_vetorizado(np.asarray(numeros))
+
+    assert resultado.tolist() == [NovoCartaoDeCreditoSchema.validar_luhn(n) for n in numeros]
+
+
+def test_importar_envia_ao_gateway_apenas_linhas_validas():
+    def validar_cartao(numero):
+        if numero == "4000000000000002":
+            raise CartaoApiError(422, "CARTAO_RECUSADO", "O cartão foi recusado.")
+
+    mock_gateway = MagicMock(spec=StripeGateway)
+    mock_gateway.validar_cartao.side_effect = validar_cartao
+    entrada = io.StringIO(
+        "nomeTitular,numero,validade,cvv\n"
+        "ANA,4242 4242 4242 4242,12/2030,123\n"
+        "BIA,4242424242424241,12/2030,123\n"
+        "CAIO,4000000000000002,12/2030,123\n"
+        "DANI,4242424242424242,12/2030,1\n"
+    )
+    saida = io.StringIO()
+
+    totais = ImportacaoCartoesService(mock_gateway, concorrencia=2).importar(entrada, saida, tamanho_lote=3)
+
+    linhas = list(csv.DictReader(io.StringIO(saida.getvalue())))
+    assert [(l["linha"], l["status"], l["codigo"]) for l in linhas] == [
+        ("2", "VALIDO", ""),
+        ("3", "INVALIDO", "NUMERO_INVALIDO"),
+        ("4", "RECUSADO", "CARTAO_RECUSADO"),
+        ("5", "INVALIDO", "CVV_TAMANHO_INVALIDO"),
+    ]
+    assert linhas[0]["numero"] == "****4242"
+    assert sorted(c.args[0] for c in mock_gateway.validar_cartao.call_args_list) == ["4000000000000002", "4242424242424242"]
+    assert totais == {"VALIDO": 1, "NUMERO_INVALIDO": 1, "CARTAO_RECUSADO": 1, "CVV_TAMANHO_INVALIDO": 1}
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+from app.models.cobranca import Cobranca
+from app.models.submissao_pagamento import SubmissaoPagamento
+from app.repositories.cobranca_repository import CobrancaRepository
+from app.repositories.submissao_pagamento_repository import SubmissaoPagamentoRepository
+from app.services.submissao_service import SubmissorPagamentos
+
+
+def _cobranca_assincrona(db) -> Cobranca:
+    cobranca = Cobranca(ciclista=1, valor=10.0, status="OCUPADA", horaSolicitacao=datetime.now(timezone.utc))
+    return CobrancaRepository(db).salvar_e_submeter(cobranca)
+
+
+def test_submissao_gravada_com_a_cobranca_e_concluida_pelo_submissor(session_factory, db_session):
+    cobranca = _cobranca_assincrona(db_session)
+    assert db_session.query(SubmissaoPagamento).filter_by(idCobranca=cobranca.id).count() == 1
+    submeter = MagicMock()
+
+    assert SubmissorPagamentos(session_factory, submeter).processar_pendentes() == 1
+
+    submeter.assert_called_once_with(cobranca.id)
+    assert db_session.query(SubmissaoPagamento).count() == 0
+
+
+def test_reserva_de_submissor_que_caiu_e_retomada_depois_do_prazo(session_factory, db_session):
+    cobranca = _cobranca_assincrona(db_session)
+    # Um worker reservou a submissão e caiu antes de concluir: a reserva já venceu
+    agora = datetime.now(timezone.utc)
+    assert SubmissaoPagamentoRepository(session_factory()).reservar_proxima(agora, agora - timedelta(seconds=1), 10)
+    submeter = MagicMock()
+
+    assert SubmissorPagamentos(session_factory, submeter).processar_pendentes() == 1
+
+    submeter.assert_called_once_with(cobranca.id)
+    assert db_session.query(SubmissaoPagamento).count() == 0
+
+
+def test_falha_volta_com_espera_e_e_descartada_apos_tentativas_maximas(session_factory, db_session):
+    _cobranca_assincrona(db_session)
+    submeter = MagicMock(side_effect=ConnectionError("aluguel fora do ar"))
+    submissor = SubmissorPagamentos(session_factory, submeter, tentativas_maximas=2, retentativa_base_s=0)
+
+    assert submissor.processar_pendentes() == 2
+
+    submissao = db_session.query(SubmissaoPagamento).one()
+    assert (submissao.situacao, submissao.tentativas) == ("DESCARTADA", 2)
+    assert submissao.ultimoErro == "aluguel fora do ar"
+    assert submissor.processar_pendentes() == 0
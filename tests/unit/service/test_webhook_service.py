@@ -0,0 +1,126 @@
+import hashlib
+import hmac
+import json
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from app.core.dependencies import get_aplicador_eventos_stripe, get_cobranca_service
+from app.main import app
+from app.models.cobranca import Cobranca
+from app.models.evento_stripe import EventoStripe
+from app.services.cobranca_service import CobrancaService
+from app.services.webhook_service import AplicadorEventosStripe, aplicar_lote
+
+SEGREDO = "whsec_teste"
+
+
+def _cobranca(db, status="OCUPADA"):
+    cobranca = Cobranca(ciclista=1, valor=10.0, status=status, horaSolicitacao=datetime.now(timezone.utc))
+    db.add(cobranca)
+    db.commit()
+    return cobranca
+
+
+def _evento(id_evento, tipo, id_cobranca):
+    status = "succeeded" if tipo == "payment_intent.succeeded" else "requires_payment_method"
+    return {
+        "id": id_evento,
+        "object": "event",
+        "type": tipo,
+        "data": {"object": {
+            "id": f"pi_{id_evento}", "object": "payment_intent", "status": status,
+            "created": int(time.time()), "metadata": {"cobranca_ids": str(id_cobranca)},
+        }},
+    }
+
+
+def _assinar(corpo: bytes, segredo: str = SEGREDO) -> str:
+    instante = int(time.time())
+    assinatura = hmac.new(segredo.encode(), f"{instante}.".encode() + corpo, hashlib.sha256).hexdigest()
+    return f"t={instante},v1={assinatura}"
+
+
+def test_aplicar_lote_corrige_status_e_descarta_reentregas(db_session):
+    paga = _cobranca(db_session)
+    recusada = _cobranca(db_session)
+    pendente = _cobranca(db_session, "PENDENTE")
+    eventos = [
+        _evento("evt_1", "payment_intent.succeeded", paga.id),
+        _evento("evt_2", "payment_intent.payment_failed", recusada.id),
+        _evento("evt_3", "payment_intent.payment_failed", pendente.id),
+        _evento("evt_1", "payment_intent.succeeded", paga.id),
+    ]
+
+    assert aplicar_lote(db_session, eventos) == [True, True, True, False]
+    assert aplicar_lote(db_session, eventos[:1]) == [False]
+
+    db_session.expire_all()
+    assert paga.status == "PAGA"
+    assert recusada.status == "FALHA"
+    assert pendente.status == "PENDENTE"
+    assert db_session.query(EventoStripe).count() == 3
+
+
+def test_aplicador_agrupa_eventos_em_um_lote(session_factory):
+    db = session_factory()
+    ids = [_cobranca(db).id for _ in range(5)]
+    db.close()
+    aplicador = AplicadorEventosStripe(session_factory, tamanho_lote=10, espera_s=0.2)
+
+    with patch("app.services.webhook_service.aplicar_lote", wraps=aplicar_lote) as aplicar:
+        futuros = [aplicador.enviar(_evento(f"evt_{i}", "payment_intent.succeeded", i)) for i in ids]
+        assert [futuro.result(5) for futuro in futuros] == [True] * 5
+
+    assert aplicar.call_count == 1
+    db = session_factory()
+    assert db.query(Cobranca).filter_by(status="PAGA").count() == 5
+    db.close()
+
+
+def test_endpoint_webhook_verifica_assinatura(session_factory):
+    db = session_factory()
+    id_cobranca = _cobranca(db).id
+    db.close()
+    corpo = json.dumps(_evento("evt_9", "payment_intent.succeeded", id_cobranca)).encode()
+    app.dependency_overrides[get_aplicador_eventos_stripe] = lambda: AplicadorEventosStripe(session_factory)
+    try:
+        with patch("app.controller.webhook.settings.STRIPE_WEBHOOK_SECRET", SEGREDO):
+            client = TestClient(app)
+            invalida = client.post("/webhooks/stripe", content=corpo, headers={"Stripe-Signature": _assinar(corpo, "outro")})
+            primeira = client.post("/webhooks/stripe", content=corpo, headers={"Stripe-Signature": _assinar(corpo)})
+            reentrega = client.post("/webhooks/stripe", content=corpo, headers={"Stripe-Signature": _assinar(corpo)})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert invalida.status_code == 400
+    assert invalida.json()["codigo"] == "ASSINATURA_INVALIDA"
+    assert primeira.json() == {"recebido": True, "duplicado": False}
+    assert reentrega.json() == {"recebido": True, "duplicado": True}
+    db = session_factory()
+    assert db.get(Cobranca, id_cobranca).status == "PAGA"
+    db.close()
+
+
+def test_cobranca_assincrona_exige_segredo_do_webhook():
+    mock_service = MagicMock(spec=CobrancaService)
+    mock_service.criar_cobranca_na_fila.return_value = Cobranca(id=3, ciclista=1, valor=10.0, status="PENDENTE")
+    mock_service.processar_pagamento_de_cobranca.return_value = Cobranca(id=3, ciclista=1, valor=10.0, status="PAGA")
+    app.dependency_overrides[get_cobranca_service] = lambda: mock_service
+    try:
+        with patch("app.controller.cobranca.settings.STRIPE_WEBHOOK_SECRET", None), \
+                patch("app.controller.cobranca.settings.COBRANCA_ASSINCRONA", True):
+            client = TestClient(app)
+            explicita = client.post("/cobranca?assincrona=true", json={"valor": 10.0, "ciclista": 1})
+            padrao = client.post("/cobranca", json={"valor": 10.0, "ciclista": 1})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert explicita.status_code == 422
+    assert explicita.json()["codigo"] == "COBRANCA_ASSINCRONA_INDISPONIVEL"
+    # O padrão da configuração volta ao modo síncrono
+    assert padrao.status_code == 200
+    mock_service.criar_cobranca_assincrona.assert_not_called()
+    mock_service.processar_pagamento_de_cobranca.assert_called_once_with(3)